@@ -0,0 +1,72 @@
+"""
+File: benchmark_parsing.py
+Author: Alex Mees
+Date: 2025-03-13
+Description: Benchmark for the tabulated file parsers (run from the repository root: python -m benchmarks.benchmark_parsing)
+License: MIT
+"""
+# Standard library imports
+import os
+import sys
+import time
+import tempfile
+import argparse
+
+# Local application imports
+from src import constants
+from src.fetcher import Fetcher
+from src.wrangler import Wrangler
+
+
+def build_scaled_file(source_path: str, target_path: str, target_rows: int) -> int:
+    """
+    Write a copy of a sample file with its data lines repeated until it has at least target_rows lines.
+    Return:
+    [int] = size of the written file in bytes
+    """
+    with open(source_path, "r", encoding="utf-8") as source:
+        header = source.readline()
+        lines = [line if line.endswith('\n') else line + '\n' for line in source]
+    with open(target_path, "w", encoding="utf-8") as target:
+        target.write(header)
+        written = 0
+        while written < target_rows:
+            target.writelines(lines)
+            written += len(lines)
+    return os.path.getsize(target_path)
+
+
+def time_call(function, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    if (result[4]): #every parser returns the error string as fifth item
+        raise RuntimeError(result[4])
+    return elapsed
+
+
+def run(rows: int, sample: str):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, 'scaled.csv')
+        size = build_scaled_file(sample, file_path, rows)
+        print(f"File: {os.path.basename(sample)} x{rows} rows ({size/1e6:.1f} MB)")
+
+        for engine in constants.PARSER_ENGINES:
+            if (engine=='auto' or Wrangler.resolve_engine(engine)!=engine): #skip engines that aren't installed
+                continue
+            chunks, _ = Fetcher.stream_CSV(file_path)
+            print(f"stream ({engine:<7})      : {time_call(Wrangler.handle_tabulated_stream, chunks, engine=engine):.2f} s")
+
+        worker_counts = [1]
+        while worker_counts[-1]*2 <= (os.cpu_count() or 1):
+            worker_counts.append(worker_counts[-1]*2)
+        for workers in worker_counts:
+            print(f"parallel ({workers:>2} workers) : {time_call(Wrangler.handle_tabulated_parallel, file_path, workers=workers):.2f} s")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=2_000_000, help='number of data lines in the scaled file')
+    parser.add_argument('--sample', default=os.path.join('sample', 'agriculture_data.csv'), help='sample file to scale up')
+    arguments = parser.parse_args()
+    sys.exit(run(arguments.rows, arguments.sample))
@@ -0,0 +1,81 @@
+"""
+File: benchmark_text_storage.py
+Author: Alex Mees
+Date: 2025-03-13
+Description: Benchmark of Python vs Arrow string storage of TEXT columns (run from the repository root: python -m benchmarks.benchmark_text_storage)
+License: MIT
+"""
+# Standard library imports
+import os
+import sys
+import time
+import argparse
+
+# Third-party imports
+import numpy as np
+import pandas as pd
+
+# Local application imports
+from src import constants
+from src.wrangler import Wrangler
+from src.data_format import TableFormat, DataType
+
+
+def build_scaled_table(source_path: str, target_rows: int) -> TableFormat:
+    """
+    A typed data set with the rows of a sample file repeated until it has target_rows rows.
+    The first TEXT column gets a row number suffix, so it has one distinct value per row.
+    """
+    raw = pd.read_csv(source_path, dtype=str, keep_default_na=False)
+    raw = raw.iloc[np.resize(np.arange(len(raw)), target_rows)].reset_index(drop=True)
+    data, data_types = Wrangler.cast_tabulated_chunk(raw, Wrangler.infer_tabulated_types(raw))
+    first_text = data_types.index(DataType.TEXT)
+    data.isetitem(first_text, data.iloc[:, first_text] + '-' + pd.Series(np.arange(target_rows).astype(str)))
+    return TableFormat(dtype=data_types, data=data)
+
+
+def time_call(function, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    error = result[-1] if isinstance(result, tuple) else result #string methods return the error string, alone or last
+    if (error):
+        raise RuntimeError(error)
+    return elapsed
+
+
+def text_memory(table: TableFormat) -> int:
+    return sum(int(table.data.iloc[:, index].memory_usage(index=False, deep=True)) for index, data_type in enumerate(table.dtype) if data_type==DataType.TEXT)
+
+
+def run(rows: int, sample: str):
+    print(f"File: {os.path.basename(sample)} x{rows} rows")
+    base = build_scaled_table(sample, rows)
+    text_columns = [index for index, data_type in enumerate(base.dtype) if data_type==DataType.TEXT]
+    for storage in constants.TEXT_STORAGES:
+        table = TableFormat(dtype=list(base.dtype), data=base.data.copy())
+        _, error = table.set_text_storage(storage)
+        if (error):
+            print(f"{storage:<8}: skipped ({error})")
+            continue
+        print(f"{storage:<8}: TEXT memory {text_memory(table)/1e6:,.1f} MB")
+        unique_share = constants.UNIQUE_VALUES_MAX_SHARE
+        try:
+            for label, share in (('distinct values', unique_share), ('row-wise', 0.0)):
+                constants.UNIQUE_VALUES_MAX_SHARE = share #0 forces every column on the row-wise path
+                upper = sum(time_call(table.capitalization_rule, index, 'all') for index in text_columns)
+                strip = sum(time_call(table.remove_whitespace, index, 'both') for index in text_columns)
+                print(f"  {label:<16}: upper {upper:.2f} s, strip {strip:.2f} s")
+        finally: #the threshold is shared by the whole process, even a failed run must give it back
+            constants.UNIQUE_VALUES_MAX_SHARE = unique_share
+        print(f"  statistics      : {time_call(table.word_statistics, text_columns[0]):.2f} s")
+        print(f"  first search    : {time_call(table.search_result, text_columns[0], 'f00'):.2f} s (builds the index)")
+        print(f"  next search     : {time_call(table.search_result, text_columns[0], 'f001'):.3f} s")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=2_000_000, help='number of rows in the scaled data set')
+    parser.add_argument('--sample', default=os.path.join('sample', 'agriculture_data.csv'), help='sample file to scale up')
+    arguments = parser.parse_args()
+    sys.exit(run(arguments.rows, arguments.sample))
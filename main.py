@@ -16,6 +16,7 @@ Basic Workflow
 """
 
 # Standard library imports
+import multiprocessing
 
 # Third-party imports
 import pandas as pd
@@ -25,6 +26,8 @@ from src.fetcher import *
 from src.wrangler import *
 from src.gui import *
 from src.data_format import *
+from src.cache import DatasetCache
+from src.progress import LoadProgress
 
 class main:
     def __init__(self):
@@ -34,14 +37,22 @@ class main:
         self.window.show()
 
         # === MAIN VARIABLES SETUP ===
-        self.block_execution = False #set to wait till operation is over to allow processes (NOT USED NOW)
+        self.loaders: dict[LoadWorker, DataMode] = {} #files loading in the background and the data mode of their data set
         self.active_directory = '' #the directory the file open dialog will be pointed at initially
+        self.csv_read_mode = 'stream' #'full' reads the whole file before parsing, 'stream' parses it in chunks of lines, 'mapped' parses it in chunks of lines read through a memory map and its line offset index (the typed data set is held in memory in every mode), 'parallel' parses byte ranges in a process pool
+        self.csv_parser_engine = 'auto' #engine that splits tabulated text: 'python', 'csv', 'pandas', 'pyarrow' or 'auto' (see constants.PARSER_ENGINES)
+        self.use_cache = True #reopen unchanged tabulated files from the parsed data set cache
+        self.dataset_cache = DatasetCache()
+        self.parse_workers = None #number of processes in 'parallel' mode (None = number of cores)
+        self.csv_chunk_size = constants.CSV_CHUNK_SIZE #number of lines per chunk in 'stream' mode
+        self.compact_memory = True #downcast numbers and store repeated text as categoricals after loading (see TableFormat.compact_frame)
+        self.text_storage = 'python' #storage of TEXT columns of new data sets: 'python' (str objects) or 'pyarrow' (Arrow strings, see TableFormat.store_text_frame)
         
         self.use_custom_blocked_list = False #which blocked word list to use
 
         self.use_custom_dictionary = False #use a custom dictionary for word replacement
-        self.custom_dictionaries = [[''],['']] #the custom dictionaries to use
-        self.active_custom_dictionary = [''] #the active custom dictionary
+        self.custom_dictionaries: list[dict[str, list[str]]] = [] #the custom dictionaries to use, each one maps canonical terms to their variants
+        self.active_custom_dictionary: dict[str, list[str]] = {} #the active custom dictionary
         
         self.current_dataset_index = -1
         self.datasets: list[TableFormat] = [] #this holds all the data sets loaded by the system. [Limit size?]
@@ -50,7 +61,9 @@ class main:
         print("========= APP INITIALIZED ===============")
     
     
-        sys.exit(self.app.exec()) #putting this here so it won't block the rest of the commands.
+        exit_code = self.app.exec() #putting this here so it won't block the rest of the commands.
+        self.stop_loading()
+        sys.exit(exit_code)
 
     
 
@@ -143,9 +156,12 @@ class main:
             else:
                 blocked_words_list = constants.BLOCKED_WORD_LIST #user should be able to review these TODO:add option to add own list
             
-            self.datasets[self.current_dataset_index].blocked_words(col_index, blocked_words_list)
+            hits, error = self.datasets[self.current_dataset_index].blocked_words(col_index, blocked_words_list)
+            if (error):
+                self.window.update_statusbar(error)
+                return
             self.window.set_data_table(self.datasets[self.current_dataset_index].data.values.tolist())
-            self.window.add_to_log([self.datasets[self.current_dataset_index].data.columns[col_index], col_index, self.use_custom_blocked_list],'str_blocked')
+            self.window.add_to_log([self.datasets[self.current_dataset_index].data.columns[col_index], col_index, self.use_custom_blocked_list, hits],'str_blocked')
             self.window.update_statusbar('Blocked word Operation')
                     
         except IndexError:
@@ -169,10 +185,13 @@ class main:
             else:
                 dictionary = constants.COMMON_DICTIONARY_REPLACEMENTS
             
-            self.datasets[self.current_dataset_index].dictionary_words(col_index, dictionary)
+            counts, error = self.datasets[self.current_dataset_index].dictionary_words(col_index, dictionary)
+            if (error):
+                self.window.update_statusbar(error)
+                return
             self.window.set_data_table(self.datasets[self.current_dataset_index].data.values.tolist())
-            self.window.add_to_log([self.datasets[self.current_dataset_index].data.columns[col_index], col_index, self.use_custom_dictionary],'str_dictionary')
-            self.window.update_statusbar('Blocked word Operation')
+            self.window.add_to_log([self.datasets[self.current_dataset_index].data.columns[col_index], col_index, sum(counts.values()), counts],'str_dictionary')
+            self.window.update_statusbar('Dictionary word Operation')
                     
         except IndexError:
             self.window.update_statusbar('[ERROR] File "main.py", Function "baction_str_blocked_word", Wrong data column index.')
@@ -182,71 +201,142 @@ class main:
             self.window.update_statusbar('[ERROR] File "main.py", Function "baction_str_blocked_word", Unknown error.')        
 
     def baction_str_statistics(self):
-        pass
+        """
+        Button connected action for string statistics method
+        """
+        try:
+            col_index = self.window.dataset_column_index
+            statistics, error = self.datasets[self.current_dataset_index].word_statistics(col_index)
+            if (error):
+                self.window.update_statusbar(error)
+                return
+            self.window.add_to_log([self.datasets[self.current_dataset_index].data.columns[col_index], col_index, statistics],'str_statistics')
+            self.window.update_statusbar('String Statistics Operation')
 
-    def baction_str_duplicates(self):
-        pass
+        except IndexError:
+            self.window.update_statusbar('[ERROR] File "main.py", Function "baction_str_statistics", Wrong data column index.')
+        except Exception as e:
+            self.window.update_statusbar(f'[ERROR] File "main.py", Function "baction_str_statistics",\n{e}')
 
-    def baction_str_split(self):
-        pass
+    def baction_str_duplicates(self):
+        """
+        Button connected action for duplicates method: find the near duplicates of the selected column and ask to drop or merge them
+        """
+        try:
+            col_index = self.window.dataset_column_index
+            dataset = self.datasets[self.current_dataset_index]
+            if (dataset.dtype[col_index]!=DataType.TEXT): #near duplicates are only defined on text
+                self.window.update_statusbar('Error: not a text column.')
+                return
+            groups, error = dataset.find_duplicates([col_index], near=True)
+            if (error):
+                self.window.update_statusbar(error)
+                return
+            if not (groups):
+                self.window.update_statusbar('No duplicates found.')
+                return
+            c_name = dataset.data.columns[col_index]
+            preview = '\n'.join(' | '.join(str(value) for value in dataset.data[c_name].iloc[group[:5]]) for group in groups[:10]) #first groups, for review
+            dialog = QMessageBox(self.window)
+            dialog.setWindowTitle('Duplicates')
+            dialog.setText(f'{len(groups):,} groups of duplicates ({sum(len(group) for group in groups):,} rows) in {c_name}.\n'
+                           'Drop keeps the first row of each group, Merge gives every row of a group the value of its first row.')
+            dialog.setDetailedText(preview)
+            drop_button = dialog.addButton('Drop', QMessageBox.ButtonRole.AcceptRole)
+            merge_button = dialog.addButton('Merge', QMessageBox.ButtonRole.AcceptRole)
+            dialog.addButton(QMessageBox.StandardButton.Cancel)
+            dialog.exec()
+            if (dialog.clickedButton()==drop_button):
+                mode = 'drop'
+            elif (dialog.clickedButton()==merge_button):
+                mode = 'merge'
+            else:
+                return
+            changed, error = dataset.remove_duplicates(groups, mode, [col_index])
+            if (error):
+                self.window.update_statusbar(error)
+                return
+            self.update_database_selected(self.current_dataset_index)
+            self.window.add_to_log([c_name, col_index, len(groups), mode, changed],'str_duplicates')
+            self.window.update_statusbar('Duplicates Operation')
 
-    def baction_num_operate_int(self, dataset_index = 0, c_index=0, col_data: pd.Series=[], operation: NumericOperation = NumericOperation.ADDITION, num_arg: int=1):
-        col_name = self.datasets[dataset_index].data.columns[c_index] #name of the data column        
+        except IndexError:
+            self.window.update_statusbar('[ERROR] File "main.py", Function "baction_str_duplicates", Wrong data column index.')
+        except Exception as e:
+            self.window.update_statusbar(f'[ERROR] File "main.py", Function "baction_str_duplicates",\n{e}')
 
-        result, error, operated_data = self.datasets[dataset_index].operate_int(c_index,col_data,operation,num_arg)
-        print(operation)
+    def baction_str_split(self):
+        """
+        Button connected action for split on delimiter method
+        """
+        try:
+            col_index = self.window.dataset_column_index
+            dataset = self.datasets[self.current_dataset_index]
+            delimiter, accepted = QInputDialog.getText(self.window, 'Split on Delimiter', 'Delimiter:', text=',')
+            if not (accepted):
+                return
+            max_splits, accepted = QInputDialog.getInt(self.window, 'Split on Delimiter', 'Maximum number of splits (-1 = no limit):', -1, -1, 1000)
+            if not (accepted):
+                return
+            names, error = dataset.split_text(col_index, delimiter, max_splits)
+            if (error):
+                self.window.update_statusbar(error)
+                return
+            self.update_database_selected(self.current_dataset_index)
+            self.window.add_to_log([dataset.data.columns[col_index], col_index, delimiter, names],'str_split')
+            self.window.update_statusbar('Split Operation')
 
-        if (result):
-            self.datasets[dataset_index].data[col_name] = operated_data.astype(int)
-            self.update_database_selected(dataset_index)
-            #ADD TO LOG
+        except IndexError:
+            self.window.update_statusbar('[ERROR] File "main.py", Function "baction_str_split", Wrong data column index.')
+        except Exception as e:
+            self.window.update_statusbar(f'[ERROR] File "main.py", Function "baction_str_split",\n{e}')
 
-        else:
-            #print(error)
-            pass
+    def baction_num_operate_int(self, dataset_index = 0, c_index=0, operation: NumericOperation = NumericOperation.ADDITION, num_arg: float=1):
+        """
+        Apply a numeric operation to an INTEGER column (see baction_num_operate).
+        """
+        self.baction_num_operate(dataset_index, c_index, [(operation, num_arg)])
 
-    def baction_num_operate_float(self, dataset_index = 0, c_index=0, col_data: pd.Series=[], operation: NumericOperation = NumericOperation.ADDITION, num_arg: float=1.0):
-        col_name = self.datasets[dataset_index].data.columns[c_index] #name of the data column
-        col_data = self.datasets[dataset_index].data[col_name].astype(float) #the actual data series
+    def baction_num_operate_float(self, dataset_index = 0, c_index=0, operation: NumericOperation = NumericOperation.ADDITION, num_arg: float=1.0):
+        """
+        Apply a numeric operation to a FLOAT column (see baction_num_operate).
+        """
+        self.baction_num_operate(dataset_index, c_index, [(operation, num_arg)])
 
-        result, error, operated_data = self.datasets[dataset_index].operate_float(c_index,col_data,operation,num_arg)
-        print(result)
-        print(error)
+    def baction_num_operate(self, dataset_index: int=-1, c_index: int=-1, steps: list[tuple]=[]):
+        """
+        Apply a chain of numeric operations to a column in one pass and a single column write (see NumericExpression).
 
+        Args:
+        dataset_index (int) = the data set
+        c_index (int) = the column
+        steps (list[tuple]) = (NumericOperation, argument) for each operation, in order
+        """
+        expression = self.datasets[dataset_index].numeric_expression(c_index)
+        for operation, argument in steps:
+            expression.add(operation, argument)
+        result, message = expression.commit()
         if (result):
-            self.datasets[dataset_index].data[col_name] = operated_data.astype(float)
             self.update_database_selected(dataset_index)
-            #ADD TO LOG
-
+            self.window.add_to_log([message])
         else:
-            #print(error)
-            pass
+            self.window.update_statusbar(message)
 
     def baction_num_clamp_int(self, dataset_index: int=-1, sel_data_col: int=-1, lo=0, hi=10):
         """
         Clamp int data between lo and hi ranges.
         """
-        col_name = self.datasets[dataset_index].data.columns[sel_data_col] #the column name for the selected data, selected column
-        lo = int(self.window.v_num_clamplo.text()) #validation already occured on data entry
-        hi = int(self.window.v_num_clamphi.text()) #validation already occured on data entry
-
-        # Not applying directly the data operation so you can work iterating all the desired operations in the future
-        self.datasets[dataset_index].data[col_name] = self.datasets[dataset_index].clamp_int(col_data=self.datasets[dataset_index].data[col_name], low_range=lo, high_range=hi)
-        self.update_database_selected(dataset_index)
-        #ADD TO LOG
+        lo = float(self.window.v_num_clamplo.text()) #validation already occured on data entry, whole numbers keep the column INTEGER
+        hi = float(self.window.v_num_clamphi.text()) #validation already occured on data entry
+        self.baction_num_operate(dataset_index, sel_data_col, [(NumericOperation.CLAMP, (lo, hi))])
 
     def baction_num_clamp_float(self, dataset_index: int=-1, sel_data_col: int=-1, lo=0.0, hi=10.0):
         """
-        Clamp int data between lo and hi ranges.
+        Clamp float data between lo and hi ranges.
         """
-        col_name = self.datasets[dataset_index].data.columns[sel_data_col] #the column name for the selected data, selected column
-        lo = int(self.window.v_num_clamplo.text()) #validation already occured on data entry
-        hi = int(self.window.v_num_clamphi.text()) #validation already occured on data entry
-
-        # Not applying directly the data operation so you can work iterating all the desired operations in the future
-        self.datasets[dataset_index].data[col_name] = self.datasets[dataset_index].clamp_float(col_data=self.datasets[dataset_index].data[col_name], low_range=lo, high_range=hi)
-        
-        self.update_database_selected(dataset_index)
+        lo = float(self.window.v_num_clamplo.text()) #validation already occured on data entry
+        hi = float(self.window.v_num_clamphi.text()) #validation already occured on data entry
+        self.baction_num_operate(dataset_index, sel_data_col, [(NumericOperation.CLAMP, (lo, hi))])
 
     def baction_num_int2float(self):
         pass
@@ -260,12 +350,13 @@ class main:
 # region FILE HANDLING
 
     # ==== Open Files by Types ====
-    def open_CSV(self,file_path) -> Tuple [pd.DataFrame,list[DataType], str, bool, str]:
+    def open_CSV(self,file_path, progress: LoadProgress=None) -> Tuple [pd.DataFrame,list[DataType], str, bool, str]:
         """
-        Initialize file opening and data handling for CSV
+        Initialize file opening and data handling for CSV (runs in a loading thread, see start_loading)
 
         Args:
         file_path (str) = full file path
+        progress (LoadProgress) = progress of the load, also used to cancel it
 
         Outputs:
         DataFrame = the dataframe of the processed data set
@@ -274,25 +365,127 @@ class main:
         bool = if data has delimiter
         str = the error string
         """
-        raw_data, error = Fetcher.read_CSV(file_path)
+        mapped = None
+        head, truncated, error = Fetcher.read_head(file_path) #encoding, delimiter and header are found from the first bytes only
+        if (error):
+            return None, None, None, None, error
+        delimiter, has_header, encoding, error = Wrangler.sniff_tabulated(head, truncated)
+        if (error):
+            return None, None, None, None, error
+
+        read_options = {'engine': Wrangler.resolve_engine(self.csv_parser_engine), 'encoding': encoding, 'delimiter': delimiter, 'has_header': has_header} #part of the cache key
+        if (self.use_cache):
+            data, data_types, cached_delimiter, cached_has_header, error = self.dataset_cache.load(file_path, read_options)
+            if not (error):
+                return data, data_types, cached_delimiter, cached_has_header, error
+
+        read_mode = self.csv_read_mode
+        if (read_mode in ('parallel', 'mapped') and (Fetcher.compression(file_path) or encoding not in constants.ASCII_COMPATIBLE_ENCODINGS)): #these files can only be read front to back
+            read_mode = 'stream'
+
+        if (read_mode=='parallel'):
+            data, data_types, delimiter, has_header, error = Wrangler.handle_tabulated_parallel(file_path, delimiter, has_header, self.parse_workers, self.csv_parser_engine, progress, encoding) #reads the file by itself
+            if not (error):
+                self.cache_dataset(file_path, data, data_types, delimiter, has_header, read_options, progress)
+                return data, data_types, delimiter, has_header, error
+            return None, None, None, None, error
+
+        reopen = None #second read of the file, for columns demoted to TEXT after their first chunks were cast
+        match read_mode:
+            case 'stream':
+                raw_data, error = Fetcher.stream_CSV(file_path, self.csv_chunk_size, encoding) #raw_data is an iterator of line chunks
+                reopen = lambda: Fetcher.stream_CSV(file_path, self.csv_chunk_size, encoding)[0]
+            case 'mapped':
+                mapped, error = Fetcher.map_CSV(file_path, encoding)
+                raw_data = mapped.iter_chunks(self.csv_chunk_size) if mapped else None
+                reopen = lambda: mapped.iter_chunks(self.csv_chunk_size)
+            case _:
+                raw_data, error = Fetcher.read_CSV(file_path, encoding)
         if not (error):
-            data, data_types, delimiter, has_header, error = Wrangler.handle_tabulated(raw_data) #this take the raw text data and process it
+            try:
+                if (read_mode in ('stream', 'mapped')):
+                    data, data_types, delimiter, has_header, error = Wrangler.handle_tabulated_stream(raw_data, delimiter, has_header, self.csv_parser_engine, progress, reopen) #parse and cast chunk by chunk
+                else:
+                    data, data_types, delimiter, has_header, error = Wrangler.handle_tabulated(raw_data, delimiter, has_header, self.csv_parser_engine) #this take the raw text data and process it
+            finally:
+                if (mapped):
+                    mapped.close() #the parsed data set doesn't need the map anymore
             if not (error):
+                self.cache_dataset(file_path, data, data_types, delimiter, has_header, read_options, progress)
                 return data, data_types, delimiter, has_header, error
             else:
-                return None, None, None, None, error   
+                return None, None, None, None, error
         else:
             return None, None, None, None, error
         
-    def open_SQLite(self,file_path):
+    def cache_dataset(self, file_path, data, data_types, delimiter, has_header, read_options: dict=None, progress: LoadProgress=None):
         """
-        Initialize data connection and data handling for SQL
+        Store a freshly parsed data set in the cache. Cache errors are only reported, the data set is still loaded.
+        When called from a loading thread the warning is kept in the load progress, to be shown by the GUI thread.
+        """
+        if (self.use_cache):
+            error = self.dataset_cache.store(file_path, data, data_types, delimiter, has_header, read_options)
+            if (error):
+                warning = f'[WARNING] File "main.py", Function "cache_dataset".\n{error}'
+                if (progress):
+                    progress.warnings.append(warning)
+                else:
+                    self.window.update_statusbar(warning)
+
+    def clear_cache(self):
+        """
+        Remove every cached data set.
+        """
+        removed = self.dataset_cache.invalidate()
+        self.window.update_statusbar(f'Data set cache cleared ({removed} entries removed)')
+
+    def pick_SQLite_query(self,file_path) -> Tuple [str, list[str], list[tuple], str]:
+        """
+        Ask the user for the table, columns and filter to read from a SQLite database (on the GUI thread, before loading).
 
         Args:
         file_path (str) = full file path
+
+        Outputs:
+        str = the table or view to read
+        list[str] = the columns to read
+        list[tuple] = the (column, operator, value) filters
+        str = the error string
+        """
+        tables, error = Fetcher.list_SQLite_tables(file_path)
+        if (error):
+            return None, None, None, error
+        dialog = SQLiteQueryDialog(tables, lambda table: Fetcher.list_SQLite_columns(file_path, table), self.window)
+        if (dialog.exec()!=QDialog.DialogCode.Accepted):
+            return None, None, None, 'SQLite reading cancelled.'
+        table, columns, where = dialog.get_query()
+        if not (columns):
+            return None, None, None, 'No columns selected.'
+        return table, columns, where, None
+
+    def pick_XLSX_sheet(self,file_path) -> Tuple [str, str]:
         """
-        #"E:/GUAPO/guapo/sample/sampleSQL.db"
-        Fetcher.read_SQLite(file_path) #TODO: replace with proper file path
+        Ask the user for the sheet to read from a XLSX workbook (on the GUI thread, before loading). Only that sheet is read.
+
+        Args:
+        file_path (str) = full file path
+
+        Outputs:
+        str = the sheet name
+        str = the error string
+        """
+        if (file_path.lower().endswith('.xls')):
+            return None, 'Legacy XLS workbooks are not supported, save the file as XLSX.'
+        sheets, error = Fetcher.list_XLSX_sheets(file_path)
+        if (error):
+            return None, error
+        if (len(sheets) > 1): #only ask when there is a choice
+            labels = [f'{name} ({rows} rows)' if (rows is not None) else name for name, rows in sheets]
+            label, accepted = QInputDialog.getItem(self.window, 'Select sheet', 'Sheet to read:', labels, 0, False)
+            if not (accepted):
+                return None, 'XLSX reading cancelled.'
+            return sheets[labels.index(label)][0], None
+        return sheets[0][0], None
 
     def get_file_path_by_type(self, type='CSV'):
         """
@@ -323,19 +516,19 @@ class main:
             match type:
                 case 'CSV':
                     d_caption = "Select Tabulated Data"
-                    d_filter = "CSV Files (*.csv);;TSV Files (*.tsv);;Text Files (*.txt);;All Files (*)"
+                    d_filter = "CSV Files (*.csv *.csv.gz *.csv.bz2 *.csv.xz *.zip);;TSV Files (*.tsv *.tsv.gz *.tsv.bz2 *.tsv.xz *.zip);;Text Files (*.txt *.txt.gz);;Compressed Files (*.gz *.bz2 *.xz *.zip);;All Files (*)"
                 case 'JSON':
                     d_caption = "Select JSON Data"
-                    d_filter = "JSON Files (*.json);;All Files (*)"
+                    d_filter = "JSON Files (*.json *.jsonl *.ndjson *.json.gz *.jsonl.gz *.ndjson.gz);;Compressed Files (*.gz *.bz2 *.xz *.zip);;All Files (*)"
                 case 'SQLite':
                     d_caption = "Select SQLite database to connect"
-                    d_filter = "SQL database (*.db);;All Files (*)"
+                    d_filter = "SQL database (*.db *.sqlite *.sqlite3);;All Files (*)"
                 case 'geographic':
                     d_caption = "Select KML/KMZ file"
                     d_filter = "KML,KMZ Files (*.kml *.kmz);;All Files (*)"
                 case 'XLS':
                     d_caption = "Select Excel file"
-                    d_filter = "XLS,XLSX Files (*.xls *.xlsx);;All Files (*)"
+                    d_filter = "XLSX Files (*.xlsx *.xlsm);;All Files (*)"
                 case _:
                     raise ValueError
         except ValueError:
@@ -347,7 +540,6 @@ class main:
             self.active_directory=''
 
         try:     
-            self.block_execution = True
             file_path, filter_option = QFileDialog.getOpenFileName(parent_window, caption=d_caption, directory=self.active_directory, filter=d_filter)
             if (file_path and os.path.isfile(file_path)): #if returned path exists and is valid
                 self.active_directory = os.path.dirname(file_path)
@@ -359,47 +551,195 @@ class main:
         except FileNotFoundError:
             self.window.update_statusbar('[ERROR] File "main.py", Function "get_file_path", Bad path string or missing file.')
         except Exception as e:
-            self.block_execution = False
             self.window.update_statusbar(f'[ERROR] File "main.py", Function "get_file_path", Unknown error when getting file path.\n{e}')
             print(f'{e}')
 
     def process_read_data(self, file_path: str='', type: str=''):
+        """
+        Start loading a file by type in the background. Choices (table, sheet) are asked first, on the GUI thread.
+        """
         try:
+            dmode = DataMode.TABLE
+            total_bytes = 0 if Fetcher.compression(file_path) else os.path.getsize(file_path) #progress of compressed files has no known end
             match type:
                 case 'CSV':
-                    data, dataset_type, delimiter, has_header, error = self.open_CSV(file_path)
-                    if not (error):
-                        self.datasets.append(TableFormat(DataMode.TABLE, dtype=dataset_type,dformat=[], dheaders=data.columns.to_list(),data=data))
-                        self.current_dataset_index = len(self.datasets)-1
-                        self.update_database_selected(self.current_dataset_index)
-                        self.window.add_dataset_item_entry(os.path.basename(file_path), len(self.datasets)-1, data.columns.tolist(), dataset_type)
-
-                        if (len(self.datasets)>0):
-                            self.window.no_data_label.hide()
-                            self.window.data_set_item_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
-                        
-                    self.block_execution = False
+                    def job(progress):
+                        data, dataset_type, delimiter, has_header, error = self.open_CSV(file_path, progress)
+                        return data, dataset_type, error
                 case 'JSON':
-                    pass
+                    dmode = DataMode.DICTIONARY
+                    job = lambda progress: Fetcher.read_JSON(file_path, progress=progress)
                 case 'SQLite':
-                    pass
+                    table, columns, where, error = self.pick_SQLite_query(file_path)
+                    if (error):
+                        self.window.update_statusbar(error)
+                        return
+                    total_bytes = 0 #rows are counted, not bytes
+                    job = lambda progress: Fetcher.read_SQLite(file_path, table, columns, where, progress=progress)
                 case 'geographic':
-                    pass
+                    return
                 case 'XLS':
-                    pass
+                    sheet_name, error = self.pick_XLSX_sheet(file_path)
+                    if (error):
+                        self.window.update_statusbar(error)
+                        return
+                    total_bytes = 0
+                    job = lambda progress: Fetcher.read_XLSX(file_path, sheet_name, progress=progress)
                 case _:
                     raise ValueError
+            self.start_loading(os.path.basename(file_path), job, dmode, total_bytes)
         except ValueError:
-            self.block_execution = False
-            self.window.update_statusbar('[ERROR] File "main.py", Function "get_file_path", Unknown error on [file type] check.')
+            self.window.update_statusbar('[ERROR] File "main.py", Function "process_read_data", Unknown error on [file type] check.')
         except FileNotFoundError:
-            self.block_execution = False
-            self.window.update_statusbar('[ERROR] File "main.py", Function "get_file_path", Bad path string or missing file.')
+            self.window.update_statusbar('[ERROR] File "main.py", Function "process_read_data", Bad path string or missing file.')
         except Exception as e:
-            self.block_execution = False
-            self.window.update_statusbar(f'[ERROR] File "main.py", Function "get_file_path", Unknown error when getting file path.\n{e}')
+            self.window.update_statusbar(f'[ERROR] File "main.py", Function "process_read_data", Unknown error when reading file.\n{e}')
             print(f'{e}')
+
+    def start_loading(self, name: str, job, dmode: DataMode=DataMode.TABLE, total_bytes: int=0):
+        """
+        Run a loading job in its own thread. Several files can load at the same time.
+
+        Args:
+        name (str) = the data set name
+        job = function taking a LoadProgress and returning (data frame, data types, error)
+        dmode (DataMode) = the data mode of the loaded data set
+        total_bytes (int) = size to read, for the progress percentage (0 if unknown)
+        """
+        if (self.compact_memory):
+            job = self.compacted_job(name, job)
+        if (self.text_storage!='python'):
+            job = self.text_storage_job(job)
+        worker = LoadWorker(name, job, total_bytes, self.window)
+        worker.progress.connect(self.report_loading)
+        worker.loaded.connect(self.finish_loading)
+        worker.failed.connect(self.fail_loading)
+        self.loaders[worker] = dmode
+        worker.start()
+        self.window.update_statusbar(f'Loading {name}...')
+
+    def compacted_job(self, name: str, job):
+        """
+        Wrap a loading job so the loaded data set is compacted in the loading thread (see TableFormat.compact_frame).
+        The per column memory report is kept in data.attrs['memory_report'] and the total saving is shown once loading is over.
+        """
+        def run(progress: LoadProgress):
+            data, data_types, error = job(progress)
+            if (error) or (data is None):
+                return data, data_types, error
+            data, data_types, report = TableFormat.compact_frame(data, data_types)
+            data.attrs['memory_report'] = report
+            before = sum(column['before'] for column in report)
+            saved = before - sum(column['after'] for column in report)
+            if (saved > 0):
+                progress.warnings.append(f'Compacted {name}: {saved / 2**20:,.1f} MB saved ({saved * 100 // before}%) in {sum(column["after"] < column["before"] for column in report)} columns')
+            return data, data_types, error
+        return run
+
+    def text_storage_job(self, job):
+        """
+        Wrap a loading job so the TEXT columns of the loaded data set are converted to the text storage setting in the loading thread.
+        """
+        storage = self.text_storage
+        def run(progress: LoadProgress):
+            data, data_types, error = job(progress)
+            if (error) or (data is None):
+                return data, data_types, error
+            data, _, storage_error = TableFormat.store_text_frame(data, data_types, storage)
+            if (storage_error):
+                progress.warnings.append(storage_error)
+            else:
+                data.attrs['text_storage'] = storage
+            return data, data_types, error
+        return run
+
+    def toggle_text_storage(self):
+        """
+        Switch the TEXT columns of the selected data set between Python and Arrow strings.
+        """
+        if not (0 <= self.current_dataset_index < len(self.datasets)):
+            self.window.update_statusbar('No data set selected.')
+            return
+        dataset = self.datasets[self.current_dataset_index]
+        storage = 'python' if (dataset.text_storage=='pyarrow') else 'pyarrow'
+        converted, error = dataset.set_text_storage(storage)
+        if (error):
+            self.window.update_statusbar(error)
+            return
+        self.window.update_statusbar(f'Text storage of {dataset.dname or "the data set"}: {storage} ({converted} columns converted)')
+
+    def report_loading(self, worker: LoadWorker):
+        """
+        Show the progress of a load in the status bar.
+        """
+        progress = worker.load_progress
+        message = f'Loading {worker.name}: {progress.rows:,} rows'
+        if (progress.bytes_read):
+            message += f', {progress.bytes_read / 1e6:,.1f} MB'
+        if (progress.percent() is not None):
+            message += f' ({progress.percent()}%)'
+        if (len(self.loaders) > 1):
+            message += f' [{len(self.loaders)} files loading]'
+        self.window.update_statusbar(message)
+
+    def finish_loading(self, worker: LoadWorker, result: tuple):
+        """
+        Add the data set of a finished load (signal from the loading thread, runs on the GUI thread).
+        """
+        dmode = self.loaders.pop(worker, DataMode.TABLE)
+        data, dataset_type, error = result
+        if (error):
+            self.window.update_statusbar(f'Loading cancelled: {worker.name}' if worker.load_progress.cancelled else error)
+        else:
+            self.add_dataset(worker.name, data, dataset_type, dmode)
+            self.window.update_statusbar(f'Loaded {worker.name}: {len(data):,} rows')
+        for warning in worker.load_progress.warnings:
+            self.window.update_statusbar(warning)
+        worker.deleteLater()
+
+    def fail_loading(self, worker: LoadWorker, error: str):
+        """
+        Report a load that raised an error or was cancelled (signal from the loading thread, runs on the GUI thread).
+        """
+        self.loaders.pop(worker, None)
+        if (worker.load_progress.cancelled):
+            self.window.update_statusbar(f'Loading cancelled: {worker.name}')
+        else:
+            self.window.update_statusbar(f'[ERROR] File "main.py", Function "start_loading", Loading {worker.name} failed.\n{error}')
+        worker.deleteLater()
+
+    def cancel_loading(self):
+        """
+        Cancel every load in progress, each one stops at its next chunk.
+        """
+        for worker in self.loaders:
+            worker.cancel()
+        if (self.loaders):
+            self.window.update_statusbar(f'Cancelling {len(self.loaders)} loading files...')
+
+    def stop_loading(self):
+        """
+        Cancel every load in progress and wait for the threads to end (on exit).
+        """
+        for worker in list(self.loaders):
+            worker.cancel()
+            worker.wait()
     
+    def add_dataset(self, name: str, data: pd.DataFrame, data_types: list[DataType], dmode: DataMode=DataMode.TABLE):
+        """
+        Add a loaded data set to the data set list and select it.
+        """
+        self.datasets.append(TableFormat(dmode, dtype=data_types,dformat=[], dheaders=data.columns.to_list(),data=data))
+        self.datasets[-1].text_storage = data.attrs.get('text_storage', 'python')
+        self.datasets[-1].dname = name
+        self.current_dataset_index = len(self.datasets)-1
+        self.update_database_selected(self.current_dataset_index)
+        self.window.add_dataset_item_entry(name, len(self.datasets)-1, data.columns.tolist(), data_types)
+
+        if (len(self.datasets)>0):
+            self.window.no_data_label.hide()
+            self.window.data_set_item_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
+
     def delete_dataset(self):
         """
         Remove selected data set.
@@ -487,4 +827,5 @@ class main:
 #endregion
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support() #needed by the parallel parser worker processes in the frozen executable
     main()
\ No newline at end of file
@@ -0,0 +1,223 @@
+"""
+File: cache.py
+Author: Alex Mees
+Date: 2025-03-13
+Description: On disk columnar cache of parsed data sets, so reopening an unchanged file skips parsing and type detection
+License: MIT
+"""
+# Standard library imports
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Tuple
+
+# Third-party imports
+import pandas as pd
+import numpy as np
+try: #optional, Arrow IPC (feather) files are faster to load than .npz
+    import pyarrow.feather as feather
+except ImportError:
+    feather = None
+
+# Local application imports
+from . import constants
+from .data_format import DataType
+
+
+class DatasetCache:
+    """
+    Cache of parsed data frames, data types and delimiter/header information, keyed by file path + size + modification time
+    and the read options that change the parsed result (parser engine, encoding, delimiter, header).
+    Entries are evicted least recently used first when the cache grows past its size limit.
+    """
+    INDEX_FILE = 'index.json'
+
+    def __init__(self, cache_dir: str=constants.CACHE_DIRECTORY, size_limit: int=constants.CACHE_SIZE_LIMIT):
+        self.cache_dir = cache_dir
+        self.size_limit = size_limit #bytes
+        self._lock = threading.Lock() #several files can be loaded at the same time
+        self._index = None #key => entry metadata, loaded on first use
+
+    # ===== KEYS AND INDEX ===== #
+    @staticmethod
+    def file_key(file_path: str, options: dict=None) -> str:
+        """
+        Fingerprint of a file read with some options: absolute path + size + modification time + the options.
+        Any change to the file or to the options gives a new key.
+        """
+        stat = os.stat(file_path)
+        fingerprint = f'{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}|{json.dumps(options or {}, sort_keys=True)}'
+        return hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()
+
+    def _load_index(self) -> dict:
+        if (self._index is None):
+            try:
+                with open(os.path.join(self.cache_dir, self.INDEX_FILE), "r", encoding="utf-8") as file:
+                    self._index = json.load(file)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self._index = {}
+        return self._index
+
+    def _save_index(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_path = os.path.join(self.cache_dir, self.INDEX_FILE + '.tmp')
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(self._index, file)
+        os.replace(temp_path, os.path.join(self.cache_dir, self.INDEX_FILE)) #never leave a half written index
+
+    def _remove_entry(self, key: str):
+        entry = self._index.pop(key, None)
+        if (entry):
+            try:
+                os.remove(os.path.join(self.cache_dir, entry['data_file']))
+            except FileNotFoundError:
+                pass
+
+    # ===== NPZ COLUMNS ===== #
+    @staticmethod
+    def _npz_arrays(col_data: pd.Series, index: int) -> dict:
+        """
+        Arrays of one column for a .npz file, without object arrays (they would need pickle to load).
+        Numbers, booleans and dates are stored as they are ('c'). Nullable booleans get their missing mask ('m').
+        Text is stored as its UTF-8 bytes ('c'), the offset of each value in them ('o') and the missing mask ('m').
+        """
+        if (col_data.dtype=='boolean'):
+            return {f'c{index}': col_data.to_numpy(dtype=bool, na_value=False), f'm{index}': col_data.isna().to_numpy()}
+        if (isinstance(col_data.dtype, np.dtype) and col_data.dtype!=object):
+            return {f'c{index}': col_data.to_numpy()}
+        missing = col_data.isna().to_numpy()
+        encoded = [b'' if (is_missing) else (value if isinstance(value, str) else str(value)).encode('utf-8')
+                   for value, is_missing in zip(col_data.to_numpy(dtype=object), missing)]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        return {f'c{index}': np.frombuffer(b''.join(encoded), dtype=np.uint8), f'o{index}': offsets, f'm{index}': missing}
+
+    @staticmethod
+    def _npz_column(arrays, index: int):
+        """
+        Rebuild a column stored by _npz_arrays.
+        """
+        values = arrays[f'c{index}']
+        if (f'o{index}' in arrays.files): #text
+            offsets, missing, buffer = arrays[f'o{index}'], arrays[f'm{index}'], values.tobytes()
+            column = np.empty(len(missing), dtype=object)
+            column[:] = [None if (missing[row]) else buffer[offsets[row]:offsets[row + 1]].decode('utf-8') for row in range(len(missing))]
+            return column
+        if (f'm{index}' in arrays.files): #nullable booleans
+            return pd.arrays.BooleanArray(values, arrays[f'm{index}'])
+        return values
+
+    # ===== PUBLIC METHODS ===== #
+    def load(self, file_path: str, options: dict=None) -> Tuple [pd.DataFrame, list[DataType], str, bool, str]:
+        """
+        Get a cached data set for a file, if the file didn't change since it was stored with the same read options.
+        Args:
+        [str] = full file path of the source file
+        [dict] = the read options that change the parsed result (JSON serializable)
+        Return:
+        [pd.DataFrame] = the typed data frame
+        list[DataType] = the data type for each column
+        [str] = the delimiter
+        [bool] = if data has header
+        [str] = error string (None if OK, a message on cache miss)
+        """
+        try:
+            key = DatasetCache.file_key(file_path, options)
+            with self._lock:
+                entry = self._load_index().get(key)
+                if not (entry):
+                    return None, None, None, None, f"Not cached: {file_path}"
+                data_path = os.path.join(self.cache_dir, entry['data_file'])
+                entry['last_access'] = time.time()
+                self._save_index()
+
+            if (entry['format']=='feather'):
+                df = feather.read_feather(data_path)
+            else:
+                with np.load(data_path, allow_pickle=False) as arrays: #no object arrays, loading never runs pickled code
+                    df = pd.DataFrame({index: DatasetCache._npz_column(arrays, index) for index in range(len(entry['headers']))}, copy=False)
+            df.columns = entry['headers']
+            data_types = [DataType[name] for name in entry['data_types']]
+            return df, data_types, entry['delimiter'], entry['has_header'], None
+
+        except Exception as e:
+            return None, None, None, None, f"Cache reading error: {e}"
+
+    def store(self, file_path: str, df: pd.DataFrame, data_types: list[DataType], delimiter: str, has_header: bool, options: dict=None) -> str:
+        """
+        Store a parsed data set for a file read with some options (see load), replacing older entries for the same path.
+        Return:
+        [str] = error string (None if OK)
+        """
+        try:
+            key = DatasetCache.file_key(file_path, options)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            stored = df.copy(deep=False)
+            stored.columns = [str(index) for index in range(len(df.columns))] #column labels may repeat or not be strings
+            stored.attrs = {} #the type report holds DataType values, which Arrow can't store as metadata
+
+            if (feather is not None):
+                data_format, data_file = 'feather', f'{key}.arrow'
+                feather.write_feather(stored, os.path.join(self.cache_dir, data_file), compression='uncompressed') #uncompressed files can be memory mapped on load
+            else:
+                data_format, data_file = 'npz', f'{key}.npz'
+                arrays = {}
+                for index in range(len(stored.columns)):
+                    arrays.update(DatasetCache._npz_arrays(stored[str(index)], index))
+                np.savez(os.path.join(self.cache_dir, data_file), **arrays)
+
+            with self._lock:
+                index = self._load_index()
+                source_path = os.path.abspath(file_path)
+                for old_key in [old_key for old_key, entry in index.items() if entry['source']==source_path and old_key!=key]: #the file or the options changed, old entries are stale
+                    self._remove_entry(old_key)
+                index[key] = {'source': source_path,
+                              'data_file': data_file,
+                              'format': data_format,
+                              'bytes': os.path.getsize(os.path.join(self.cache_dir, data_file)),
+                              'headers': [header if isinstance(header, str) else int(header) for header in df.columns],
+                              'data_types': [data_type.name for data_type in data_types],
+                              'delimiter': delimiter,
+                              'has_header': has_header,
+                              'last_access': time.time()}
+                self._evict()
+                self._save_index()
+            return None
+
+        except Exception as e:
+            return f"Cache writing error: {e}"
+
+    def invalidate(self, file_path: str=None) -> int:
+        """
+        Remove the cached entries for a file, or every entry if no file is given.
+        Return:
+        [int] = number of removed entries
+        """
+        with self._lock:
+            index = self._load_index()
+            if (file_path is None):
+                keys = list(index.keys())
+            else:
+                source_path = os.path.abspath(file_path)
+                keys = [key for key, entry in index.items() if entry['source']==source_path]
+            for key in keys:
+                self._remove_entry(key)
+            self._save_index()
+        return len(keys)
+
+    def total_size(self) -> int:
+        with self._lock:
+            return sum(entry['bytes'] for entry in self._load_index().values())
+
+    def _evict(self):
+        """
+        Remove least recently used entries until the cache fits its size limit (called with the lock held).
+        """
+        total = sum(entry['bytes'] for entry in self._index.values())
+        for key in sorted(self._index, key=lambda key: self._index[key]['last_access']):
+            if (total <= self.size_limit):
+                break
+            total -= self._index[key]['bytes']
+            self._remove_entry(key)
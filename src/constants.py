@@ -5,11 +5,57 @@ Date: 2025-03-13
 Description: file to organize global constants used in the program
 License: MIT
 """
+import os
 
 
 #Pattern Matching Constants
 COMMON_DELIMITERS = [',',';',':',' ','\t','-','|'] #delimiters format list used when trying to auto-detecting them
+SNIFF_BYTE_BUDGET = 64 * 1024 #bytes read from the head of a tabulated file to detect its encoding, delimiter and header
+ENCODING_CANDIDATES = ['utf-8', 'cp1252', 'latin-1'] #encodings tried in order when a file has no byte order mark (latin-1 always decodes)
+ASCII_COMPATIBLE_ENCODINGS = ['utf-8', 'utf-8-sig', 'cp1252', 'latin-1'] #line breaks are single '\n' bytes, so files can be split in byte ranges
 DATA_TYPE_SAMPLE_SIZE = 10 #the maximum amount of data that will be sampled when trying to autodetect data types
+TYPE_INFERENCE_SAMPLE_SIZE = 10000 #values sampled from the whole column by the vectorized type inference
+TYPE_INFERENCE_STRATA = 100 #the column is cut in this many equal parts, each one gives the same share of the sample
+TYPE_INFERENCE_MIN_SHARE = 0.5 #share of the non missing sampled values that must be numbers for a numeric column
+MISSING_VALUE_MARKERS = ['', 'NA', 'N/A', 'NaN', 'nan', 'null', 'NULL', 'None', '-'] #values read as missing (NaN) in numeric columns
+BOOLEAN_VALUES = {'true': True, 'false': False} #lower case text values of BOOLEAN columns
+YES_NO_VALUES = {'yes': True, 'no': False, 'y': True, 'n': False} #lower case text values of TEXT columns turned to BOOLEAN by memory compaction
+CATEGORY_MAX_UNIQUE_SHARE = 0.5 #TEXT columns with fewer distinct values than this share of their rows are stored as categoricals
+UNIQUE_VALUES_MAX_SHARE = 0.5 #string operations run on the distinct values of TEXT columns with fewer distinct values than this share of their rows
+STRING_STATISTICS_TOP_K = 20 #most frequent values and tokens kept by the string statistics
+STRING_STATISTICS_CHUNK_SIZE = 1000000 #rows counted at a time by the string statistics
+STRING_STATISTICS_MAX_DISTINCT = 1000000 #past this many distinct values (or tokens), frequencies are estimated with a count-min sketch
+SKETCH_WIDTH = 2**18 #counters per row of a count-min sketch (the estimate error is about 3 / width of all counted rows)
+SKETCH_DEPTH = 4 #rows (hash functions) of a count-min sketch
+NEAR_DUPLICATE_THRESHOLD = 0.8 #Jaccard similarity of the character shingles of two normalized keys to be near duplicates
+SHINGLE_SIZE = 3 #characters per shingle of a normalized key
+MINHASH_BANDS = 16 #LSH bands of a MinHash signature, keys sharing any band become candidates
+MINHASH_ROWS = 4 #MinHash values per LSH band
+NGRAM_SIZE = 3 #characters per n-gram of the text search index
+NGRAM_INDEX_MAX_DELTA_SHARE = 0.5 #the search index is rebuilt when values added by updates pass this share of its indexed values
+DATE_PARSE_FORMATS = {"YYYY-MM-DD": "%Y-%m-%d", "YYYY-MM-DD HH:MM:SS": "%Y-%m-%d %H:%M:%S", "DD/MM/YYYY": "%d/%m/%Y", "MM/DD/YYYY": "%m/%d/%Y",
+                      "DD-MM-YYYY": "%d-%m-%Y", "YYYY/MM/DD": "%Y/%m/%d", "DD.MM.YYYY": "%d.%m.%Y", "DD/MM/YY": "%d/%m/%y", "MM/YYYY": "%m/%Y",
+                      "m DD, YYYY": "%b %d, %Y", "mm DD, YYYY": "%B %d, %Y", "DD mm YYYY": "%d %B %Y",
+                      "YYYYMMDD": "%Y%m%d"} #date formats (see Wrangler.check_type_date) and their parsing format
+DATE_FORMAT_SAMPLE_SIZE = 1000 #values sampled when checking the candidate date formats of a column
+GEO_LAT_LONG_PATTERN = r'\(?\s*(?P<lat>[+-]?\d{1,2}\.\d+)\s*[,;]\s*(?P<long>[+-]?\d{1,3}\.\d+)\s*\)?' #decimal degrees pair, ex: (40.7128, -74.0060)
+GEO_WKT_POINT_PATTERN = r'POINT\s*\(\s*(?P<long>[+-]?\d{1,3}(?:\.\d+)?)\s+(?P<lat>[+-]?\d{1,2}(?:\.\d+)?)\s*\)' #WKT point, ex: POINT (-74.0060 40.7128)
+CSV_CHUNK_SIZE = 50000 #number of lines per chunk when streaming tabulated files
+COMPRESSION_SIGNATURES = {b'\x1f\x8b': 'gzip', b'BZh': 'bz2', b'\xfd7zXZ\x00': 'xz', b'PK\x03\x04': 'zip'} #leading bytes of compressed files
+PARSER_ENGINES = ['python', 'csv', 'pandas', 'pyarrow', 'auto'] #engines to split tabulated text (see Wrangler.split_tabulated)
+PYARROW_BLOCK_SIZE = 16 * 1024 * 1024 #bytes per block for the 'pyarrow' parser engine
+PARALLEL_PARSE_MIN_BYTES = 16 * 1024 * 1024 #smaller files are parsed in a single process when using parallel parsing
+PARALLEL_PARSE_RANGES_PER_WORKER = 4 #byte ranges per worker process, so faster workers can pick up more ranges
+MMAP_INDEX_BLOCK_SIZE = 64 * 1024 * 1024 #bytes scanned at a time when indexing line offsets of a memory mapped file
+SQLITE_FETCH_SIZE = 50000 #rows fetched at a time when reading a SQLite table
+SQLITE_FILTER_OPERATORS = ['=', '!=', '<', '<=', '>', '>=', 'LIKE', 'IS NULL', 'IS NOT NULL'] #operators of the (column, operator, value) filters of SQLite reads
+JSON_BLOCK_SIZE = 1024 * 1024 #characters read at a time when streaming JSON files
+JSON_CHUNK_SIZE = 50000 #records converted to typed columns at a time when reading JSON files
+XLSX_CHUNK_SIZE = 20000 #rows converted to typed columns at a time when reading XLSX sheets
+NUMERIC_PREVIEW_ROWS = 20 #rows, evenly spread over the column, shown by a numeric expression preview
+TEXT_STORAGES = ['python', 'pyarrow'] #storage of TEXT columns: Python str objects, or Arrow strings (string[pyarrow], needs pyarrow)
+CACHE_DIRECTORY = os.path.join(os.path.expanduser('~'), '.guapo', 'cache') #where parsed data sets are cached
+CACHE_SIZE_LIMIT = 2 * 1024 * 1024 * 1024 #bytes, least recently used data sets are removed past this size
 WORLD_COUNTRIES = {
     "Afghanistan", "Albania", "Algeria", "Andorra", "Angola", "Antigua and Barbuda", "Argentina", "Armenia", "Australia", 
     "Austria", "Azerbaijan", "Bahamas", "Bahrain", "Bangladesh", "Barbados", "Belarus", "Belgium", "Belize", "Benin", 
@@ -36,6 +82,14 @@ WORLD_COUNTRIES = {
 } #to check for geographic data
 M_MONTH_NAMES = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
 MM_MONTH_NAMES = ['january','february','march','april','may','june','july','august','september','october','november','december']
+_DAY = r'(0?[1-9]|[12][0-9]|3[01])'
+_MONTH = r'(0?[1-9]|1[0-2])'
+DATE_PATTERNS = {"YYYY-MM-DD": rf'\d{{4}}-{_MONTH}-{_DAY}', "YYYY-MM-DD HH:MM:SS": rf'\d{{4}}-{_MONTH}-{_DAY} ([01][0-9]|2[0-3]):[0-5][0-9]:[0-5][0-9]',
+                 "DD/MM/YYYY": rf'{_DAY}/{_MONTH}/\d{{4}}', "MM/DD/YYYY": rf'{_MONTH}/{_DAY}/\d{{4}}', "DD-MM-YYYY": rf'{_DAY}-{_MONTH}-\d{{4}}',
+                 "YYYY/MM/DD": rf'\d{{4}}/{_MONTH}/{_DAY}', "DD.MM.YYYY": rf'{_DAY}\.{_MONTH}\.\d{{4}}', "DD/MM/YY": rf'{_DAY}/{_MONTH}/\d{{2}}',
+                 "MM/YYYY": rf'{_MONTH}/\d{{4}}', "m DD, YYYY": rf'({"|".join(M_MONTH_NAMES)}) {_DAY}, \d{{4}}',
+                 "mm DD, YYYY": rf'({"|".join(MM_MONTH_NAMES)}) {_DAY}, \d{{4}}', "DD mm YYYY": rf'{_DAY} ({"|".join(MM_MONTH_NAMES)}) \d{{4}}',
+                 "YYYYMMDD": r'\d{4}(0[1-9]|1[0-2])(0[1-9]|[12][0-9]|3[01])'} #full match patterns (case insensitive) of the DATE_PARSE_FORMATS
 
 
 
@@ -56,14 +110,13 @@ COMMON_BLOCKED_WORD_BYPASSES = [
 ] #common intentional letter swaps to bypass blocked words.
 
 
-COMMON_DICTIONARY_REPLACEMENTS = ["docotor",  
-        "docter",  
-        "doctr",  
-        "dr.",    
-        "Dr..",  
-        "dr",   
-        "Dr,", 
-        "Dotor",  
-        "Docor",  
-        "Doktor"]
-
+COMMON_DICTIONARY_REPLACEMENTS = {"Doctor": ["docotor",
+        "docter",
+        "doctr",
+        "dr.",
+        "Dr..",
+        "dr",
+        "Dr,",
+        "Dotor",
+        "Docor",
+        "Doktor"]} #canonical term: its variants (matched case insensitive, see text_tools.DictionaryReplacer)
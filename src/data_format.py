@@ -12,8 +12,19 @@ from enum import Enum
 # Third-party imports
 import pandas as pd
 import numpy as np
+from pandas.api.extensions import take
+try: #optional, numeric expressions are evaluated in one multi-threaded pass
+    import numexpr as ne
+except ImportError:
+    ne = None
+try: #optional, TEXT columns can be stored as Arrow strings
+    import pyarrow as pa
+except ImportError:
+    pa = None
 
 # Local application imports
+from . import constants
+from .text_tools import blocked_word_matcher, dictionary_replacer, FrequencyCounter, MinHashLSH, normalize_keys, StringPipeline, NGramIndex
 
 class DataType(Enum):
     TEXT = 1 #plain text
@@ -55,7 +66,8 @@ class NumericOperation(Enum):
 
 class DataFormats(): #some extra especial formating for data types (used to change display and converting storage format)
     FloatFormats = ['0.0','1eN','1/1','%','Binary','Hex','Octal','Currency']
-    DateFormats = ['dd/mm/yyyy', 'dd/mm/yy', 'dd/MM/yyyy', 'dd/MM/yyyy', 'mm/dd/yyyy', 'MM/dd/yyyy', 'mm/yyyy', 'MM/yyyy']
+    DateFormats = ['YYYY-MM-DD', 'YYYY-MM-DD HH:MM:SS', 'DD/MM/YYYY', 'MM/DD/YYYY', 'DD-MM-YYYY', 'YYYY/MM/DD', 'DD.MM.YYYY', 'DD/MM/YY', 'MM/YYYY',
+                   'm DD, YYYY', 'mm DD, YYYY', 'DD mm YYYY', 'YYYYMMDD'] #m = short month name, mm = full month name (see constants.DATE_PATTERNS)
     GeoSpatialFormats = ['UTM:Zone,Lat,Long','UTM:Lat,Long', 'UTM:Lat', 'UTM:Long', 'UTM:Zone','DD:Lat,Long','DD:Lat','DD:Long', 'DMS:Lat', 'DMS:Long', 'DMS:Lat,Long','DDM:Lat','DDM:Long','DDM:Lat,Long','OpenLocationCode']
 
 class DataMode(Enum): #how will the data be handled
@@ -75,10 +87,177 @@ class DataStructure(): #one for each data group
 
 class TableFormat(DataStructure):
     def __init__(self, dmode=DataMode.TABLE, dtype: list[DataType]= None, dformat=[], dheaders=[],edits=[], data=pd.DataFrame()):
-        super().__init__(dmode=DataMode.TABLE, dtype=dtype, dformat=dformat, dheaders=dheaders,edits=edits)
+        super().__init__(dmode=dmode, dtype=dtype, dformat=dformat, dheaders=dheaders,edits=edits) #DICTIONARY data is kept flattened as a table
         self.data = data
+        self.search_indexes: dict[str, NGramIndex] = {} #n-gram index of each searched TEXT column, built on its first search
+        self.text_storage = 'python' #storage of the TEXT columns (see constants.TEXT_STORAGES)
+
+    # ===== METHODS TO MANAGE MEMORY ===== #
+    def compact_memory(self) -> list[dict]:
+        """
+        Store the data set in the smallest safe dtypes (see compact_frame).
+        Return:
+        list[dict] = memory report of each column
+        """
+        self.data, self.dtype, report = TableFormat.compact_frame(self.data, self.dtype)
+        return report
+
+    @staticmethod
+    def compact_frame(data: pd.DataFrame, data_types: list[DataType]) -> Tuple [pd.DataFrame, list[DataType], list[dict]]:
+        """
+        Reduce the memory of a typed data frame: integers are downcast to the smallest signed width, floats to float32 when no value changes,
+        TEXT columns of Yes/No values (see constants.YES_NO_VALUES) become BOOLEAN and other low cardinality TEXT columns become categoricals.
+        A column is only replaced if the new one is smaller.
+        Args:
+        [pd.DataFrame] = the typed data frame
+        list[DataType] = the data type for each column
+        Return:
+        [pd.DataFrame] = the compacted data frame (attrs are kept)
+        list[DataType] = the data types after compaction
+        list[dict] = for each column: name, dtype, bytes before and after
+        """
+        data_types = list(data_types)
+        columns = []
+        report = []
+        for index, name in enumerate(data.columns):
+            col_data = data.iloc[:, index]
+            compacted, data_type = col_data, data_types[index]
+            match data_type:
+                case DataType.INTEGER if pd.api.types.is_integer_dtype(col_data.dtype):
+                    compacted = pd.to_numeric(col_data, downcast='integer')
+                case DataType.FLOAT if (col_data.dtype==np.float64):
+                    as_float32 = col_data.astype(np.float32)
+                    if (as_float32.astype(np.float64).equals(col_data)): #equals() takes NaN as equal to NaN
+                        compacted = as_float32
+                case DataType.TEXT if (col_data.dtype==object):
+                    lowered = col_data.str.strip().str.lower()
+                    if (len(col_data)>0) and (lowered.isin(constants.YES_NO_VALUES).all()):
+                        compacted, data_type = lowered.map(constants.YES_NO_VALUES).astype(bool), DataType.BOOLEAN
+                    elif (col_data.nunique() < len(col_data) * constants.CATEGORY_MAX_UNIQUE_SHARE):
+                        compacted = col_data.astype('category')
+            before = int(col_data.memory_usage(index=False, deep=True))
+            after = int(compacted.memory_usage(index=False, deep=True))
+            if (after < before):
+                columns.append(compacted)
+                data_types[index] = data_type
+            else:
+                columns.append(col_data)
+                after = before
+            report.append({'column': name, 'dtype': str(columns[-1].dtype), 'before': before, 'after': after})
+        compact = pd.concat(columns, axis=1) if (columns) else data.copy()
+        compact.attrs = data.attrs
+        return compact, data_types, report
+
+    def set_text_storage(self, storage: str='pyarrow') -> Tuple [int, str]: #the number of columns converted, the result string (None if OK)
+        """
+        Store the TEXT columns of the data set as Python str objects ('python') or Arrow strings ('pyarrow', see store_text_frame).
+        """
+        data, converted, error = TableFormat.store_text_frame(self.data, self.dtype, storage)
+        if (error):
+            return 0, error
+        self.data = data
+        self.text_storage = storage
+        return converted, None #no errors
+
+    @staticmethod
+    def store_text_frame(data: pd.DataFrame, data_types: list[DataType], storage: str='pyarrow') -> Tuple [pd.DataFrame, int, str]:
+        """
+        Convert the TEXT columns of a data frame to a storage: 'python' (object arrays of str) or 'pyarrow' (string[pyarrow], a fraction
+        of the memory and .str methods run in Arrow compute). Categorical columns are kept as they are.
+        Return:
+        [pd.DataFrame] = the data frame (the same one, columns are replaced)
+        [int] = number of columns converted
+        [str] = the error string (None if OK)
+        """
+        if (storage not in constants.TEXT_STORAGES):
+            return data, 0, f'Error: not a valid text storage: {storage}'
+        if (storage=='pyarrow' and pa is None):
+            return data, 0, 'Error: pyarrow is not installed, text is stored as Python strings.'
+        converted = 0
+        for index in range(len(data.columns)):
+            col_data = data.iloc[:, index]
+            if (data_types[index]!=DataType.TEXT):
+                continue
+            if (storage=='pyarrow' and col_data.dtype==object):
+                data.isetitem(index, col_data.astype(pd.StringDtype('pyarrow')))
+            elif (storage=='python' and isinstance(col_data.dtype, pd.StringDtype)):
+                values = col_data.astype(object)
+                data.isetitem(index, values.where(col_data.notna(), None))
+            else:
+                continue
+            converted += 1
+        return data, converted, None
 
     # ===== METHODS TO OPERATE STRING DATA ===== #
+    def write_text_column(self, c_name: str, values: pd.Series):
+        """
+        Write the result of a string operation to a column, and update its search index if it has one.
+        """
+        self.data[c_name] = values
+        if (c_name in self.search_indexes):
+            self.search_indexes[c_name].update(self.data[c_name])
+
+    @staticmethod
+    def unique_codes(col_data: pd.Series) -> Tuple [np.ndarray, pd.Series]:
+        """
+        Integer codes and distinct values of a column (its categories if it's a categorical). Missing values have code -1.
+        Return:
+        [np.ndarray] = code of each row (None if the column has too many distinct values, see constants.UNIQUE_VALUES_MAX_SHARE)
+        [pd.Series] = the distinct values
+        """
+        if (isinstance(col_data.dtype, pd.CategoricalDtype)):
+            return col_data.cat.codes.to_numpy(), pd.Series(col_data.cat.categories, dtype=object)
+        codes, uniques = pd.factorize(col_data)
+        if (len(uniques) > len(col_data) * constants.UNIQUE_VALUES_MAX_SHARE):
+            return None, None
+        return codes, pd.Series(uniques, dtype=object)
+
+    @staticmethod
+    def apply_string_operation(col_data: pd.Series, operation, weighted: bool=False) -> pd.Series:
+        """
+        Apply a vectorized string operation to a column. On low cardinality columns it runs on the distinct values only,
+        and the column is rebuilt from their integer codes (categoricals stay categoricals). Otherwise it runs on every row.
+        Args:
+        [pd.Series] = the column
+        operation = function taking a Series of strings and returning a Series of the same length (missing values are only passed row-wise)
+        [bool] = also pass the number of rows of each value to the operation (to count changes per row)
+        Return:
+        [pd.Series] = the resulting column
+        """
+        codes, uniques = TableFormat.unique_codes(col_data)
+        if (codes is None): #row-wise path
+            result = operation(col_data, np.ones(len(col_data), dtype=np.int64)) if (weighted) else operation(col_data)
+        else:
+            if (weighted):
+                values = operation(uniques, np.bincount(codes[codes >= 0], minlength=len(uniques))).to_numpy()
+            else:
+                values = operation(uniques).to_numpy()
+            if (isinstance(col_data.dtype, pd.CategoricalDtype)) and (values.dtype==object):
+                result_codes, result_uniques = pd.factorize(values) #different categories can give the same result
+                return pd.Series(pd.Categorical.from_codes(take(result_codes, codes, allow_fill=True, fill_value=-1), categories=result_uniques), index=col_data.index, name=col_data.name)
+            result = pd.Series(take(values, codes, allow_fill=True), index=col_data.index, name=col_data.name)
+        if (isinstance(col_data.dtype, pd.StringDtype)) and (result.dtype==object): #Arrow string columns stay Arrow strings
+            result = result.astype(col_data.dtype)
+        return result
+
+    # Method to chain string operations
+    def string_pipeline(self, c_index=0) -> StringPipeline:
+        """
+        A pipeline of string steps for a TEXT column, applied in one pass and one column write on commit().
+        Ex: table.string_pipeline(2).trim().collapse_spaces().normalize(accents=True).capitalization('each').commit()
+        """
+        return StringPipeline(on_commit=lambda pipeline: self.run_string_pipeline(c_index, pipeline))
+
+    def run_string_pipeline(self, c_index=0, pipeline: StringPipeline=None) -> Tuple [int, str]: #the number of values changed, the result string (None if OK)
+        if (self.dtype[c_index]==DataType.TEXT): #if column is a string column
+            c_name = self.data.columns[c_index]
+            original = self.data[c_name]
+            result = TableFormat.apply_string_operation(original, pipeline.apply) #once per distinct value on low cardinality columns
+            changed = int((original.notna() & (original.astype(object)!=result.astype(object))).sum())
+            self.write_text_column(c_name, result)
+            return changed, None #no errors
+        return 0, 'Error: not a text column.'
+
     #Method to deal with whitespaces
     def remove_whitespace(self, c_index=0, option='') -> str: #the result string
         #options are trailing, leading, both, double space, all of the above
@@ -86,20 +265,18 @@ class TableFormat(DataStructure):
             c_name = self.data.columns[c_index]
             match option:
                 case 'trailing':
-                    self.data[c_name] = self.data[c_name].str.rstrip()
+                    operation = lambda values: values.str.rstrip()
                 case 'leading':
-                    self.data[c_name] = self.data[c_name].str.lstrip()
+                    operation = lambda values: values.str.lstrip()
                 case 'both':
-                    self.data[c_name] = self.data[c_name].str.strip()
+                    operation = lambda values: values.str.strip()
                 case 'doubles':
-                    hits = self.data[c_name].str.findall(r'\s{2,}')
-                    print(sum(len(hit) for hit in hits)) #the number of operations that it will generate
-                    self.data[c_name] = self.data[c_name].str.replace(r'\s{2,}','', regex=True) #replace anything with 2 or more consecutive spaces.
+                    operation = lambda values: values.str.replace(r'\s{2,}','', regex=True) #replace anything with 2 or more consecutive spaces.
                 case 'all':
-                    self.data[c_name] = self.data[c_name].str.strip()
-                    self.data[c_name] = self.data[c_name].str.replace(r'\s{2,}','', regex=True)     
+                    operation = lambda values: values.str.strip().str.replace(r'\s{2,}','', regex=True)
                 case _:
                     return "Error: not a valid string operation."
+            self.write_text_column(c_name, TableFormat.apply_string_operation(self.data[c_name], operation))
             return None
         else:
             return "Error: not a string column."
@@ -111,57 +288,199 @@ class TableFormat(DataStructure):
             c_name = self.data.columns[c_index]
             match option:
                 case 'all':
-                    self.data[c_name] = self.data[c_name].str.upper()
+                    operation = lambda values: values.str.upper()
                 case 'each':
-                    self.data[c_name] = self.data[c_name].str.title()
+                    operation = lambda values: values.str.title()
                 case 'first':
-                    self.data[c_name] = self.data[c_name].str.capitalize()
+                    operation = lambda values: values.str.capitalize()
                 case 'lowercase':
-                    self.data[c_name] = self.data[c_name].str.lower()
+                    operation = lambda values: values.str.lower()
                 case 'invert':
-                    self.data[c_name] = self.data[c_name].str.swapcase()    
+                    operation = lambda values: values.str.swapcase()
                 case _:
                     return "Error: not a valid string operation."
+            self.write_text_column(c_name, TableFormat.apply_string_operation(self.data[c_name], operation))
             return None
         else:
             return "Error: not a string column."
 
     # Method to deal with blocked words
-    def blocked_words(self, c_index=0, blockedlist=['']) -> str: #the result string
-        bad_words = blockedlist
+    def blocked_words(self, c_index=0, blockedlist=['']) -> Tuple [int, str]: #the number of values hit, the result string
+        """
+        Mask the blocked words and their bypass variants with '*' (see text_tools.BlockedWordMatcher), in a single pass over the column.
+        """
         if (self.dtype[c_index]==DataType.TEXT): #if column is a string column
             c_name = self.data.columns[c_index]
-            for bad_word in bad_words:
-                self.data[c_name] = self.data[c_name].str.replace(bad_word,'*' * len(bad_word), regex=True) #replace all bad words with **** with the same length as the original
-            return None #no errors
-        return 'Error: not a text column.'
+            matcher = blocked_word_matcher(blockedlist) #compiled once per list
+            original = self.data[c_name]
+            masked = TableFormat.apply_string_operation(original, matcher.mask)
+            hits = int((original.notna() & (original.astype(object)!=masked.astype(object))).sum()) #masking only changes values with a hit
+            self.write_text_column(c_name, masked)
+            return hits, None #no errors
+        return 0, 'Error: not a text column.'
 
     # Method to deal with dictionary words
-    def dictionary_words(self, c_index=0, old_list=[''], new_list=['']) -> str: #the result string (None if OK)
+    def dictionary_words(self, c_index=0, dictionary: dict[str, list[str]]={}) -> Tuple [dict, str]: #changes per term, the result string (None if OK)
+        """
+        Replace the variants of each dictionary term by the term (ex: {'Doctor': ['docter', 'dr.']}), in a single tokenized pass (see text_tools.DictionaryReplacer).
+        """
         if (self.dtype[c_index]==DataType.TEXT): #if column is a string column
             c_name = self.data.columns[c_index]
-            for i, old_word in old_list:
-                self.data[c_name] = self.data[c_name].str.replace(old_word,new_list[i], regex=True)
-            return None #no errors
-        return 'Error: not a text column.'
+            replacer = dictionary_replacer(dictionary) #built once per dictionary
+            counts = {}
+            def operation(values: pd.Series, weights: np.ndarray) -> pd.Series:
+                replaced, term_counts = replacer.replace(values, weights)
+                counts.update(term_counts)
+                return replaced
+            self.write_text_column(c_name, TableFormat.apply_string_operation(self.data[c_name], operation, weighted=True))
+            return counts, None #no errors
+        return None, 'Error: not a text column.'
 
     # Method to get string statistics
-    def word_statistics(self, c_index=0) -> Tuple [set, list, str]: #the result string (None if OK)
+    def word_statistics(self, c_index=0, top_k: int=constants.STRING_STATISTICS_TOP_K) -> Tuple [dict, str]: #the statistics, the result string (None if OK)
+        """
+        Value and token (whitespace separated word) frequencies, length distribution and missing/blank counts of a TEXT column.
+        The column is counted a chunk at a time (see constants.STRING_STATISTICS_CHUNK_SIZE), each chunk is reduced to its distinct values
+        first, and frequencies become count-min sketch estimates past constants.STRING_STATISTICS_MAX_DISTINCT distinct values.
+        Return:
+        [dict] = rows, missing, blank, distinct (None if approximate), top values and top tokens ((value, count) lists),
+                 tokens (total count), length counts (pd.Series, index = length), approximate
+        """
         if (self.dtype[c_index]==DataType.TEXT): #if column is a string column
             c_name = self.data.columns[c_index] #name of the column 
-            unique_words = set(self.data[c_name].values) #the unique words per column
-            word_count = list() #the total per unique word
-            for word in unique_words:
-                hits = self.data[c_name].str.findall(word)
-                word_count.append(sum(len(hit) for hit in hits))
-            return unique_words, word_count, None #no errors
-        return None, None, 'Error: not a text column.'  
+            col_data = self.data[c_name]
+            values, tokens = FrequencyCounter(top_k), FrequencyCounter(top_k)
+            missing, blank, token_total = 0, 0, 0
+            length_counts = pd.Series(dtype=np.int64)
+            for start in range(0, len(col_data), constants.STRING_STATISTICS_CHUNK_SIZE):
+                chunk = col_data.iloc[start:start + constants.STRING_STATISTICS_CHUNK_SIZE]
+                missing += int(chunk.isna().sum())
+                counts = chunk.value_counts(sort=False)
+                counts = counts[counts > 0] #categoricals list unused categories
+                distinct = pd.Series(counts.index, dtype=object)
+                weights = counts.to_numpy()
+                values.add(pd.Series(weights, index=distinct.to_numpy()))
+                blank += int(weights[distinct.str.strip().to_numpy()==''].sum())
+                length_counts = length_counts.add(pd.Series(weights, index=distinct.str.len().to_numpy()).groupby(level=0).sum(), fill_value=0)
+                words = distinct.str.split().explode().dropna() #index = position of the distinct value
+                word_counts = pd.Series(weights[words.index.to_numpy()], index=words.to_numpy()).groupby(level=0).sum()
+                token_total += int(word_counts.sum())
+                tokens.add(word_counts)
+            statistics = {'rows': len(col_data), 'missing': missing, 'blank': blank, 'distinct': values.distinct(),
+                          'values': values.top(), 'tokens': tokens.top(), 'token_total': token_total,
+                          'lengths': length_counts.astype(np.int64).sort_index(), 'approximate': values.approximate or tokens.approximate}
+            return statistics, None #no errors
+        return None, 'Error: not a text column.'  
     
-    def remove_duplicates(self, c_index=0):
-        pass
+    # Methods to deal with duplicates
+    def find_duplicates(self, c_indexes: list[int]=None, near: bool=False, threshold: float=constants.NEAR_DUPLICATE_THRESHOLD) -> Tuple [list[list[int]], str]: #the groups, the result string (None if OK)
+        """
+        Find groups of duplicate rows. Exact duplicates share the hash of the selected columns. Near duplicates share a normalized key
+        (see text_tools.normalize_keys, ex: 'Argen  tina' and 'argentina') or have similar keys (see text_tools.MinHashLSH) in their
+        text columns, and the same values in their other columns.
+        Args:
+        list[int] = the columns to compare (None = all the columns)
+        [bool] = also find near duplicates (text columns only)
+        [float] = Jaccard similarity of the character shingles of near duplicate keys (0 to 1)
+        Return:
+        list[list[int]] = row positions of each group with more than one row, ordered by their first row
+        """
+        try:
+            c_indexes = list(range(len(self.data.columns))) if (c_indexes is None) else list(c_indexes)
+            columns = self.data.iloc[:, c_indexes]
+            text_positions = [position for position, c_index in enumerate(c_indexes) if (near and self.dtype[c_index]==DataType.TEXT)]
+            exact_columns = columns.iloc[:, [position for position in range(len(c_indexes)) if (position not in text_positions)]]
+            if not (text_positions):
+                labels, _ = pd.factorize(pd.util.hash_pandas_object(columns, index=False).to_numpy()) #row hashes
+            else:
+                keys = None
+                blank = np.ones(len(columns), dtype=bool) #rows without any value to compare (missing or only punctuation and spaces)
+                for position in text_positions: #numbers, dates and booleans are not normalized, 15 and -15 are not near duplicates
+                    column_keys = TableFormat.apply_string_operation(columns.iloc[:, position], normalize_keys).astype(object) #once per distinct value
+                    column_keys = column_keys.where(column_keys.notna(), '')
+                    blank &= (column_keys=='').to_numpy()
+                    keys = column_keys if (keys is None) else keys.str.cat(column_keys, sep='\x1f')
+                key_codes, distinct_keys = pd.factorize(keys.mask(blank)) #similarity is only computed once per distinct key, blank rows get -1
+                key_labels = MinHashLSH(threshold=threshold).group_labels(pd.Series(distinct_keys, dtype=object))
+                labels = len(distinct_keys) + np.arange(len(columns)) #blank rows keep a label of their own, they are never grouped
+                labels[~blank] = key_labels[key_codes[~blank]]
+                if (len(exact_columns.columns)): #the other columns must match exactly
+                    exact_hashes = pd.util.hash_pandas_object(exact_columns, index=False).to_numpy()
+                    labels, _ = pd.factorize(pd.util.hash_pandas_object(pd.DataFrame({'near': labels, 'exact': exact_hashes}), index=False).to_numpy())
+            order = np.argsort(labels, kind='stable')
+            bounds = np.flatnonzero(np.diff(labels[order])) + 1
+            groups = [group.tolist() for group in np.split(order, bounds) if (len(group) > 1)]
+            groups.sort(key=lambda group: group[0])
+            return groups, None #no errors
+        except IndexError:
+            return None, 'Error: wrong data column index.'
+
+    def remove_duplicates(self, groups: list[list[int]], mode: str='drop', c_indexes: list[int]=None) -> Tuple [int, str]: #the rows changed, the result string (None if OK)
+        """
+        Drop or merge groups of duplicate rows (see find_duplicates).
+        Args:
+        list[list[int]] = row positions of each group, the first row of a group is kept
+        [str] = 'drop' removes the other rows of each group, 'merge' gives them the values of the first row in the selected columns
+        list[int] = the columns to merge (None = all the columns)
+        Return:
+        [int] = number of rows dropped or merged
+        """
+        others = np.array([row for group in groups for row in group[1:]], dtype=np.int64)
+        match mode:
+            case 'drop':
+                self.data = self.data.drop(index=self.data.index[others]).reset_index(drop=True)
+                self.search_indexes.clear() #rows moved
+            case 'merge':
+                source = np.arange(len(self.data))
+                source[others] = np.repeat([group[0] for group in groups], [len(group) - 1 for group in groups])
+                for c_index in (range(len(self.data.columns)) if (c_indexes is None) else c_indexes):
+                    c_name = self.data.columns[c_index]
+                    self.write_text_column(c_name, self.data[c_name].take(source).set_axis(self.data.index))
+            case _:
+                return 0, "Error: not a valid duplicate operation."
+        return len(others), None #no errors
 
-    def split_text(self, c_index=0, delimiter=''):
-        pass
+    # Method to split a column
+    def split_text(self, c_index=0, delimiter=',', max_splits: int=-1, regex: bool=False) -> Tuple [list[str], str]: #the new column names, the result string (None if OK)
+        """
+        Split a TEXT column on a delimiter into new typed columns, inserted right after it (ex: 'Lat, Long' => 2 FLOAT columns).
+        The distinct values are split, typed (see Wrangler.infer_tabulated_types) and cast once, and the new columns are taken from them by code.
+        Args:
+        [int] = the column index
+        [str] = the delimiter (a pattern if regex is True)
+        [int] = maximum number of splits (-1 = no limit), the last column keeps the rest of the text
+        [bool] = the delimiter is a regular expression
+        Return:
+        list[str] = names of the new columns
+        """
+        from .wrangler import Wrangler #wrangler imports this module
+        if (self.dtype[c_index]!=DataType.TEXT):
+            return None, 'Error: not a text column.'
+        if not (delimiter):
+            return None, 'Error: empty delimiter.'
+        c_name = self.data.columns[c_index]
+        col_data = self.data[c_name]
+        codes, uniques = pd.factorize(col_data, use_na_sentinel=False) #missing values are split (and typed) as one more distinct value
+        if (len(uniques) > len(col_data) * constants.UNIQUE_VALUES_MAX_SHARE):
+            codes, uniques = None, col_data #row-wise path
+        parts = pd.Series(np.asarray(uniques, dtype=object)).str.split(delimiter, n=max_splits, expand=True, regex=regex)
+        if (parts.shape[1] < 2):
+            return None, 'Error: delimiter not found.'
+        parts = parts.apply(lambda part: part.str.strip())
+        typed_parts, part_types = Wrangler.cast_tabulated_chunk(parts, Wrangler.infer_tabulated_types(parts))
+        names = []
+        for position in range(parts.shape[1]):
+            name = f'{c_name}_{position + 1}'
+            while (name in self.data.columns):
+                name += '_'
+            values = typed_parts.iloc[:, position].to_numpy()
+            self.data.insert(c_index + 1 + position, name, values if (codes is None) else values[codes]) #in place, the other columns are not copied
+            self.dtype.insert(c_index + 1 + position, part_types[position])
+            names.append(name)
+        self.dheaders = self.data.columns.to_list()
+        if (self.text_storage=='pyarrow'): #new TEXT columns follow the storage of the data set
+            TableFormat.store_text_frame(self.data, self.dtype, 'pyarrow')
+        return names, None #no errors
 
     
 
@@ -182,7 +501,8 @@ class TableFormat(DataStructure):
         try: 
             col_name = self.data.columns[c_index]
 
-            if (self.dtype[c_index]==DataType.INTEGER and (self.data[col_name].dtype== 'int32' or self.data[col_name].dtype== 'int64')): #check for correct input types
+            if (self.dtype[c_index]==DataType.INTEGER and pd.api.types.is_integer_dtype(self.data[col_name].dtype)): #check for correct input types
+                col_data = col_data.astype(np.int64) #compacted columns can be as small as int8, operate at full width
                 match operation:
                     case NumericOperation.ADDITION:
                         result_series = col_data + num_arg
@@ -232,6 +552,7 @@ class TableFormat(DataStructure):
         try: 
             col_name = self.data.columns[c_index]
             if (self.dtype[c_index]==DataType.FLOAT and (self.data[col_name].dtype== 'float32' or self.data[col_name].dtype== 'float64')): #check for correct input types
+                col_data = col_data.astype(np.float64) #compacted columns can be float32, operate at full width
                 match operation:
                     case NumericOperation.ADDITION:
                         result_series = col_data + num_arg
@@ -276,15 +597,219 @@ class TableFormat(DataStructure):
         """    
         return col_data.clip(lower=low_range, upper=high_range).astype(float)
 
+    def numeric_expression(self, c_index=0) -> 'NumericExpression':
+        """
+        A deferred chain of numeric operations on an INTEGER or FLOAT column, evaluated in one pass and written once on commit().
+        Ex: table.numeric_expression(3).offset(2).scale(0.5).clamp(0, 10).commit()
+        """
+        return NumericExpression(self, c_index)
+
     
     
     # ===== METHODS TO SEARCH DATA ===== #
     # Method to get search results
     def search_result(self, c_index=0, search_string='') -> Tuple [list, str]: #the table filter index, the result string (None if OK)
+        """
+        Case insensitive substring search of a TEXT column, answered by its n-gram index (see text_tools.NGramIndex).
+        The index is built on the first search of the column and kept up to date by the string operations.
+        """
         if (self.dtype[c_index]==DataType.TEXT): #if column is a string column
             c_name = self.data.columns[c_index] #name of the column 
-            hits = self.data[c_name].str.contains(search_string, case=False)
-            found_indices = hits.index[hits].to_list()
-            print(found_indices)
+            if (c_name not in self.search_indexes):
+                self.search_indexes[c_name] = NGramIndex(self.data[c_name])
+            found_indices = self.data.index[self.search_indexes[c_name].search(search_string)].to_list()
             return found_indices, None #no errors
-        return None, 'Error: not a text column.'
\ No newline at end of file
+        return None, 'Error: not a text column.'
+
+
+class NumericExpression:
+    """
+    Queue of NumericOperation steps on a numeric column of a TableFormat. Nothing is computed until preview() or commit():
+    the whole chain then runs in one pass, with numexpr when it's installed, otherwise with numpy ufuncs writing in place (out=).
+    INTEGER columns are computed exactly in int64 when every step is an addition, subtraction, multiplication or clamp by whole numbers.
+    Operations follow operate_int/operate_float: LOG is the natural log for an argument of 0 (log10 otherwise),
+    POWER raises the argument to the values, ROOT takes the argument-th root of the values.
+    """
+    def __init__(self, table: TableFormat, c_index=0):
+        self.table = table
+        self.c_index = c_index
+        self.steps: list[tuple] = [] #(NumericOperation, argument)
+
+    def add(self, operation: NumericOperation, argument=None) -> 'NumericExpression':
+        if (operation==NumericOperation.CLAMP) and not (isinstance(argument, tuple) and len(argument)==2):
+            raise ValueError("CLAMP takes a (low, high) argument.")
+        self.steps.append((operation, argument))
+        return self
+
+    def offset(self, value: float) -> 'NumericExpression':
+        return self.add(NumericOperation.ADDITION, value)
+
+    def scale(self, value: float) -> 'NumericExpression':
+        return self.add(NumericOperation.MULTIPLICATION, value)
+
+    def log(self, base_ten: bool=False) -> 'NumericExpression':
+        return self.add(NumericOperation.LOG, 1 if (base_ten) else 0)
+
+    def power(self, base: float) -> 'NumericExpression':
+        return self.add(NumericOperation.POWER, base)
+
+    def clamp(self, low: float, high: float) -> 'NumericExpression':
+        return self.add(NumericOperation.CLAMP, (low, high))
+
+    def _numexpr_segment(self, values: np.ndarray, steps: list[tuple]) -> np.ndarray:
+        expression = 'x'
+        arguments = {'x': values}
+        for position, (operation, argument) in enumerate(steps):
+            name = f'a{position}'
+            arguments[name] = np.float64(argument) if (argument is not None) else None
+            match operation:
+                case NumericOperation.ADDITION:
+                    expression = f'({expression} + {name})'
+                case NumericOperation.SUBTRACTION:
+                    expression = f'({expression} - {name})'
+                case NumericOperation.MULTIPLICATION:
+                    expression = f'({expression} * {name})'
+                case NumericOperation.DIVISION:
+                    expression = f'({expression} / {name})'
+                case NumericOperation.LOG:
+                    expression = f'log({expression})' if (argument==0) else f'log10({expression})'
+                case NumericOperation.EXPONENTIAL:
+                    expression = f'exp({expression})'
+                case NumericOperation.POWER:
+                    expression = f'({name} ** {expression})'
+                case NumericOperation.ROOT:
+                    expression = f'({expression} ** (1.0 / {name}))'
+        arguments = {name: value for name, value in arguments.items() if (value is not None)}
+        return ne.evaluate(expression, local_dict=arguments, out=values)
+
+    def _integer_steps(self) -> list[tuple]:
+        """
+        Return:
+        list[tuple] = the steps with int64 arguments, if they can all run in int64 (None otherwise)
+        """
+        def whole(value) -> bool:
+            return isinstance(value, (int, np.integer)) or (isinstance(value, (float, np.floating)) and float(value).is_integer() and abs(value) < 2**63)
+        steps = []
+        for operation, argument in self.steps:
+            arguments = argument if (operation==NumericOperation.CLAMP) else (argument,)
+            if (operation not in (NumericOperation.ADDITION, NumericOperation.SUBTRACTION, NumericOperation.MULTIPLICATION, NumericOperation.CLAMP)) or not all(whole(value) for value in arguments):
+                return None
+            integers = tuple(np.int64(value) for value in arguments)
+            steps.append((operation, integers if (operation==NumericOperation.CLAMP) else integers[0]))
+        return steps
+
+    @staticmethod
+    def _integer_steps_fit(col_data: pd.Series, steps: list[tuple]) -> bool:
+        """
+        Follow the smallest and largest value through the steps with Python integers, so int64 never wraps silently.
+        Return:
+        [bool] = every intermediate result fits in int64
+        """
+        if (len(col_data)==0):
+            return True
+        low, high = int(col_data.min()), int(col_data.max())
+        for operation, argument in steps:
+            match operation:
+                case NumericOperation.ADDITION:
+                    low, high = low + int(argument), high + int(argument)
+                case NumericOperation.SUBTRACTION:
+                    low, high = low - int(argument), high - int(argument)
+                case NumericOperation.MULTIPLICATION:
+                    low, high = sorted((low * int(argument), high * int(argument)))
+                case NumericOperation.CLAMP:
+                    low, high = (min(max(bound, int(argument[0])), int(argument[1])) for bound in (low, high))
+            if (low < -2**63) or (high > 2**63 - 1):
+                return False
+        return (-2**63 <= low) and (high <= 2**63 - 1)
+
+    def _numpy_step(self, values: np.ndarray, operation: NumericOperation, argument) -> np.ndarray:
+        match operation:
+            case NumericOperation.ADDITION:
+                np.add(values, argument, out=values)
+            case NumericOperation.SUBTRACTION:
+                np.subtract(values, argument, out=values)
+            case NumericOperation.MULTIPLICATION:
+                np.multiply(values, argument, out=values)
+            case NumericOperation.DIVISION:
+                np.divide(values, argument, out=values)
+            case NumericOperation.LOG:
+                (np.log if (argument==0) else np.log10)(values, out=values)
+            case NumericOperation.EXPONENTIAL:
+                np.exp(values, out=values)
+            case NumericOperation.POWER:
+                np.power(argument, values, out=values)
+            case NumericOperation.ROOT:
+                np.power(values, 1.0 / argument, out=values)
+            case NumericOperation.CLAMP:
+                np.clip(values, argument[0], argument[1], out=values)
+        return values
+
+    def evaluate(self, col_data: pd.Series) -> np.ndarray:
+        """
+        Run the chain on a copy of the values: int64 for integer columns and steps whose results fit in int64 (see _integer_steps
+        and _integer_steps_fit), float64 otherwise (missing values are NaN). Integers too large to be exact in float64 (above 2**53)
+        are rejected rather than rounded.
+        Return:
+        [np.ndarray] = the resulting values
+        """
+        if (col_data.dtype.kind in 'iu'):
+            integer_steps = self._integer_steps()
+            if (integer_steps is not None) and (self._integer_steps_fit(col_data, integer_steps)):
+                values = col_data.to_numpy(dtype=np.int64, copy=True)
+                for operation, argument in integer_steps:
+                    self._numpy_step(values, operation, argument)
+                return values
+            if (len(col_data)>0) and (col_data.abs().max() > 2**53):
+                raise ValueError("Integers above 2**53 can't be computed exactly as FLOAT, only whole number additions, subtractions, multiplications and clamps within int64 keep them exact.")
+        values = col_data.to_numpy(dtype=np.float64, na_value=np.nan, copy=True) #the only copy, every step writes into it
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'): #log(0), division by 0... give inf/NaN as in pandas
+            if (ne is None):
+                for operation, argument in self.steps:
+                    self._numpy_step(values, operation, argument)
+                return values
+            segment = []
+            for operation, argument in self.steps: #numexpr has no clip, the chain is cut at each CLAMP
+                if (operation==NumericOperation.CLAMP):
+                    if (segment):
+                        self._numexpr_segment(values, segment)
+                    np.clip(values, argument[0], argument[1], out=values)
+                    segment = []
+                else:
+                    segment.append((operation, argument))
+            if (segment):
+                self._numexpr_segment(values, segment)
+        return values
+
+    def preview(self, rows: int=constants.NUMERIC_PREVIEW_ROWS) -> pd.DataFrame:
+        """
+        Return:
+        [pd.DataFrame] = 'before' and 'after' values of a few rows evenly spread over the column (the column is not changed)
+        """
+        col_data = self.table.data.iloc[:, self.c_index]
+        positions = np.unique(np.linspace(0, len(col_data) - 1, min(rows, len(col_data))).astype(np.int64))
+        sample = col_data.iloc[positions]
+        return pd.DataFrame({'before': sample, 'after': self.evaluate(sample)}, index=sample.index)
+
+    def commit(self) -> Tuple [bool, str]: #result of the operation, the log message or the error string
+        """
+        Evaluate the chain over the whole column and write it once. INTEGER columns stay INTEGER when every result is a whole number,
+        otherwise they become FLOAT. The queued steps are cleared.
+        """
+        try:
+            c_name = self.table.data.columns[self.c_index]
+            data_type = self.table.dtype[self.c_index]
+            if (data_type not in (DataType.INTEGER, DataType.FLOAT)):
+                return False, '[ERROR] File "data_format.py", Function "NumericExpression.commit", Wrong operation type'
+            values = self.evaluate(self.table.data[c_name])
+            if (data_type==DataType.INTEGER) and (values.dtype!=np.int64):
+                if (np.isfinite(values).all()) and (np.abs(values).max(initial=0) <= 2**53) and (np.array_equal(values, np.trunc(values))): #float64 results are exact whole numbers up to 2**53
+                    values = values.astype(np.int64)
+                else:
+                    self.table.dtype[self.c_index] = DataType.FLOAT
+            self.table.data[c_name] = values
+            operations = ', '.join(str(operation) for operation, _ in self.steps)
+            self.steps = []
+            log_message = f"""<div>Numeric operations in <span style="color: gray;">Col: {c_name}[{self.c_index}] - Operations: {operations}</span></div>"""
+            return True, log_message
+        except Exception as e:
+            return False, f'[ERROR] File "data_format.py", Function "NumericExpression.commit"\n{e}'
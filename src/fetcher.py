@@ -7,23 +7,298 @@ License: MIT
 """
 # Standard library imports
 import os
+import io
+import gzip
+import bz2
+import lzma
+import zipfile
 import json
 import sqlite3
 import csv
-from typing import Tuple
+import re
+import mmap
+from itertools import islice
+from datetime import date, datetime
+from urllib.request import pathname2url
+from typing import Tuple, Iterator
 
 # Third-party imports
 import pandas as pd
+import numpy as np
+try: #optional, used to read XLSX workbooks
+    import openpyxl
+except ImportError:
+    openpyxl = None
 
 # Local application imports
+from . import constants
+from .data_format import DataType
+from .progress import LoadProgress
+from .wrangler import Wrangler
+
+
+class MappedCSV:
+    """
+    Read-only memory map of a tabulated file plus the byte offset where each line starts.
+    Lines are only decoded when accessed, so reading the file in chunks holds one chunk of text at a time.
+    """
+    def __init__(self, file_path, encoding='utf-8'):
+        self.file_path = file_path
+        self.encoding = encoding
+        self._file = open(file_path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        self.size = len(self._map)
+        self.offsets = self._index_lines() #start of each line, with the file size appended as end sentinel
+
+    def _index_lines(self) -> np.ndarray:
+        """
+        Scan the map once, block by block, for line breaks.
+        Return:
+        [np.ndarray] = int64 array with the start offset of each line and the file size as last item
+        """
+        block_size = constants.MMAP_INDEX_BLOCK_SIZE
+        starts = [np.zeros(1, dtype=np.int64)]
+        for block_start in range(0, self.size, block_size):
+            count = min(block_size, self.size - block_start)
+            block = np.frombuffer(self._map, dtype=np.uint8, count=count, offset=block_start) #a view, no copy
+            starts.append(np.flatnonzero(block == 10).astype(np.int64) + (block_start + 1)) #the line starts after '\n'
+            del block #release the exported buffer so the map can be closed
+        offsets = np.concatenate(starts)
+        if (offsets[-1] != self.size): #last line without a trailing line break
+            offsets = np.append(offsets, np.int64(self.size))
+        return offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if (step==1):
+                return self.lines(start, stop)
+            return [self.line(i) for i in range(start, stop, step)]
+        return self.line(index)
+
+    def line(self, index: int) -> str:
+        """
+        Decode a single line, O(1) by its offset.
+        """
+        if (index<0):
+            index += len(self)
+        if not (0 <= index < len(self)):
+            raise IndexError(f"Line index out of range: {index}")
+        return self._map[self.offsets[index]:self.offsets[index+1]].decode(self.encoding)
+
+    def lines(self, start: int=0, stop: int=None) -> list[str]:
+        """
+        Decode a contiguous range of lines with a single slice of the map.
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        if (start>=stop):
+            return []
+        lines = self._map[self.offsets[start]:self.offsets[stop]].decode(self.encoding).split('\n')
+        if (lines[-1]==''): #the range ended on a line break
+            lines.pop()
+        return lines
+
+    def iter_chunks(self, chunk_size=constants.CSV_CHUNK_SIZE, start: int=0) -> Iterator[list]:
+        """
+        Yield chunks of lines, same format as Fetcher.stream_CSV.
+        """
+        for chunk_start in range(start, len(self), chunk_size):
+            yield self.lines(chunk_start, chunk_start + chunk_size)
+
+    def close(self):
+        if not (self._map.closed):
+            self._map.close()
+        self._file.close()
+
+
+class JSONStreamReader:
+    """
+    Incremental JSON reader: decodes one value at a time from a text stream, keeping only the unread part of the current block in memory.
+    """
+    _WHITESPACE = re.compile(r'[ \t\r\n]*')
+
+    def __init__(self, file, block_size=constants.JSON_BLOCK_SIZE, progress: LoadProgress=None):
+        self.file = file
+        self.block_size = block_size
+        self.progress = progress #counts the characters read
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self, size: int=None) -> bool:
+        """
+        Append the next block to the unread part of the buffer. Return False at end of file.
+        """
+        block = self.file.read(size or self.block_size)
+        if not (block):
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + block
+        self.pos = 0
+        if (self.progress):
+            self.progress.bytes_read += len(block)
+        return True
+
+    def peek(self) -> str:
+        """
+        Skip whitespace and return the next character without consuming it ('' at end of file).
+        """
+        while True:
+            self.pos = self._WHITESPACE.match(self.buffer, self.pos).end()
+            if (self.pos < len(self.buffer)):
+                return self.buffer[self.pos]
+            if not (self._fill()):
+                return ''
+
+    def expect(self, char: str):
+        if (self.peek()!=char):
+            raise ValueError(f"Invalid JSON data: expected '{char}' at character {self.pos} of the current block.")
+        self.pos += 1
+
+    def decode(self):
+        """
+        Decode the next complete value, reading more blocks (of growing size) while it is incomplete.
+        """
+        self.peek()
+        size = self.block_size
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                if (end < len(self.buffer) or self.eof): #a number at the end of the block may be cut short
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if (self.eof):
+                    raise
+            self._fill(size)
+            size *= 2
+
+    def iter_array(self, opened=False) -> Iterator:
+        """
+        Yield the items of an array one by one. Set opened if the '[' was already consumed.
+        """
+        if not (opened):
+            self.expect('[')
+        if (self.peek()==']'):
+            self.pos += 1
+            return
+        while True:
+            yield self.decode()
+            char = self.peek()
+            self.pos += 1
+            if (char==']'):
+                return
+            if (char!=','):
+                raise ValueError("Invalid JSON data: expected ',' or ']' in array.")
+
+    def iter_object_keys(self) -> Iterator[str]:
+        """
+        Yield the keys of an object one by one. The caller must consume each value (decode, iter_array...) before asking for the next key.
+        """
+        self.expect('{')
+        if (self.peek()=='}'):
+            self.pos += 1
+            return
+        while True:
+            key = self.decode()
+            self.expect(':')
+            yield key
+            char = self.peek()
+            self.pos += 1
+            if (char=='}'):
+                return
+            if (char!=','):
+                raise ValueError("Invalid JSON data: expected ',' or '}' in object.")
 
 
 class Fetcher:
 
     @staticmethod
-    def read_CSV(file_path) -> Tuple[list, str]: #to read from tabulated files
+    def compression(file_path) -> str:
+        """
+        Find the compression of a file from its leading bytes (the extension isn't trusted).
+        Return:
+        [str] = 'gzip', 'bz2', 'xz', 'zip' or None for an uncompressed file
+        """
+        with open(file_path, "rb") as file:
+            head = file.read(8)
+        for signature, compression in constants.COMPRESSION_SIGNATURES.items():
+            if (head.startswith(signature)):
+                return compression
+        return None
+
+    @staticmethod
+    def open_binary(file_path) -> io.BufferedIOBase:
+        """
+        Open a file as bytes, decompressing gzip, bz2, xz and zip files on the fly as they are read.
+        No uncompressed copy is written and the decompressed data is never held in memory as a whole.
+        Zip archives are read from their first file.
+        Args:
+        [str] = full file path
+        Return:
+        [io.BufferedIOBase] = the opened file, to be closed by the caller
+        """
+        match Fetcher.compression(file_path):
+            case 'gzip':
+                return gzip.open(file_path, "rb")
+            case 'bz2':
+                return bz2.open(file_path, "rb")
+            case 'xz':
+                return lzma.open(file_path, "rb")
+            case 'zip':
+                with zipfile.ZipFile(file_path) as archive: #the member keeps the archive file open until it is closed
+                    members = [info for info in archive.infolist() if not (info.is_dir())]
+                    if not (members):
+                        raise ValueError(f"Empty zip archive: {file_path}")
+                    return archive.open(members[0])
+            case _:
+                return open(file_path, "rb")
+
+    @staticmethod
+    def open_text(file_path, encoding="utf-8") -> io.TextIOBase:
+        """
+        Open a file as text, decompressing it on the fly if needed (see open_binary).
+        Args:
+        [str] = full file path
+        [str] = text encoding
+        Return:
+        [io.TextIOBase] = the opened text file, to be closed by the caller
+        """
+        return io.TextIOWrapper(Fetcher.open_binary(file_path), encoding=encoding)
+
+    @staticmethod
+    def read_head(file_path, size: int=constants.SNIFF_BYTE_BUDGET) -> Tuple[bytes, bool, str]: #the head bytes, if the file is longer, errors
+        """
+        Read a fixed size block from the start of a file (decompressed), to detect its format without reading it all.
+        Args:
+        [str] = full file path
+        [int] = number of bytes to read
+        Return:
+        [bytes] = the head of the file
+        [bool] = if the file goes on after the head
+        [str] = error string (None if OK)
+        """
+        if not (os.path.isfile(file_path)):
+            return None, False, f"File not found: {file_path}."
+        try:
+            with Fetcher.open_binary(file_path) as file:
+                head = file.read(size + 1)
+            return head[:size], len(head) > size, None
+        except Exception as e:
+            return None, False, f"Reading file error: {e}"
+
+    @staticmethod
+    def read_CSV(file_path, encoding="utf-8") -> Tuple[list, str]: #to read from tabulated files
         try:
-            with open(file_path, "r", encoding="utf-8") as file: #this also auto-close file after reading.
+            with Fetcher.open_text(file_path, encoding) as file: #this also auto-close file after reading.
                 content = [line for line in file.readlines()]
                 if len(content)==0:
                     return None, f"Empty file: {file_path}"
@@ -36,49 +311,532 @@ class Fetcher:
             return None, f"File not found: {file_path}."
         except Exception:
             return None, f"Reading file error: unknown error."
+
+    @staticmethod
+    def stream_CSV(file_path, chunk_size=constants.CSV_CHUNK_SIZE, encoding="utf-8") -> Tuple[Iterator[list], str]: #to read tabulated files in chunks of lines
+        """
+        Opens a tabulated file to be read in fixed size chunks of lines, so the whole file is never held in memory.
+        Args:
+        [str] = full file path
+        [int] = number of lines per chunk
+        [str] = text encoding
+        Return:
+        [Iterator[list[str]]] = generator of line chunks (None if error)
+        [str] = error string (None if OK)
+        """
+        if not (os.path.isfile(file_path)):
+            return None, f"File not found: {file_path}."
+        if (os.path.getsize(file_path)==0):
+            return None, f"Empty file: {file_path}"
+        if (chunk_size<1):
+            return None, f"Invalid chunk size: {chunk_size}."
+        return Fetcher._iter_line_chunks(file_path, chunk_size, encoding), None
+
+    @staticmethod
+    def map_CSV(file_path, encoding="utf-8") -> Tuple[MappedCSV, str]: #to map tabulated files for random line access
+        """
+        Memory map a tabulated file and index where each line starts.
+        Args:
+        [str] = full file path
+        [str] = text encoding (must be ASCII compatible, see constants.ASCII_COMPATIBLE_ENCODINGS)
+        Return:
+        [MappedCSV] = the mapped file (None if error)
+        [str] = error string (None if OK)
+        """
+        if not (os.path.isfile(file_path)):
+            return None, f"File not found: {file_path}."
+        if (os.path.getsize(file_path)==0):
+            return None, f"Empty file: {file_path}" #an empty file can't be mapped
+        if (Fetcher.compression(file_path)):
+            return None, f"Compressed files can't be mapped, use the stream mode: {file_path}"
+        if (encoding not in constants.ASCII_COMPATIBLE_ENCODINGS):
+            return None, f"{encoding} files can't be mapped, use the stream mode: {file_path}"
+        try:
+            return MappedCSV(file_path, encoding), None
+        except OSError as e:
+            return None, f"Mapping file error: {e}"
+
+    @staticmethod
+    def stream_JSON_records(file_path, records_path: str=None, progress: LoadProgress=None) -> Tuple[Iterator, str]: #to read JSON/JSON Lines records one at a time
+        """
+        Open a JSON or JSON Lines file to be read record by record, without parsing the whole document.
+        Records are the items of the top level array, the items of the array at records_path (ex: 'users' or 'data.items')
+        or, if no path is given, of the first top level array of objects. JSON Lines files yield each line as a record.
+        Args:
+        [str] = full file path
+        [str] = dotted path to the array of records, if any
+        [LoadProgress] = progress to add the characters read to (optional)
+        Return:
+        [Iterator] = generator of records (None if error)
+        [str] = error string (None if OK)
+        """
+        if not (os.path.isfile(file_path)):
+            return None, f"File not found: {file_path}."
+        if (os.path.getsize(file_path)==0):
+            return None, f"Empty file: {file_path}"
+        path = records_path.split('.') if (records_path) else None
+        return Fetcher._iter_JSON_records(file_path, path, progress), None
+
+    @staticmethod
+    def _iter_JSON_records(file_path, path: list[str], progress: LoadProgress=None) -> Iterator:
+        name = file_path.lower()
+        for extension in ('.gz', '.bz2', '.xz', '.zip'): #data.jsonl.gz is a JSON Lines file
+            name = name.removesuffix(extension)
+        json_lines = os.path.splitext(name)[1] in ('.jsonl', '.ndjson')
+        with Fetcher.open_text(file_path) as file:
+            reader = JSONStreamReader(file, progress=progress)
+            first = reader.peek()
+            if (first=='[' and not (json_lines)):
+                yield from reader.iter_array()
+            elif (first=='{' and not (json_lines)):
+                found, rest = yield from Fetcher._iter_JSON_object_records(reader, path)
+                if not (found):
+                    if (path):
+                        raise ValueError(f"Records not found in JSON data: {'.'.join(path)}")
+                    yield rest #no array of records, the object itself is the only record
+            while (reader.peek()!=''): #JSON Lines, or more top level values after the first one
+                yield reader.decode()
+
+    @staticmethod
+    def _iter_JSON_object_records(reader: JSONStreamReader, path: list[str]):
+        """
+        Walk the keys of an object, streaming the records array when found. The other values are decoded and kept.
+        Return (through StopIteration):
+        [bool] = if the records array was found
+        [dict] = the other key/values of the object
+        """
+        found = False
+        rest = {}
+        for key in reader.iter_object_keys():
+            if not (found) and (path is None or key==path[0]):
+                char = reader.peek()
+                if (char=='[' and (path is None or len(path)==1)):
+                    reader.expect('[')
+                    if (path is not None or reader.peek()=='{'): #without a path, only an array of objects holds records
+                        found = True
+                        yield from reader.iter_array(opened=True)
+                    else:
+                        rest[key] = list(reader.iter_array(opened=True))
+                    continue
+                if (char=='{' and path is not None and len(path)==1): #the path points to a single record
+                    found = True
+                    yield reader.decode()
+                    continue
+                if (char=='{' and path is not None and len(path)>1):
+                    found, rest[key] = yield from Fetcher._iter_JSON_object_records(reader, path[1:])
+                    continue
+            rest[key] = reader.decode()
+        return found, rest
+
+    @staticmethod
+    def _flatten_JSON(value, prefix: str='', out: dict=None) -> dict:
+        """
+        Flatten a record to a single level: nested keys are joined with '.', lists of plain values are joined with ', '
+        and lists holding objects or lists are kept as JSON text.
+        """
+        if (out is None):
+            out = {}
+        if isinstance(value, dict):
+            for key, item in value.items():
+                Fetcher._flatten_JSON(item, f'{prefix}.{key}' if (prefix) else str(key), out)
+        elif isinstance(value, list):
+            if all(not isinstance(item, (dict, list)) for item in value):
+                out[prefix or 'value'] = ', '.join('' if item is None else str(item) for item in value)
+            else:
+                out[prefix or 'value'] = json.dumps(value, ensure_ascii=False)
+        else:
+            out[prefix or 'value'] = value
+        return out
+
+    @staticmethod
+    def _value_type(values: list) -> DataType:
+        """
+        Data type of a column from the Python type of its first non null value (None if all values are null).
+        """
+        for value in values:
+            if (value is None):
+                continue
+            if isinstance(value, bool):
+                return DataType.BOOLEAN
+            if isinstance(value, int):
+                return DataType.INTEGER
+            if isinstance(value, float):
+                return DataType.FLOAT
+            if isinstance(value, (datetime, date)):
+                return DataType.DATE
+            return DataType.TEXT
+        return None
+
+    @staticmethod
+    def _final_type(data_type: DataType, missing: bool) -> DataType:
+        """
+        Data type of a finished column: missing values need NaN (numbers), NA (nullable booleans) or None (text).
+        """
+        data_type = data_type or DataType.TEXT
+        if (missing and data_type==DataType.INTEGER):
+            return DataType.FLOAT
+        return data_type
+
+    @staticmethod
+    def read_JSON(file_path, records_path: str=None, chunk_size=constants.JSON_CHUNK_SIZE, progress: LoadProgress=None) -> Tuple[pd.DataFrame, list[DataType], str]: #output the dataframe, data types, errors
+        """
+        Read the records of a JSON or JSON Lines file into a table, flattening nested records.
+        Columns are filled as records stream in and converted to typed arrays every chunk_size records.
+        Args:
+        [str] = full file path
+        [str] = dotted path to the array of records, if any (see stream_JSON_records)
+        [int] = number of records converted at a time
+        [LoadProgress] = progress reported after each chunk, also used to cancel the load (optional)
+        Return:
+        [pd.DataFrame] = the typed data frame
+        list[DataType] = the data type for each column
+        [str] = error string (None if OK)
+        """
+        records, error = Fetcher.stream_JSON_records(file_path, records_path, progress)
+        if (error):
+            return None, None, error
+
+        columns = {} #column name => {'arrays': typed chunks, 'type': DataType, 'missing': if any value is missing}
+        pending = {} #column name => values of the current chunk
+        row_count = 0
+        chunk_rows = 0
+
+        def flush():
+            for name, column in columns.items():
+                values = pending.get(name) or [None] * chunk_rows
+                if (column['type'] is None):
+                    column['type'] = Fetcher._value_type(values)
+                if (column['type'] is None): #only nulls so far
+                    array = np.full(len(values), None, dtype=object)
+                else:
+                    array, column['type'] = Fetcher._typed_column_chunk(values, column['type'])
+                column['missing'] = column['missing'] or any(value is None for value in values)
+                column['arrays'].append(array)
+            pending.clear()
+            if (progress):
+                progress.step(rows=chunk_rows)
+
+        try:
+            for record in records:
+                flat = Fetcher._flatten_JSON(record if isinstance(record, dict) else {'value': record})
+                for name in flat:
+                    if (name not in columns): #a new column, empty for all previous records
+                        columns[name] = {'arrays': [], 'type': None, 'missing': row_count>0}
+                        if (row_count - chunk_rows > 0):
+                            columns[name]['arrays'].append(np.full(row_count - chunk_rows, None, dtype=object))
+                    if (name not in pending):
+                        pending[name] = [None] * chunk_rows
+                for name, values in pending.items():
+                    values.append(flat.get(name))
+                for name in columns.keys() - pending.keys(): #columns not seen in this chunk yet
+                    pending[name] = [None] * chunk_rows + [None]
+                chunk_rows += 1
+                row_count += 1
+                if (chunk_rows==chunk_size):
+                    flush()
+                    chunk_rows = 0
+            if (chunk_rows>0):
+                flush()
+        except (ValueError, json.JSONDecodeError) as e:
+            return None, None, f"Reading JSON error: {e}"
+
+        if (row_count==0):
+            return None, None, f"No records in JSON data: {file_path}"
+
+        data_types = [Fetcher._final_type(column['type'], column['missing']) for column in columns.values()]
+
+        df = pd.DataFrame({index: Wrangler.join_column_chunks(column['arrays'], data_types[index]) for index, column in enumerate(columns.values())}, copy=False)
+        df.columns = list(columns.keys())
+        return df, data_types, None
+
+    @staticmethod
+    def list_XLSX_sheets(file_path) -> Tuple[list[Tuple[str, int]], str]: #the (name, row count) of each sheet, errors
+        """
+        List the sheets of a XLSX workbook with their row counts, without loading any cell.
+        Args:
+        [str] = full file path
+        Return:
+        list[Tuple[str, int]] = (name, number of rows or None if the workbook doesn't store it) for each sheet
+        [str] = error string (None if OK)
+        """
+        if (openpyxl is None):
+            return None, "Reading XLSX files needs the openpyxl package."
+        if not (os.path.isfile(file_path)):
+            return None, f"File not found: {file_path}."
+        try:
+            workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+            try:
+                sheets = [(sheet.title, sheet.max_row) for sheet in workbook.worksheets] #read from the sheet dimension, no rows are parsed
+            finally:
+                workbook.close()
+            return sheets, None
+        except Exception as e:
+            return None, f"Reading XLSX error: {e}"
+
+    @staticmethod
+    def read_XLSX(file_path, sheet_name: str=None, has_header=True, chunk_size=constants.XLSX_CHUNK_SIZE, progress: LoadProgress=None) -> Tuple[pd.DataFrame, list[DataType], str]: #output the dataframe, data types, errors
+        """
+        Stream the rows of one sheet of a XLSX workbook (read-only mode) straight into typed columns.
+        The data type of each column comes from the cell values (number, boolean, date or text), no string parsing is done.
+        Args:
+        [str] = full file path
+        [str] = the sheet to read (None = first sheet)
+        [bool] = if the first row is a header
+        [int] = number of rows converted at a time
+        [LoadProgress] = progress reported after each chunk, also used to cancel the load (optional)
+        Return:
+        [pd.DataFrame] = the typed data frame
+        list[DataType] = the data type for each column
+        [str] = error string (None if OK)
+        """
+        if (openpyxl is None):
+            return None, None, "Reading XLSX files needs the openpyxl package."
+        if not (os.path.isfile(file_path)):
+            return None, None, f"File not found: {file_path}."
+        try:
+            workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True) #data_only reads cached formula results
+        except Exception as e:
+            return None, None, f"Reading XLSX error: {e}"
+
+        try:
+            sheet = workbook[sheet_name] if (sheet_name) else workbook.worksheets[0]
+            rows = sheet.iter_rows(values_only=True)
+            if (has_header):
+                header_row = next(rows, None)
+                if (header_row is None):
+                    return None, None, f"Empty sheet: {sheet.title}"
+                while (header_row and header_row[-1] is None): #trailing empty header cells
+                    header_row = header_row[:-1]
+                headers = [str(value) if (value is not None) else f'Column {index+1}' for index, value in enumerate(header_row)]
+            else:
+                headers = list(range(1, (sheet.max_column or 0)+1))
+            col_count = len(headers)
+            if (col_count==0):
+                return None, None, f"Empty sheet: {sheet.title}"
+
+            data_types = [None] * col_count #guessed from the first non null value of each column
+            missing = [False] * col_count
+            chunks = [[] for _ in range(col_count)]
+            while True:
+                row_chunk = list(islice(rows, chunk_size))
+                if not (row_chunk):
+                    break
+                row_chunk = [tuple(row[:col_count]) + (None,) * (col_count - len(row)) for row in row_chunk if any(value is not None for value in row)] #skip empty rows
+                if not (row_chunk):
+                    continue
+                for index, values in enumerate(zip(*row_chunk)):
+                    if (data_types[index] is None):
+                        data_types[index] = Fetcher._value_type(values)
+                    if (data_types[index] is None): #only empty cells so far
+                        array = np.full(len(values), None, dtype=object)
+                    else:
+                        array, data_types[index] = Fetcher._typed_column_chunk(values, data_types[index])
+                    missing[index] = missing[index] or any(value is None for value in values)
+                    chunks[index].append(array)
+                if (progress):
+                    progress.step(rows=len(row_chunk))
+                del row_chunk
+        except Exception as e:
+            return None, None, f"Reading XLSX error: {e}"
+        finally:
+            workbook.close()
+
+        if (len(chunks[0])==0):
+            return None, None, f"No data rows in sheet: {sheet.title}"
+        data_types = [Fetcher._final_type(data_type, missing[index]) for index, data_type in enumerate(data_types)]
+        df = pd.DataFrame({index: Wrangler.join_column_chunks(chunks[index], data_types[index]) for index in range(col_count)}, copy=False)
+        df.columns = headers
+        return df, data_types, None
+
+    @staticmethod
+    def _iter_line_chunks(file_path, chunk_size, encoding="utf-8") -> Iterator[list]:
+        with Fetcher.open_text(file_path, encoding) as file: #file stays open only while the generator is consumed
+            while True:
+                chunk = list(islice(file, chunk_size))
+                if not (chunk):
+                    break
+                yield chunk
     
     @staticmethod
-    def read_SQLite(file_path) -> Tuple[pd.DataFrame, list, str]: #output the dataframe, headers, errors
-        conn = sqlite3.connect(file_path) #connect to database
-        #conn = sqlite3.connect("':memory") create database in memory
-        cursor = conn.cursor()
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS users2 (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            age INTEGER,
-            email TEXT UNIQUE
-        )
-        """)
-        conn.commit()
-        table_name = "users2"
-        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name=?", (table_name,))
-        exists = cursor.fetchone()
-
-        if not (exists):
-            cursor.execute("INSERT INTO users2 (name, age, email) VALUES (?, ?, ?)", 
-               ("Alice", 25, "alice@example.com"))
-            cursor.execute("INSERT INTO users2 (name, age, email) VALUES (?, ?, ?)", 
-               ("John", 32, "john@example.com"))        
-            cursor.execute("INSERT INTO users2 (name, age, email) VALUES (?, ?, ?)", 
-               ("Peter", 50, "peter@example.com"))
-            conn.commit()  # Save changes
-
-        df = pd.read_sql_query("SELECT * FROM users", conn) #table to data frame
-
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-        tables = cursor.fetchall()
-
-        print("Tables in database")
-        for table in tables:
-            print(table)   
-
-
-        conn.close()
-        print(df)
-        print(df.dtypes)
-        df_types = df.applymap(type)
-        print(df_types)
-        
+    def _connect_SQLite(file_path) -> sqlite3.Connection:
+        """
+        Open a SQLite database read-only, the source database is never written.
+        """
+        uri = f"{pathname2url(os.path.abspath(file_path))}?mode=ro"
+        conn = sqlite3.connect(f"file:{uri}", uri=True)
+        conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    @staticmethod
+    def _quote_identifier(name: str) -> str:
+        return '"' + name.replace('"', '""') + '"'
+
+    @staticmethod
+    def list_SQLite_tables(file_path) -> Tuple[list[Tuple[str, str]], str]: #the (name, type) of each table and view, errors
+        """
+        List the tables and views of a SQLite database.
+        Args:
+        [str] = full file path
+        Return:
+        list[Tuple[str, str]] = (name, 'table' or 'view') for each item
+        [str] = error string (None if OK)
+        """
+        if not (os.path.isfile(file_path)):
+            return None, f"File not found: {file_path}."
+        try:
+            conn = Fetcher._connect_SQLite(file_path)
+            try:
+                tables = conn.execute("SELECT name, type FROM sqlite_master WHERE type IN ('table', 'view') AND name NOT LIKE 'sqlite_%' ORDER BY type, name").fetchall()
+            finally:
+                conn.close()
+            if (len(tables)==0):
+                return None, f"No tables in database: {file_path}"
+            return tables, None
+        except sqlite3.Error as e:
+            return None, f"Reading database error: {e}"
+
+    @staticmethod
+    def list_SQLite_columns(file_path, table: str) -> Tuple[list[Tuple[str, str]], str]: #the (name, declared type) of each column, errors
+        """
+        List the columns of a SQLite table or view with their declared types.
+        """
+        try:
+            conn = Fetcher._connect_SQLite(file_path)
+            try:
+                columns = [(row[1], row[2]) for row in conn.execute(f"PRAGMA table_info({Fetcher._quote_identifier(table)})")]
+            finally:
+                conn.close()
+            if (len(columns)==0):
+                return None, f"Table not found: {table}"
+            return columns, None
+        except sqlite3.Error as e:
+            return None, f"Reading database error: {e}"
+
+    @staticmethod
+    def SQLite_affinity_type(declared_type: str) -> DataType:
+        """
+        Map a declared column type to a DataType, following the SQLite type affinity rules.
+        """
+        declared_type = (declared_type or '').upper()
+        if ('INT' in declared_type):
+            return DataType.INTEGER
+        if ('CHAR' in declared_type or 'CLOB' in declared_type or 'TEXT' in declared_type):
+            return DataType.TEXT
+        if (declared_type=='' or 'BLOB' in declared_type):
+            return DataType.TEXT #BLOB affinity, values are kept as they are stored
+        if ('BOOL' in declared_type):
+            return DataType.BOOLEAN #NUMERIC affinity, but only used for flags
+        if ('REAL' in declared_type or 'FLOA' in declared_type or 'DOUB' in declared_type):
+            return DataType.FLOAT
+        return DataType.FLOAT #NUMERIC affinity
+
+    @staticmethod
+    def _typed_column_chunk(values: tuple, data_type: DataType) -> Tuple[np.ndarray, DataType]:
+        """
+        Convert the values of one column of a fetched chunk to a typed array.
+        SQLite, JSON and XLSX columns can hold values of any type, so a column is demoted if a value doesn't fit (BOOLEAN => INTEGER => FLOAT => TEXT, DATE => TEXT).
+        BOOLEAN chunks with missing values are nullable booleans. Values of a TEXT chunk are kept as written by str() (see Wrangler._text_array).
+        """
+        if (data_type==DataType.BOOLEAN):
+            if all(value is None or (isinstance(value, (bool, int)) and value in (0, 1)) for value in values):
+                if any(value is None for value in values):
+                    return pd.array([None if (value is None) else bool(value) for value in values], dtype='boolean'), data_type
+                return np.array(values, dtype=bool), data_type
+            data_type = DataType.INTEGER
+        if (data_type==DataType.INTEGER):
+            if all(isinstance(value, int) for value in values): #no NULL, no decimals
+                try:
+                    return np.array(values, dtype=np.int64), data_type
+                except OverflowError:
+                    pass
+            data_type = DataType.FLOAT
+        if (data_type==DataType.FLOAT):
+            if all(value is None or isinstance(value, (int, float)) for value in values):
+                return np.array(values, dtype=np.float64), data_type #NULL => NaN
+            data_type = DataType.TEXT
+        if (data_type==DataType.DATE):
+            if all(value is None or isinstance(value, (datetime, date)) for value in values):
+                return np.array(values, dtype='datetime64[ns]'), data_type #NULL => NaT
+            data_type = DataType.TEXT
+        array = np.empty(len(values), dtype=object)
+        array[:] = [value if (value is None or isinstance(value, str)) else Fetcher._text_value(value) for value in values]
+        return array, DataType.TEXT
+
+    @staticmethod
+    def _text_value(value) -> str:
+        if isinstance(value, bytes):
+            return value.decode('utf-8', errors='replace')
+        return str(value)
+
+    @staticmethod
+    def read_SQLite(file_path, table: str, columns: list[str]=None, where: list[tuple]=None, chunk_size=constants.SQLITE_FETCH_SIZE, progress: LoadProgress=None) -> Tuple[pd.DataFrame, list[DataType], str]: #output the dataframe, data types, errors
+        """
+        Read a table or view of a SQLite database into typed columns.
+        Args:
+        [str] = full file path
+        [str] = table or view name
+        list[str] = columns to read (None = all)
+        list[tuple] = optional (column, operator, value) filters, all must hold (see constants.SQLITE_FILTER_OPERATORS). Filtering is done by
+                      SQLite, the values are passed as query parameters (never pasted in the SQL), 'IS NULL' and 'IS NOT NULL' take no value
+        [int] = number of rows fetched at a time
+        [LoadProgress] = progress reported after each chunk, also used to cancel the load (optional)
+        Return:
+        [pd.DataFrame] = the typed data frame
+        list[DataType] = the data type for each column
+        [str] = error string (None if OK)
+        """
+        table_columns, error = Fetcher.list_SQLite_columns(file_path, table)
+        if (error):
+            return None, None, error
+        declared_types = dict(table_columns)
+        if not (columns):
+            columns = [name for name, _ in table_columns]
+        unknown = [name for name in columns if name not in declared_types]
+        if (unknown):
+            return None, None, f"Columns not found in {table}: {', '.join(unknown)}"
+
+        data_types = [Fetcher.SQLite_affinity_type(declared_types[name]) for name in columns]
+        query = f"SELECT {', '.join(Fetcher._quote_identifier(name) for name in columns)} FROM {Fetcher._quote_identifier(table)}"
+        conditions, parameters = [], []
+        for column, operator, value in (where or []):
+            if (column not in declared_types):
+                return None, None, f"Filter column not found in {table}: {column}"
+            if (operator not in constants.SQLITE_FILTER_OPERATORS):
+                return None, None, f"Unknown filter operator: {operator}"
+            if (operator in ('IS NULL', 'IS NOT NULL')):
+                conditions.append(f"{Fetcher._quote_identifier(column)} {operator}")
+            else:
+                conditions.append(f"{Fetcher._quote_identifier(column)} {operator} ?")
+                parameters.append(value)
+        if (conditions):
+            query += f" WHERE {' AND '.join(conditions)}"
+
+        try:
+            conn = Fetcher._connect_SQLite(file_path)
+            try:
+                cursor = conn.execute(query, parameters)
+                chunks = [[] for _ in columns] #typed arrays for each column, one per fetched chunk
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not (rows):
+                        break
+                    for index, values in enumerate(zip(*rows)):
+                        array, data_types[index] = Fetcher._typed_column_chunk(values, data_types[index])
+                        chunks[index].append(array)
+                    if (progress):
+                        progress.step(rows=len(rows))
+                    del rows
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            return None, None, f"Reading database error: {e}"
+
+        if (len(chunks[0])==0): #no rows: empty arrays of the declared types, so the columns still get their dtypes
+            for index in range(len(columns)):
+                array, data_types[index] = Fetcher._typed_column_chunk((), data_types[index])
+                chunks[index].append(array)
+        df = pd.DataFrame({index: Wrangler.join_column_chunks(chunks[index], data_types[index]) for index in range(len(columns))}, copy=False)
+        df.columns = columns
+        return df, data_types, None
 
 
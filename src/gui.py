@@ -8,15 +8,17 @@ License: MIT
 # Standard library imports
 import sys
 import os
+import html
 from typing import Tuple
 
 # Third-party imports
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QTableWidget, QTableWidgetItem, QVBoxLayout, QHBoxLayout, 
                              QPushButton, QWidget, QMenuBar, QFrame, QSizePolicy, QTabWidget, QLabel, QTextEdit, 
                              QStatusBar, QStackedWidget, QRadioButton, QButtonGroup, QComboBox, QScrollArea, QFileDialog,
-                             QDialog, QLineEdit)
+                             QDialog, QLineEdit, QListWidget, QListWidgetItem, QDialogButtonBox,
+                             QInputDialog, QMessageBox)
 from PyQt6.QtGui import QAction, QIcon, QPalette, QColor, QIntValidator, QDoubleValidator
-from PyQt6.QtCore import Qt, QSize, pyqtSignal
+from PyQt6.QtCore import Qt, QSize, QThread, pyqtSignal
 
 import seaborn as sns
 import matplotlib.pyplot as plt
@@ -24,7 +26,9 @@ from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
 
 # Local application imports
 from . import styles
+from . import constants
 from .data_format import (DataType, NumericOperation)
+from .progress import LoadProgress
 
 class DataSetItem(QWidget):
     "A class to create a data set item with widget controls."
@@ -150,6 +154,110 @@ class NumericDataManipulation(QDialog):
 
 
 
+class SQLiteQueryDialog(QDialog):
+    """
+    A dialog class to pick a table or view of a SQLite database, the columns to read and an optional (column, operator, value) filter.
+    """
+    def __init__(self, tables: list[Tuple[str, str]]=None, list_columns=None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle('Read SQLite table')
+        self.setModal(True)
+        self.setMinimumWidth(400)
+        self.list_columns = list_columns #function that returns the (name, declared type) of the columns of a table
+
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+
+        self.table_combo = QComboBox()
+        for name, kind in tables:
+            self.table_combo.addItem(f'{name} ({kind})', name)
+        self.table_combo.currentIndexChanged.connect(self.update_columns)
+
+        self.column_list = QListWidget() #checkable list of columns to read
+
+        filter_layout = QHBoxLayout() #optional filter, its value is passed as a query parameter
+        self.filter_column_combo = QComboBox()
+        self.filter_operator_combo = QComboBox()
+        self.filter_operator_combo.addItems(constants.SQLITE_FILTER_OPERATORS)
+        self.filter_value_edit = QLineEdit()
+        self.filter_value_edit.setPlaceholderText("value, ex: 30")
+        filter_layout.addWidget(self.filter_column_combo)
+        filter_layout.addWidget(self.filter_operator_combo)
+        filter_layout.addWidget(self.filter_value_edit)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+
+        layout.addWidget(QLabel('Table/View'))
+        layout.addWidget(self.table_combo)
+        layout.addWidget(QLabel('Columns'))
+        layout.addWidget(self.column_list)
+        layout.addWidget(QLabel('Filter (optional)'))
+        layout.addLayout(filter_layout)
+        layout.addWidget(buttons)
+
+        self.update_columns()
+
+    def update_columns(self, index=0):
+        """
+        Refill the column list for the selected table, all columns checked.
+        """
+        self.column_list.clear()
+        self.filter_column_combo.clear()
+        self.filter_column_combo.addItem('(no filter)', None)
+        columns, error = self.list_columns(self.table_combo.currentData())
+        if (error):
+            return
+        for name, declared_type in columns:
+            item = QListWidgetItem(f'{name} [{declared_type or "ANY"}]')
+            item.setData(Qt.ItemDataRole.UserRole, name)
+            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(Qt.CheckState.Checked)
+            self.column_list.addItem(item)
+            self.filter_column_combo.addItem(name, name)
+
+    def get_query(self) -> Tuple [str, list[str], list[tuple]]:
+        """
+        Return:
+        [str] = the selected table
+        list[str] = the checked columns
+        list[tuple] = the (column, operator, value) filters (empty = no filter)
+        """
+        columns = [self.column_list.item(row).data(Qt.ItemDataRole.UserRole) for row in range(self.column_list.count())
+                   if self.column_list.item(row).checkState()==Qt.CheckState.Checked]
+        filter_column = self.filter_column_combo.currentData()
+        where = [] if (filter_column is None) else [(filter_column, self.filter_operator_combo.currentText(), self.filter_value_edit.text())]
+        return self.table_combo.currentData(), columns, where
+
+
+class LoadWorker(QThread):
+    """
+    A thread class to load a data set in the background, reporting its progress and allowing to cancel it.
+    The job is any function taking a LoadProgress and returning (data frame, data types, error).
+    """
+    progress = pyqtSignal(object) #the LoadWorker, read its load_progress
+    loaded = pyqtSignal(object, object) #the LoadWorker, the job result
+    failed = pyqtSignal(object, str) #the LoadWorker, the error string
+
+    def __init__(self, name: str, job, total_bytes: int=0, parent=None):
+        super().__init__(parent)
+        self.name = name #file name shown in the status bar
+        self.job = job
+        self.load_progress = LoadProgress(total_bytes, lambda _: self.progress.emit(self))
+
+    def cancel(self):
+        self.load_progress.cancel() #the job stops at its next chunk
+
+    def run(self):
+        try:
+            result = self.job(self.load_progress)
+        except Exception as e:
+            self.failed.emit(self, str(e))
+            return
+        self.loaded.emit(self, result)
+
+
 class MainWindow(QMainWindow):
     def __init__(self, main):
         super().__init__()
@@ -204,11 +312,20 @@ class MainWindow(QMainWindow):
         save_action = QAction("Save", self)
         exit_action = QAction("Exit", self)
         exit_action.triggered.connect(self.close)  # Connect Exit action
+        cancel_load_action = QAction("Cancel Loading", self)
+        cancel_load_action.triggered.connect(self.main.cancel_loading)
+        text_storage_action = QAction("Toggle Arrow Text Storage", self)
+        text_storage_action.triggered.connect(self.main.toggle_text_storage)
+        clear_cache_action = QAction("Clear Data Set Cache", self)
+        clear_cache_action.triggered.connect(self.main.clear_cache)
 
         file_menu.addAction(open_action)
         file_menu.addAction(save_action)
+        file_menu.addAction(cancel_load_action)
         file_menu.addSeparator()  # Adds a separator line
         file_menu.addAction(exit_action)
+        settings_menu.addAction(clear_cache_action)
+        data_menu.addAction(text_storage_action)
 
         # === DATA SET READER TAB WIDGETS ===
         read_layout = QVBoxLayout()
@@ -513,8 +630,15 @@ class MainWindow(QMainWindow):
         messagetype: 'str_whitespace'
             message: [Column Name, Column Index, Whitespace Removal Format]
         messagetype: 'str_blocked'
-            message: xxxx
-        messagetype? 'str_dictionary
+            message: [Column Name, Column Index, Used Custom List, Values Hit]
+        messagetype: 'str_dictionary'
+            message: [Column Name, Column Index, Number of Changes, Changes per Term]
+        messagetype: 'str_statistics'
+            message: [Column Name, Column Index, Statistics (see TableFormat.word_statistics)]
+        messagetype: 'str_duplicates'
+            message: [Column Name, Column Index, Number of Groups, Mode (drop/merge), Rows Changed]
+        messagetype: 'str_split'
+            message: [Column Name, Column Index, Delimiter, New Column Names]
 
         """
         formated_message = ''      
@@ -525,9 +649,20 @@ class MainWindow(QMainWindow):
                 case 'str_whitespace':
                     formated_message = f"""<div>Whitespace removed: <span style="color: gray;">Col: {message[0]}[{message[1]}] - Rule: {message[2]}</span></div>"""
                 case 'str_blocked':
-                    formated_message = f"""<div>Blocked words removed <span style="color: gray;">Col: {message[0]}[{message[1]}] - Used Custom List?: {message[2]}</span></div>"""
+                    formated_message = f"""<div>Blocked words removed <span style="color: gray;">Col: {message[0]}[{message[1]}] - Used Custom List?: {message[2]} - Values Hit: {message[3]}</span></div>"""
                 case 'str_dictionary':
-                    formated_message = f"""<div>Dictionary words applied <span style="color: gray;">Col: {message[0]}[{message[1]}] - Number of Changes: {message[2]}</span></div>"""
+                    formated_message = f"""<div>Dictionary words applied <span style="color: gray;">Col: {message[0]}[{message[1]}] - Number of Changes: {message[2]} ({", ".join(f"{term}: {count}" for term, count in message[3].items())})</span></div>"""
+                case 'str_statistics':
+                    statistics = message[2]
+                    lengths = statistics['lengths']
+                    length_text = f"{lengths.index.min()}-{lengths.index.max()} (mean {(lengths.index.to_numpy() * lengths.to_numpy()).sum() / lengths.sum():.1f})" if (len(lengths)) else '-'
+                    top_values = ", ".join(f"'{html.escape(str(value))}': {count:,}" for value, count in statistics['values'][:5])
+                    top_tokens = ", ".join(f"'{html.escape(str(token))}': {count:,}" for token, count in statistics['tokens'][:5])
+                    formated_message = f"""<div>String statistics{' (approximate)' if statistics['approximate'] else ''} <span style="color: gray;">Col: {message[0]}[{message[1]}] - Rows: {statistics['rows']:,} - Missing: {statistics['missing']:,} - Blank: {statistics['blank']:,} - Distinct: {statistics['distinct'] if statistics['distinct'] is not None else '?'} - Lengths: {length_text} - Top values: {top_values} - Words: {statistics['token_total']:,}, top: {top_tokens}</span></div>"""
+                case 'str_duplicates':
+                    formated_message = f"""<div>Duplicates {'dropped' if message[3]=='drop' else 'merged'} <span style="color: gray;">Col: {message[0]}[{message[1]}] - Groups: {message[2]:,} - Rows: {message[4]:,}</span></div>"""
+                case 'str_split':
+                    formated_message = f"""<div>Column split <span style="color: gray;">Col: {message[0]}[{message[1]}] - Delimiter: '{html.escape(message[2])}' - New columns: {html.escape(", ".join(message[3]))}</span></div>"""
                 case _:
                     formated_message = message[0]
 
@@ -629,30 +764,22 @@ class MainWindow(QMainWindow):
                 self.clear_layout(item.layout())
   
     def num_type_clamp(self):
-        col_name = self.main.datasets[self.main.current_dataset_index].data.columns[self.dataset_column_index]
-        
         if (self.main.datasets[self.main.current_dataset_index].dtype[self.dataset_column_index]==DataType.INTEGER):
 
-            self.main.baction_num_clamp_int(self.main.current_dataset_index, self.dataset_column_index, float(int(self.v_num_clamplo.text())), int(self.v_num_clamphi.text()))
+            self.main.baction_num_clamp_int(self.main.current_dataset_index, self.dataset_column_index)
 
         else:
 
-            self.main.baction_num_clamp_float(self.main.current_dataset_index, self.dataset_column_index, float(int(self.v_num_clamplo.text())), float(self.v_num_clamphi.text()))
+            self.main.baction_num_clamp_float(self.main.current_dataset_index, self.dataset_column_index)
     
     def num_type_offset(self):
-        col_name = self.main.datasets[self.main.current_dataset_index].data.columns[self.dataset_column_index]
-
-        col_name = self.main.datasets[self.main.current_dataset_index].data.columns[self.dataset_column_index] #name of the data column
-        col_data = self.main.datasets[self.main.current_dataset_index].data[col_name].astype(int) #the actual data series
-
         if (self.main.datasets[self.main.current_dataset_index].dtype[self.dataset_column_index]==DataType.INTEGER):
-            
 
-            self.main.baction_num_operate_int(self.main.current_dataset_index, self.dataset_column_index, col_data, NumericOperation.ADDITION, int(self.v_num_offset.text()))
+            self.main.baction_num_operate_int(self.main.current_dataset_index, self.dataset_column_index, NumericOperation.ADDITION, float(self.v_num_offset.text())) #whole numbers keep the column INTEGER
 
         else:
 
-            self.main.baction_num_operate_float(self.main.current_dataset_index, self.dataset_column_index, col_data, NumericOperation.ADDITION, float(self.v_num_offset.text()))
+            self.main.baction_num_operate_float(self.main.current_dataset_index, self.dataset_column_index, NumericOperation.ADDITION, float(self.v_num_offset.text()))
         
        
 
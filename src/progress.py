@@ -0,0 +1,57 @@
+"""
+File: progress.py
+Author: Alex Mees
+Date: 2025-03-13
+Description: Progress report and cancellation of data set loading
+License: MIT
+"""
+# Standard library imports
+import threading
+
+
+class LoadCancelled(Exception):
+    "Raised by a reader between two chunks when its load was cancelled."
+
+
+class LoadProgress:
+    """
+    Progress of a data set being loaded: bytes read and rows parsed so far, with a cancellation flag.
+    Readers call step() after each chunk, the callback (if any) is called from the reading thread.
+    """
+    def __init__(self, total_bytes: int=0, callback=None):
+        self.total_bytes = total_bytes #0 if unknown (compressed files, databases)
+        self.bytes_read = 0 #decoded text for tabulated and JSON files, so it can pass total_bytes for non ASCII data
+        self.rows = 0
+        self.warnings = [] #non fatal messages to show once loading is over
+        self._callback = callback
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def step(self, rows: int=0, bytes_read: int=0):
+        """
+        Add a parsed chunk to the progress and report it.
+        Args:
+        [int] = rows parsed in the chunk
+        [int] = bytes read for the chunk
+        """
+        if (self.cancelled):
+            raise LoadCancelled("Loading cancelled.")
+        self.rows += rows
+        self.bytes_read += bytes_read
+        if (self._callback):
+            self._callback(self)
+
+    def percent(self) -> int:
+        """
+        Return:
+        [int] = percentage of the file read (None if the size is unknown)
+        """
+        if not (self.total_bytes):
+            return None
+        return min(100, self.bytes_read * 100 // self.total_bytes)
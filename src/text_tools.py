@@ -0,0 +1,506 @@
+"""
+File: text_tools.py
+Author: Alex Mees
+Date: 2025-03-13
+Description: Compiled matchers and counters for string operations over whole columns
+License: MIT
+"""
+# Standard library imports
+import re
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+from typing import Tuple
+
+# Third-party imports
+import pandas as pd
+import numpy as np
+
+# Local application imports
+from . import constants
+
+
+def _trie_pattern(node: dict) -> str:
+    """
+    Regex of a trie of regex tokens, words sharing a prefix share its part of the pattern. The key '' marks the end of a word.
+    Optional endings are greedy, so the longest word is matched.
+    """
+    alternatives = [token + _trie_pattern(child) for token, child in node.items() if token!='']
+    if not (alternatives):
+        return ''
+    if ('' in node):
+        return f'(?:{"|".join(alternatives)})?'
+    return alternatives[0] if (len(alternatives)==1) else f'(?:{"|".join(alternatives)})'
+
+
+class BlockedWordMatcher:
+    """
+    All the blocked words and their bypass variants (ex: 'b@d w0rd') compiled in a single case insensitive pattern.
+    Each letter of a word matches itself or any of its bypasses (see constants.COMMON_BLOCKED_WORD_BYPASSES), so variants are
+    never listed one by one, and the words are merged in a trie so the pattern cost doesn't grow with the number of words.
+    """
+    def __init__(self, words, bypasses: list[list[str]]=constants.COMMON_BLOCKED_WORD_BYPASSES):
+        swaps: dict[str, list[str]] = {}
+        for letter, bypass in bypasses:
+            swaps.setdefault(letter.lower(), []).append(bypass)
+        trie = {}
+        for word in words:
+            if not (word):
+                continue
+            node = trie
+            for char in word.lower():
+                options = [re.escape(option) for option in [char] + swaps.get(char, [])]
+                token = options[0] if (len(options)==1) else f'(?:{"|".join(options)})'
+                node = node.setdefault(token, {})
+            node[''] = {}
+        pattern = _trie_pattern(trie)
+        self.pattern = re.compile(pattern, re.IGNORECASE) if (pattern) else None #None if there are no words
+
+    def mask_text(self, text: str) -> str:
+        """
+        Return:
+        [str] = the text with every blocked word replaced by '*' of the same length
+        """
+        if (self.pattern is None):
+            return text
+        return self.pattern.sub(lambda match: '*' * len(match.group()), text)
+
+    def mask(self, values: pd.Series) -> pd.Series:
+        """
+        Mask every blocked word of a Series of strings, in a single pass per value. Missing values are kept.
+        """
+        if (self.pattern is None):
+            return values
+        return values.str.replace(self.pattern, lambda match: '*' * len(match.group()), regex=True)
+
+
+def fold_accents(text: str) -> str:
+    """
+    Remove accents and other combining marks, ex: 'Brasília' => 'Brasilia'.
+    """
+    return unicodedata.normalize('NFC', ''.join(char for char in unicodedata.normalize('NFKD', text) if not unicodedata.combining(char)))
+
+
+class StringPipeline:
+    """
+    Queue of string cleaning steps compiled into a single function, so a column is cleaned in one pass per (distinct) value
+    and written once. Steps are added by chaining, ex: StringPipeline().trim().collapse_spaces().capitalization('each').
+    """
+    CAPITALIZATION_RULES = {'all': str.upper, 'each': str.title, 'first': str.capitalize, 'lowercase': str.lower, 'invert': str.swapcase} #same options as TableFormat.capitalization_rule
+    TRIM_RULES = {'trailing': str.rstrip, 'leading': str.lstrip, 'both': str.strip} #same options as TableFormat.remove_whitespace
+    DOUBLE_SPACES = re.compile(r'\s{2,}')
+
+    def __init__(self, on_commit=None):
+        self.steps: list[tuple] = [] #(step name, argument)
+        self.on_commit = on_commit #function applying the pipeline to its column (see TableFormat.string_pipeline)
+
+    def trim(self, option: str='both') -> 'StringPipeline':
+        if (option not in self.TRIM_RULES):
+            raise ValueError(f"Not a valid trim option: {option}")
+        self.steps.append(('trim', option))
+        return self
+
+    def collapse_spaces(self) -> 'StringPipeline':
+        self.steps.append(('collapse_spaces', None))
+        return self
+
+    def capitalization(self, option: str='all') -> 'StringPipeline':
+        if (option not in self.CAPITALIZATION_RULES):
+            raise ValueError(f"Not a valid capitalization option: {option}")
+        self.steps.append(('capitalization', option))
+        return self
+
+    def normalize(self, form: str='NFKC', accents: bool=False) -> 'StringPipeline':
+        """
+        Unicode normalization (NFC, NFKC, NFD, NFKD), with accent folding if accents is True.
+        """
+        self.steps.append(('normalize', (form, accents)))
+        return self
+
+    def blocked_words(self, words) -> 'StringPipeline':
+        self.steps.append(('blocked_words', tuple(words)))
+        return self
+
+    def compile(self):
+        """
+        Return:
+        function = the whole pipeline as a function of one string
+        """
+        functions = []
+        for step, argument in self.steps:
+            match step:
+                case 'trim':
+                    functions.append(self.TRIM_RULES[argument])
+                case 'collapse_spaces':
+                    functions.append(lambda text: self.DOUBLE_SPACES.sub(' ', text))
+                case 'capitalization':
+                    functions.append(self.CAPITALIZATION_RULES[argument])
+                case 'normalize':
+                    form, accents = argument
+                    functions.append(lambda text, form=form: unicodedata.normalize(form, text))
+                    if (accents):
+                        functions.append(fold_accents)
+                case 'blocked_words':
+                    functions.append(blocked_word_matcher(argument).mask_text)
+        def run(text: str) -> str:
+            for function in functions:
+                text = function(text)
+            return text
+        return run
+
+    def apply(self, values: pd.Series) -> pd.Series:
+        """
+        Run the compiled pipeline once per value. Missing values are kept.
+        """
+        run = self.compile()
+        return pd.Series([run(text) if isinstance(text, str) else text for text in values], index=values.index, dtype=object)
+
+    def commit(self):
+        """
+        Apply the pipeline to its column (see TableFormat.string_pipeline) and clear the queued steps.
+        """
+        result = self.on_commit(self)
+        self.steps = []
+        return result
+
+@lru_cache(maxsize=8)
+def _cached_matcher(words: tuple[str]) -> BlockedWordMatcher:
+    return BlockedWordMatcher(words)
+
+def blocked_word_matcher(words) -> BlockedWordMatcher:
+    """
+    The compiled matcher of a blocked word list, built once per list.
+    """
+    return _cached_matcher(tuple(sorted(set(words))))
+
+
+class DictionaryReplacer:
+    """
+    Replace the variants of dictionary terms (ex: 'docter', 'dr.') by their canonical term (ex: 'Doctor') in a single tokenized pass.
+    Variants are kept in a hash map, so the cost per word doesn't grow with the size of the dictionary. Variants of several words are
+    matched on whole words, the longest first. Whitespace between words is kept.
+    """
+    def __init__(self, dictionary: dict[str, list[str]]):
+        self.variants: dict[str, str] = {} #lower case variant (words joined by one space): canonical term
+        self.max_words = 1 #words in the longest variant
+        for canonical, variants in dictionary.items():
+            for variant in variants:
+                words = variant.lower().split()
+                if (words):
+                    self.variants[' '.join(words)] = canonical
+                    self.max_words = max(self.max_words, len(words))
+
+    def replace_text(self, text: str) -> Tuple [str, list[str]]:
+        """
+        Return:
+        [str] = the text with every variant replaced
+        list[str] = the canonical term of each replacement
+        """
+        parts = re.split(r'(\s+)', text) #words at even positions, whitespace at odd ones
+        words = parts[0::2]
+        lowered = [word.lower() for word in words]
+        replaced = []
+        output = []
+        i = 0
+        while (i < len(words)):
+            for length in range(min(self.max_words, len(words) - i), 0, -1):
+                canonical = self.variants.get(' '.join(lowered[i:i + length]))
+                if (canonical is not None):
+                    output.append(canonical)
+                    replaced.append(canonical)
+                    i += length
+                    break
+            else:
+                output.append(words[i])
+                i += 1
+            if (i < len(words)):
+                output.append(parts[2 * i - 1]) #whitespace before the next word
+        return ''.join(output), replaced
+
+    def replace(self, values: pd.Series, weights: np.ndarray=None) -> Tuple [pd.Series, Counter]:
+        """
+        Replace the variants of a Series of strings. Missing values are kept.
+        Args:
+        [pd.Series] = the strings
+        [np.ndarray] = number of rows each value stands for (default: 1 each)
+        Return:
+        [pd.Series] = the replaced strings
+        [Counter] = number of replacements per canonical term
+        """
+        counts = Counter()
+        results = []
+        for position, text in enumerate(values):
+            if not (isinstance(text, str)):
+                results.append(text)
+                continue
+            text, replaced = self.replace_text(text)
+            results.append(text)
+            weight = 1 if (weights is None) else int(weights[position])
+            for canonical in replaced:
+                counts[canonical] += weight
+        return pd.Series(results, index=values.index, dtype=object), counts
+
+
+@lru_cache(maxsize=8)
+def _cached_replacer(dictionary: tuple) -> DictionaryReplacer:
+    return DictionaryReplacer({canonical: list(variants) for canonical, variants in dictionary})
+
+def dictionary_replacer(dictionary: dict[str, list[str]]) -> DictionaryReplacer:
+    """
+    The hash map of a dictionary, built once per dictionary.
+    """
+    return _cached_replacer(tuple((canonical, tuple(variants)) for canonical, variants in dictionary.items()))
+
+
+class CountMinSketch:
+    """
+    Approximate counts of a stream of values in fixed memory (depth x width counters). Counts are never under estimated.
+    """
+    def __init__(self, width: int=constants.SKETCH_WIDTH, depth: int=constants.SKETCH_DEPTH):
+        self.width = width
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.hash_keys = [f'guapo-sketch-{row:03d}' for row in range(depth)] #16 characters, one hash function per row
+
+    def _columns(self, values: pd.Series) -> list[np.ndarray]:
+        return [(pd.util.hash_pandas_object(values, index=False, hash_key=key).to_numpy() % np.uint64(self.width)).astype(np.int64) for key in self.hash_keys]
+
+    def add(self, values: pd.Series, counts: np.ndarray):
+        """
+        Add the counts of distinct values (vectorized).
+        """
+        for row, columns in enumerate(self._columns(values)):
+            self.table[row] += np.bincount(columns, weights=counts, minlength=self.width).astype(np.int64)
+
+    def estimate(self, values: pd.Series) -> np.ndarray:
+        """
+        Return:
+        [np.ndarray] = the estimated count of each value
+        """
+        return np.min([self.table[row][columns] for row, columns in enumerate(self._columns(values))], axis=0)
+
+
+class FrequencyCounter:
+    """
+    Frequencies of values counted a chunk at a time. Counts are exact until more than max_distinct values were seen,
+    then they move to a count-min sketch and only the top k candidates are kept, so memory stays bounded.
+    """
+    def __init__(self, top_k: int=constants.STRING_STATISTICS_TOP_K, max_distinct: int=constants.STRING_STATISTICS_MAX_DISTINCT):
+        self.top_k = top_k
+        self.max_distinct = max_distinct
+        self.counts = pd.Series(dtype=np.int64) #exact counts, or the top k candidates once approximate
+        self.sketch: CountMinSketch = None #None while counts are exact
+
+    @property
+    def approximate(self) -> bool:
+        return self.sketch is not None
+
+    def add(self, counts: pd.Series):
+        """
+        Add the counts of a chunk (index = distinct values, ex: from value_counts).
+        """
+        if (len(counts)==0):
+            return
+        if not (self.approximate):
+            self.counts = self.counts.add(counts, fill_value=0).astype(np.int64)
+            if (len(self.counts) > self.max_distinct): #switch to the sketch
+                self.sketch = CountMinSketch()
+                self.sketch.add(pd.Series(self.counts.index, dtype=object), self.counts.to_numpy())
+                self.counts = self.counts.nlargest(self.top_k)
+            return
+        self.sketch.add(pd.Series(counts.index, dtype=object), counts.to_numpy())
+        candidates = pd.Series(self.counts.index.union(counts.nlargest(self.top_k).index), dtype=object)
+        self.counts = pd.Series(self.sketch.estimate(candidates), index=candidates.to_numpy()).nlargest(self.top_k)
+
+    def top(self) -> list[tuple]:
+        """
+        Return:
+        list[tuple] = the top k (value, count) pairs, most frequent first
+        """
+        return list(self.counts.nlargest(self.top_k).items())
+
+    def distinct(self) -> int:
+        """
+        Return:
+        [int] = the number of distinct values (None if counts are approximate)
+        """
+        return None if (self.approximate) else len(self.counts)
+
+
+def normalize_keys(values: pd.Series) -> pd.Series:
+    """
+    Lower case keys without whitespace, punctuation or accents, so 'Argen  tina' and 'argentina.' get the same key. Missing values become ''.
+    A '-' before a digit and a '.' between digits are kept, so '-15', '15' and '1.5' keep different keys.
+    """
+    values = values.astype(object)
+    return (values.where(values.notna(), '').astype(str).str.normalize('NFKD').str.encode('ascii', 'ignore').str.decode('ascii')
+            .str.lower().str.replace(r'(?!-(?=\d)|(?<=\d)\.(?=\d))[\W_]', '', regex=True))
+
+
+def connected_labels(size: int, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """
+    Label the connected components of a graph given by its edges (vectorized min label propagation).
+    Return:
+    [np.ndarray] = the smallest node of the component of each node
+    """
+    labels = np.arange(size)
+    while (len(left)):
+        smallest = np.minimum(labels[left], labels[right])
+        updated = labels.copy()
+        np.minimum.at(updated, left, smallest)
+        np.minimum.at(updated, right, smallest)
+        updated = updated[updated] #jump to the label of the label
+        if (np.array_equal(updated, labels)):
+            break
+        labels = updated
+    return labels
+
+
+class MinHashLSH:
+    """
+    Groups of near duplicate keys in sub-quadratic time. Each key gets a MinHash signature of its character shingles, signatures are cut in bands
+    and keys sharing a band are compared (to the first key of the bucket only), so the work grows with the number of keys, not with pairs of keys.
+    The signatures only pick the candidate pairs: a pair is grouped when the exact Jaccard similarity of its shingle sets reaches the threshold.
+    """
+    def __init__(self, threshold: float=constants.NEAR_DUPLICATE_THRESHOLD, bands: int=constants.MINHASH_BANDS, rows: int=constants.MINHASH_ROWS,
+                 shingle_size: int=constants.SHINGLE_SIZE):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(0)
+        self.multipliers = rng.integers(1, 2**63, bands * rows, dtype=np.uint64) | np.uint64(1) #odd, one hash function per signature value
+        self.offsets = rng.integers(0, 2**63, bands * rows, dtype=np.uint64)
+
+    def shingles(self, keys: pd.Series) -> pd.Series:
+        """
+        Return:
+        [pd.Series] = list of the character shingles of each key (keys shorter than a shingle are one shingle)
+        """
+        size = self.shingle_size
+        return keys.map(lambda key: [key[i:i + size] for i in range(max(1, len(key) - size + 1))])
+
+    def signatures(self, keys: pd.Series, shingles: pd.Series=None) -> np.ndarray:
+        """
+        Return:
+        [np.ndarray] = MinHash signature of each key (keys x bands*rows)
+        """
+        if (shingles is None):
+            shingles = self.shingles(keys)
+        owners = np.repeat(np.arange(len(keys)), shingles.str.len().to_numpy())
+        hashes = pd.util.hash_pandas_object(pd.Series(shingles.explode().to_numpy(), dtype=object), index=False).to_numpy()
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(owners)) + 1)) #every key has at least one shingle
+        signature = np.empty((len(keys), len(self.multipliers)), dtype=np.uint64)
+        with np.errstate(over='ignore'): #hashes wrap around
+            for column, (multiplier, offset) in enumerate(zip(self.multipliers, self.offsets)):
+                signature[:, column] = np.minimum.reduceat(hashes * multiplier + offset, starts)
+        return signature
+
+    def group_labels(self, keys: pd.Series) -> np.ndarray:
+        """
+        Args:
+        [pd.Series] = distinct keys (ex: from normalize_keys)
+        Return:
+        [np.ndarray] = group label of each key (the position of the first key of its group)
+        """
+        if (len(keys) < 2):
+            return np.arange(len(keys))
+        keys = keys.reset_index(drop=True)
+        shingles = self.shingles(keys)
+        signature = self.signatures(keys, shingles)
+        left, right = [], []
+        positions = np.arange(len(keys))
+        for band in range(self.bands):
+            band_key = np.zeros(len(keys), dtype=np.uint64)
+            with np.errstate(over='ignore'):
+                for column in range(band * self.rows, (band + 1) * self.rows):
+                    band_key = band_key * np.uint64(0x100000001B3) + signature[:, column] #combine the band values in one bucket key
+            buckets, _ = pd.factorize(band_key)
+            _, first_positions = np.unique(buckets, return_index=True) #codes follow the order of first appearance
+            first = first_positions[buckets]
+            candidates = positions[first!=positions]
+            left.append(candidates)
+            right.append(first[candidates])
+        pairs = np.unique(np.stack([np.concatenate(left), np.concatenate(right)], axis=1), axis=0) #a pair can share several bands
+        sets = [set(key_shingles) for key_shingles in shingles]
+        similarity = np.fromiter((len(sets[a] & sets[b]) / len(sets[a] | sets[b]) for a, b in pairs), dtype=np.float64, count=len(pairs)) #exact Jaccard similarity
+        matched = pairs[similarity >= self.threshold]
+        return connected_labels(len(keys), matched[:, 0], matched[:, 1])
+
+
+class NGramIndex:
+    """
+    Inverted n-gram index of a text column for case insensitive substring search. Distinct values are indexed once: each n-gram has a sorted
+    posting list of the distinct values holding it, and a query intersects the lists of its n-grams before checking the few candidates left.
+    When the column is rewritten, only the new distinct values are indexed (in a delta index), until a full rebuild pays off.
+    """
+    def __init__(self, col_data: pd.Series, n: int=constants.NGRAM_SIZE):
+        self.n = n
+        self.build(col_data)
+
+    def _ngrams(self, text: str) -> set[str]:
+        return {text[i:i + self.n] for i in range(len(text) - self.n + 1)}
+
+    def build(self, col_data: pd.Series):
+        """
+        Index a column from scratch.
+        """
+        self.codes, distinct = pd.factorize(col_data.astype(object)) #distinct value of each row, -1 for missing values
+        self.distinct = pd.Index(distinct, dtype=object)
+        self.lowered = pd.Series(self.distinct, dtype=object).astype(str).str.lower()
+        grams = self.lowered.map(lambda text: list(self._ngrams(text))).explode().dropna() #index = distinct value id
+        gram_ids, grams_index = pd.factorize(grams.to_numpy())
+        order = np.lexsort((grams.index.to_numpy(), gram_ids))
+        self.grams = pd.Index(grams_index, dtype=object)
+        self.postings = grams.index.to_numpy()[order].astype(np.int64) #distinct value ids, grouped by n-gram and sorted
+        self.offsets = np.searchsorted(gram_ids[order], np.arange(len(self.grams) + 1))
+        self.base_size = len(self.distinct) #ids from base_size on are in the delta index
+        self.delta: dict[str, list[int]] = {}
+
+    def update(self, col_data: pd.Series):
+        """
+        Follow a rewrite of the indexed column: rows are mapped to their distinct values again and only new values are indexed.
+        Values no longer in the column stay indexed, a search simply finds no rows for them.
+        """
+        codes = self.distinct.get_indexer(col_data.astype(object))
+        unknown = (codes==-1) & col_data.notna().to_numpy()
+        new_values = pd.Index(pd.unique(col_data[unknown].astype(object)), dtype=object)
+        if (len(self.distinct) + len(new_values) - self.base_size > self.base_size * constants.NGRAM_INDEX_MAX_DELTA_SHARE):
+            self.build(col_data)
+            return
+        if (len(new_values)):
+            first_id = len(self.distinct)
+            self.distinct = self.distinct.append(new_values)
+            lowered = pd.Series(new_values, dtype=object).astype(str).str.lower()
+            self.lowered = pd.concat([self.lowered, lowered], ignore_index=True)
+            for offset, text in enumerate(lowered):
+                for gram in self._ngrams(text):
+                    self.delta.setdefault(gram, []).append(first_id + offset)
+            codes[unknown] = first_id + new_values.get_indexer(col_data[unknown].astype(object))
+        self.codes = codes
+
+    def _posting(self, gram: str) -> np.ndarray:
+        position = self.grams.get_indexer([gram])[0]
+        base = self.postings[self.offsets[position]:self.offsets[position + 1]] if (position >= 0) else np.empty(0, dtype=np.int64)
+        delta = self.delta.get(gram)
+        return base if (delta is None) else np.concatenate((base, np.array(delta, dtype=np.int64)))
+
+    def search(self, query: str) -> np.ndarray:
+        """
+        Return:
+        [np.ndarray] = positions of the rows containing the query (case insensitive)
+        """
+        query = query.lower()
+        grams = self._ngrams(query)
+        if (grams):
+            postings = sorted((self._posting(gram) for gram in grams), key=len) #intersect the shortest lists first
+            candidates = postings[0]
+            for posting in postings[1:]:
+                if not (len(candidates)):
+                    break
+                candidates = np.intersect1d(candidates, posting, assume_unique=True)
+        else: #queries shorter than an n-gram check every distinct value
+            candidates = np.arange(len(self.distinct))
+        matched = candidates[self.lowered.iloc[candidates].str.contains(query, regex=False).to_numpy(dtype=bool)] #n-grams can match out of order
+        found = np.zeros(len(self.distinct) + 1, dtype=bool) #last entry for missing values (code -1)
+        found[matched] = True
+        return np.flatnonzero(found[self.codes])
@@ -7,18 +7,123 @@ License: MIT
 """
 # Standard library imports
 import math
+import os
 from typing import Tuple
 import re
+import io
+import csv
+import codecs
+import warnings
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
 
 
 # Third-party imports
 import pandas as pd
+import numpy as np
+try: #optional, used by the 'pyarrow' parser engine
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
 
 # Local application imports
 from . import constants
-from .data_format import DataType
+from .data_format import DataType, DataFormats
+from .progress import LoadProgress, LoadCancelled
 
+_DATE_PATTERNS = {name: re.compile(pattern, re.IGNORECASE) for name, pattern in constants.DATE_PATTERNS.items()} #compiled once (see Wrangler.check_type_date)
+
+
+def _read_byte_range(file_path: str, start: int, end: int, encoding='utf-8') -> list[str]:
+    """
+    Read the lines of a newline aligned byte range of a file.
+    """
+    with open(file_path, "rb") as file:
+        file.seek(start)
+        lines = file.read(end - start).decode(encoding).split('\n')
+    if (lines[-1]==''):
+        lines.pop()
+    return lines
+
+
+def _parse_byte_range(file_path: str, start: int, end: int, delimiter: str, data_types: list[DataType], engine='python', report: list[dict]=None, encoding='utf-8') -> Tuple [list, list[DataType], list[dict], list]:
+    """
+    Parse a newline aligned byte range of a tabulated file (runs inside a worker process, so it must stay a module level function).
+    Args:
+    [str] = full file path
+    [int] = first byte of the range (start of a line)
+    [int] = end of the range (exclusive, start of a line or end of file)
+    [str] = the delimiter
+    list[DataType] = the data type for each column
+    [str] = parser engine (see Wrangler.split_tabulated)
+    list[dict] = type report of each column (see Wrangler.infer_tabulated_report), counts are made for this range only
+    [str] = text encoding (must be ASCII compatible, see constants.ASCII_COMPATIBLE_ENCODINGS)
+    Return:
+    [list] = one typed array per column
+    list[DataType] = the data types after any demotion
+    list[dict] = the type report with the counts of this range (None if no report was given)
+    list[ReservoirSampler] = uniform sample of the raw values of each column in this range
+    """
+    lines = _read_byte_range(file_path, start, end, encoding)
+    col_count = len(data_types)
+    df = Wrangler.split_tabulated(lines, delimiter, col_count, engine)
+    del lines
+    if (report):
+        report = [dict(entry, non_conforming=0, missing=0) for entry in report]
+    samplers = [ReservoirSampler(seed=start + index) for index in range(col_count)]
+    for index, sampler in enumerate(samplers):
+        sampler.add(df.iloc[:, index].to_numpy(dtype=object))
+    df, data_types = Wrangler.cast_tabulated_chunk(df, data_types, report)
+    return [df.iloc[:, index].to_numpy() for index in range(col_count)], data_types, report, samplers
+
+
+class ReservoirSampler:
+    """
+    Uniform random sample of fixed size over a stream of values (reservoir sampling), fed one chunk at a time.
+    Every value read so far has the same chance of being in the sample, without knowing the stream length in advance.
+    """
+    def __init__(self, size: int=constants.TYPE_INFERENCE_SAMPLE_SIZE, seed: int=0):
+        self.size = size
+        self.seen = 0 #number of values offered so far
+        self.sample = np.empty(0, dtype=object)
+        self._rng = np.random.default_rng(seed)
+
+    def add(self, values: np.ndarray):
+        """
+        Offer a chunk of values: the i-th value of the stream replaces a random slot with probability size/i.
+        """
+        values = np.asarray(values, dtype=object)
+        free = self.size - len(self.sample)
+        if (free > 0): #fill the reservoir first
+            self.sample = np.concatenate([self.sample, values[:free]])
+            self.seen += min(free, len(values))
+            values = values[free:]
+        if (len(values)==0):
+            return
+        positions = self.seen + np.arange(1, len(values)+1, dtype=np.float64) #position of each value in the stream
+        accepted = self._rng.random(len(values)) < self.size / positions
+        self.sample[self._rng.integers(0, self.size, int(accepted.sum()))] = values[accepted]
+        self.seen += len(values)
+
+    def merge(self, other: 'ReservoirSampler'):
+        """
+        Combine with the sample of another part of the stream, each part weighted by the number of values it saw.
+        """
+        total = self.seen + other.seen
+        if (other.seen==0):
+            return
+        if (self.seen==0):
+            self.sample, self.seen = other.sample.copy(), other.seen
+            return
+        taken = min(len(self.sample), self._rng.binomial(self.size, self.seen / total))
+        taken_other = min(len(other.sample), self.size - taken)
+        self.sample = np.concatenate([self._rng.choice(self.sample, taken, replace=False),
+                                      self._rng.choice(other.sample, taken_other, replace=False)])
+        self.seen = total
+
+    def values(self) -> pd.Series:
+        return pd.Series(self.sample, dtype=object)
 
     
 
@@ -26,87 +131,817 @@ class Wrangler:
     @staticmethod
     def header_comprehension(header, sample_data, delimiter) -> Tuple [list, str, str]: #the headers, the string for the delimiter, possible errors
         
-        if not delimiter==None: #if user tells the delimiter to use, use it. If not, try to guess it.
-            header_list = header.split(delimiter)
+        if (delimiter is not None): #if user tells the delimiter to use, use it. If not, try to guess it.
+            header_list = header.split(delimiter) if (delimiter) else header #'' means a single column
             return header_list, delimiter, None
 
-        else: #do pattern matching to understand what is the delimiter.
-            common_delimiters =  constants.COMMON_DELIMITERS
-            sample_delimiter_count = [] #counting number of occurences for delimiters
-            
-            for delimiter in common_delimiters: #iterate delimiter and try to find the number of them
-                del_count = 0
-                for line in sample_data:
-                    del_count =+ line.count(delimiter)
-                sample_delimiter_count.append(del_count)
-            
-            max_finds = max(sample_delimiter_count) #the maximum number of delimiter occurences
-            top_candidates = [index for index, num in enumerate(sample_delimiter_count) if num == max_finds] #find all possible index of possible delimiters from list of maximum delimiters
-
-            if len(top_candidates)==1: #if I only have 1 candidate for top delimiter, use that. If not, iterate through all columns and decide if split size is consistent.
-                found_delimiter = common_delimiters[top_candidates[0]]
+        else: #score the delimiters by how consistent the column count is across the sample lines
+            found_delimiter, _ = Wrangler.sniff_delimiter(sample_data)
+            if (found_delimiter):
                 header_list = header.split(found_delimiter)
                 return header_list, found_delimiter, None
+            else: #no proper delimiter found, using single column until user define a delimiter
+                return header,'',None
+
+    @staticmethod
+    def sniff_tabulated(head: bytes, truncated: bool=False) -> Tuple [str, bool, str, str]: #the delimiter, has_header, encoding, possible errors
+        """
+        Detect the encoding, delimiter and header of a tabulated file from a fixed size block of its head (see Fetcher.read_head),
+        so the cost is the same whatever the file size.
+        Args:
+        [bytes] = the head of the file
+        [bool] = if the file goes on after the head (its last line is then incomplete and ignored)
+        Return:
+        [str] = the delimiter ('' for a single column)
+        [bool] = if the first line is a header
+        [str] = the encoding
+        [str] = error string (None if OK)
+        """
+        if not (head):
+            return None, True, None, "Empty file."
+        encoding = Wrangler.detect_encoding(head)
+        text = codecs.getincrementaldecoder(encoding)(errors='replace').decode(head, final=not (truncated))
+        lines = io.StringIO(text).readlines()
+        if (truncated and len(lines)>1):
+            lines.pop() #cut by the byte budget
+        delimiter, _ = Wrangler.sniff_delimiter(lines)
+        if (delimiter):
+            rows = [row for row in csv.reader(lines, delimiter=delimiter) if row]
+        else:
+            rows = [[line.rstrip('\r\n')] for line in lines if line.strip()]
+        return delimiter, Wrangler.sniff_header(rows), encoding, None
+
+    @staticmethod
+    def detect_encoding(head: bytes) -> str:
+        """
+        Find the encoding of a block of bytes: from its byte order mark if any, else the first candidate that decodes it
+        (see constants.ENCODING_CANDIDATES). A multi byte character cut at the end of the block is not an error.
+        """
+        for bom, encoding in ((codecs.BOM_UTF32_LE, 'utf-32'), (codecs.BOM_UTF32_BE, 'utf-32'), (codecs.BOM_UTF8, 'utf-8-sig'),
+                              (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16')): #UTF-32 first, its LE mark starts like UTF-16's
+            if (head.startswith(bom)):
+                return encoding
+        for encoding in constants.ENCODING_CANDIDATES:
+            try:
+                codecs.getincrementaldecoder(encoding)().decode(head, final=False)
+                return encoding
+            except UnicodeDecodeError:
+                continue
+        return 'latin-1'
+
+    @staticmethod
+    def sniff_delimiter(lines: list[str]) -> Tuple [str, float]:
+        """
+        Find the delimiter that splits the lines in the most consistent number of columns (at least 2).
+        Delimiters inside quoted fields are ignored and quoted line breaks are kept within their field.
+        Ties go to the first delimiter in constants.COMMON_DELIMITERS.
+        Args:
+        list[str] = sample lines
+        Return:
+        [str] = the delimiter ('' if no delimiter gives 2 or more columns)
+        [float] = share of the lines that have the most common column count
+        """
+        found_delimiter, best_consistency = '', 0.0
+        for delimiter in constants.COMMON_DELIMITERS:
+            if not any(delimiter in line for line in lines):
+                continue
+            try:
+                counts = [len(fields) for fields in csv.reader(lines, delimiter=delimiter) if fields]
+            except csv.Error:
+                continue
+            if not (counts):
+                continue
+            values, frequencies = np.unique(counts, return_counts=True)
+            if (values[frequencies.argmax()] < 2):
+                continue
+            consistency = frequencies.max() / len(counts)
+            if (consistency > best_consistency):
+                found_delimiter, best_consistency = delimiter, consistency
+        return found_delimiter, best_consistency
+
+    @staticmethod
+    def sniff_header(rows: list[list[str]]) -> bool:
+        """
+        Guess if the first row is a header. Each column votes: a column of numbers, dates or booleans votes for a header if its first
+        value doesn't fit that type and against it if it does. A text column votes against it if its first value is repeated below.
+        Without any vote the first row is taken as a header.
+        """
+        if (len(rows)<2):
+            return True
+        first_row, data_rows = rows[0], rows[1:]
+        votes = 0
+        for index, label in enumerate(first_row):
+            column = pd.Series([row[index] if index < len(row) else None for row in data_rows], dtype=object)
+            data_type, _, data_format = Wrangler.infer_column_type(column)
+            label_series = pd.Series([label], dtype=object)
+            if (data_type==DataType.TEXT):
+                if (label.strip() and (column.str.strip()==label.strip()).any()):
+                    votes -= 1
+                continue
+            if (data_type in (DataType.INTEGER, DataType.FLOAT)):
+                fits = bool(Wrangler.numeric_masks(label_series)[2].iloc[0])
             else:
-                split_size = []
-                for candidate in top_candidates: #for each delimiter candidate, check column consistency
-                    delim = common_delimiters[candidate]
-                    col_count = 0
-                    for line in sample_data:
-                        if (sample_data[0].split(delim) != line.split(delim)):
-                            top_candidates.remove(candidate) #if any line split is different that first line split, remove from candidates
-               
-                if len(top_candidates)!=0: #if I only have 1 candidate for top delimiter, use that. If more than 1 found use first found (likely comma)
-                    found_delimiter = common_delimiters[top_candidates[0]]
-                    header_list = header.split(found_delimiter)
-                    return header_list, found_delimiter, None
-                else: #no proper delimiter found, using single column until user define a delimiter
-                    return header,'',None
-    
+                fits = bool(Wrangler.parse_typed_text(label_series, data_type, data_format)[1].iloc[0])
+            votes += -1 if (fits) else 1
+        return votes >= 0
+
+    @staticmethod
+    def _sample_lines(lines: list[str]) -> list[str]:
+        """
+        The first lines that fit in the sniffing budget (see constants.SNIFF_BYTE_BUDGET), at least 2.
+        """
+        total = 0
+        for count, line in enumerate(lines):
+            total += len(line)
+            if (total > constants.SNIFF_BYTE_BUDGET and count >= 2):
+                return lines[:count]
+        return lines
+
     @staticmethod
-    def break_tabulated(raw_data,delimiter,has_header=True,header=[]) -> Tuple [pd.DataFrame, list[DataType], str, bool, str]: #the converted data frame, the delimiter, has_header, possible errors
-        col_count = len(raw_data[0].split(delimiter)) #there could be a mistake in the header/first line making this number unreliable
+    def break_tabulated(raw_data,delimiter,has_header=True,header=[],engine='python') -> Tuple [pd.DataFrame, list[DataType], str, bool, str]: #the converted data frame, the delimiter, has_header, possible errors
+        col_count = len(header) if (has_header) else len(Wrangler.split_tabulated(raw_data[:1], delimiter, None, 'python').columns) #there could be a mistake in the header/first line making this number unreliable
 
         if (has_header):
             raw_data = raw_data[1:] #exclude first line if it has a header
         else:
-            header = list(range(1, col_count)) #create numeric headers if none available, doesn't have to exclude first line
+            header = list(range(1, col_count+1)) #create numeric headers if none available, doesn't have to exclude first line
         
-        data = []
-        for line in raw_data:
-            data.append(line.split(delimiter)) #split values into lists
+        df = Wrangler.split_tabulated(raw_data, delimiter, col_count, engine) #split values into a data frame of strings
+        df.columns = header #set the created headers
 
-        df = pd.DataFrame(data, columns=header) #create a Panda Data Frame with the data and the created headers
+        report = Wrangler.infer_tabulated_report(df)
+        df, data_types = Wrangler.cast_tabulated_chunk(df, [entry['type'] for entry in report], report)
+        df.attrs['type_report'] = report
+        
+        #print (df.dtypes)
+        return df, data_types, delimiter, has_header, None
 
-        data_types = [DataType.TEXT] * col_count #initialize a list with all data types da TEXT
+    @staticmethod
+    def resolve_engine(engine: str) -> str:
+        """
+        Get the parser engine that will actually be used.
+        'auto' picks the fastest one installed, an engine that isn't installed falls back to 'python'.
+        """
+        if (engine=='auto'):
+            return 'pyarrow' if (pa is not None) else 'pandas'
+        if (engine=='pyarrow' and pa is None):
+            return 'python'
+        if (engine not in constants.PARSER_ENGINES):
+            return 'python'
+        return engine
+
+    @staticmethod
+    def split_tabulated(lines: list[str], delimiter: str, col_count: int=None, engine='python') -> pd.DataFrame:
+        """
+        Split lines of tabulated text into a data frame of strings, with the selected parser engine.
+        Args:
+        list[str] = the lines (without header)
+        [str] = the delimiter
+        [int] = number of columns, extra fields are dropped and missing ones are empty (None = width of the widest line)
+        [str] = parser engine: 'python' (str.split), 'csv' (quote aware, standard library), 'pandas' (pandas C engine), 'pyarrow' or 'auto'
+                (the pandas and pyarrow engines hand chunks with malformed lines over to 'csv', no line is dropped)
+        Return:
+        [pd.DataFrame] = the values as strings, columns labeled 0..N-1
+        """
+        engine = Wrangler.resolve_engine(engine)
+        if not (delimiter) or not (lines): #single column files are always split by line
+            engine = 'python'
+
+        if (engine in ('pandas', 'pyarrow')):
+            text = '\n'.join(line.rstrip('\r\n') for line in lines) #lines may come with or without their line break
+
+        match engine:
+            case 'csv':
+                rows = list(csv.reader([line.rstrip('\r\n') for line in lines], delimiter=delimiter))
+                df = pd.DataFrame(rows)
+            case 'pandas':
+                try:
+                    with warnings.catch_warnings(): #index_col=False cuts the extra fields of long lines, with a warning
+                        warnings.simplefilter('ignore', pd.errors.ParserWarning)
+                        df = pd.read_csv(io.StringIO(text), sep=delimiter, header=None, dtype=str, keep_default_na=False, engine='c',
+                                         skip_blank_lines=False, names=range(col_count) if col_count else None, index_col=False, on_bad_lines='error')
+                except pd.errors.ParserError: #malformed lines, split again by the standard library parser
+                    return Wrangler.split_tabulated(lines, delimiter, col_count, 'csv')
+                missing = df.isna() #fields missing from short lines
+                if (missing.to_numpy().any()):
+                    df = df.mask(missing, None)
+            case 'pyarrow':
+                names = [f'f{index}' for index in range(col_count)] if (col_count) else None
+                read_options = pa_csv.ReadOptions(column_names=names, autogenerate_column_names=not (col_count), block_size=constants.PYARROW_BLOCK_SIZE)
+                parse_options = pa_csv.ParseOptions(delimiter=delimiter, invalid_row_handler=lambda row: 'error')
+                convert_options = pa_csv.ConvertOptions(column_types={name: pa.string() for name in names or []},
+                                                        strings_can_be_null=False, quoted_strings_can_be_null=False)
+                try:
+                    table = pa_csv.read_csv(io.BytesIO((text + '\n').encode('utf-8')), read_options=read_options,
+                                            parse_options=parse_options, convert_options=convert_options)
+                except pa.ArrowInvalid: #lines with missing or extra fields, split again so they are padded or cut like in the other engines
+                    return Wrangler.split_tabulated(lines, delimiter, col_count, 'csv')
+                df = table.to_pandas()
+                df.columns = range(len(df.columns))
+            case _:
+                rows = Wrangler._split_lines(lines, delimiter)
+                if (col_count):
+                    rows = [row[:col_count] for row in rows]
+                df = pd.DataFrame(rows)
+
+        if (col_count):
+            if (len(df.columns) > col_count):
+                df = df.iloc[:, :col_count]
+            for index in range(len(df.columns), col_count): #lines shorter than the header
+                df[index] = None
+        return df
+
+    @staticmethod
+    def infer_tabulated_types(df: pd.DataFrame) -> list[DataType]:
+        """
+        Guess the data type of each column of a data frame of strings.
+        Args:
+        [pd.DataFrame] = data frame with the raw string values
+        Return:
+        list[DataType] = the guessed data type for each column
+        """
+        return [entry['type'] for entry in Wrangler.infer_tabulated_report(df)]
+
+    @staticmethod
+    def infer_tabulated_report(df: pd.DataFrame, sample_size: int=constants.TYPE_INFERENCE_SAMPLE_SIZE) -> list[dict]:
+        """
+        Guess the data type of each column of a data frame of strings from a stratified sample of the whole column.
+        Args:
+        [pd.DataFrame] = data frame with the raw string values
+        [int] = number of values sampled per column
+        Return:
+        list[dict] = for each column: 'type' (guessed DataType), 'confidence' (share of the sampled values that fit it),
+                     'format' (parsing format of DATE columns), 'non_conforming' and 'missing' (counts over the whole column, filled by cast_tabulated_chunk)
+        """
+        report = []
+        for col_name, col_data in df.items():
+            report.append(Wrangler.infer_column_report(Wrangler.stratified_sample(col_data, sample_size)))
+        return report
+
+    @staticmethod
+    def infer_column_report(sample: pd.Series) -> dict:
+        """
+        Type report of a column from a sample of its values (see infer_tabulated_report). DATE columns also get their parsing 'format'.
+        """
+        data_type, confidence, data_format = Wrangler.infer_column_type(sample)
+        return {'type': data_type, 'confidence': confidence, 'format': data_format, 'non_conforming': 0, 'missing': 0}
 
-        sample_size = min (constants.DATA_TYPE_SAMPLE_SIZE, df.size-1) #the amount of data to sample clamped by data lenght if shorter than
-        total_int_positives = 0
-        total_float_positives = 0
+    @staticmethod
+    def stratified_sample(col_data: pd.Series, sample_size: int=constants.TYPE_INFERENCE_SAMPLE_SIZE, strata: int=constants.TYPE_INFERENCE_STRATA) -> pd.Series:
+        """
+        Sample a column evenly along its length: it's cut in equal strata and the same number of random rows is taken from each one,
+        so sorted or grouped files are sampled from start to end. The sample is the same for the same column.
+        """
+        row_count = len(col_data)
+        if (row_count <= sample_size):
+            return col_data
+        strata = max(1, min(strata, sample_size))
+        rng = np.random.default_rng(row_count) #seeded, so reloading a file gives the same types
+        bounds = np.linspace(0, row_count, strata + 1).astype(np.int64)
+        per_stratum = sample_size // strata
+        positions = np.unique(np.concatenate([rng.integers(low, high, per_stratum) for low, high in zip(bounds[:-1], bounds[1:]) if high > low]))
+        return col_data.iloc[positions]
 
-        #Should try to autodetect integers, floats, dates => other should be opt-in at this moment.
+    @staticmethod
+    def numeric_masks(col_data: pd.Series) -> Tuple [pd.Series, pd.Series, pd.Series, pd.Series]:
+        """
+        Vectorized check of which strings of a column are missing, numbers and integers.
+        Return:
+        [pd.Series] = the float64 values (NaN for missing and non numeric values)
+        [pd.Series] = mask of missing values (None or a missing value marker)
+        [pd.Series] = mask of numbers
+        [pd.Series] = mask of integers (numbers without decimal part or exponent)
+        """
+        stripped, missing = Wrangler.missing_mask(col_data)
+        numbers = pd.to_numeric(stripped.mask(missing), errors='coerce').astype('float64')
+        is_number = numbers.notna()
+        is_integer = is_number & stripped.str.fullmatch(r'[+-]?\d+', na=False).astype(bool)
+        return numbers, missing, is_number, is_integer
 
-        for index, (col_name, col_data) in enumerate(df.items()):           
+    @staticmethod
+    def missing_mask(col_data: pd.Series) -> Tuple [pd.Series, pd.Series]:
+        """
+        Return:
+        [pd.Series] = the stripped strings
+        [pd.Series] = mask of missing values (None or a missing value marker, see constants.MISSING_VALUE_MARKERS)
+        """
+        stripped = col_data.str.strip()
+        return stripped, stripped.isna() | stripped.isin(constants.MISSING_VALUE_MARKERS)
 
-            total_int_positives, total_float_positives = Wrangler.check_type_number(col_data.tolist(), sample_size)
+    @staticmethod
+    def parse_typed_text(col_data: pd.Series, data_type: DataType, data_format: str=None) -> Tuple [np.ndarray, pd.Series, pd.Series]:
+        """
+        Vectorized parsing of a column of strings as BOOLEAN, DATE or GEOSPATIAL values.
+        Args:
+        [pd.Series] = the raw strings
+        [DataType] = BOOLEAN, DATE or GEOSPATIAL
+        [str] = parsing format of DATE values (None = detect it from the column)
+        Return:
+        [np.ndarray] = the typed values (None if the data type can't hold missing values and some are missing)
+        [pd.Series] = mask of values that fit the data type
+        [pd.Series] = mask of missing values
+        """
+        stripped, missing = Wrangler.missing_mask(col_data)
+        match data_type:
+            case DataType.BOOLEAN:
+                mapped = stripped.str.lower().map(constants.BOOLEAN_VALUES)
+                fits = mapped.notna()
+                values = None if (missing.any()) else mapped.to_numpy(dtype=bool, na_value=False)
+            case DataType.DATE:
+                if (data_format is None):
+                    data_format, _ = Wrangler.detect_date_format(stripped[~missing])
+                parsed = pd.to_datetime(stripped.mask(missing), format=data_format, errors='coerce') if (data_format) else pd.Series(pd.NaT, index=col_data.index)
+                fits = parsed.notna()
+                values = parsed.to_numpy(dtype='datetime64[ns]')
+            case DataType.GEOSPATIAL:
+                fits = Wrangler.geospatial_mask(stripped)
+                values = col_data.to_numpy(dtype=object) #kept as text
+            case _:
+                raise ValueError(f"Not a text parsed data type: {data_type}")
+        return values, fits, missing
 
-            if (total_int_positives/sample_size > 0.5) or (total_float_positives/sample_size > 0.5):
-                if (total_int_positives > total_float_positives):
-                    df[col_name] = df[col_name].astype('int64') #change data type of current column to int64
-                    data_types[index] = DataType.INTEGER
+    @staticmethod
+    def detect_date_format(values: pd.Series) -> Tuple [str, float]:
+        """
+        Find the date format (see constants.DATE_PARSE_FORMATS) that parses the largest share of a sample of stripped strings.
+        If several formats parse all of a sample of them, the choice is made by pick_date_format.
+        Return:
+        [str] = the parsing format (None if no value is a date)
+        [float] = share of the values it parses
+        """
+        if (len(values)==0):
+            return None, 0.0
+        best_format = Wrangler.pick_date_format(values)
+        if (best_format is None):
+            best_share = 0.0
+            for date_format, pattern in _DATE_PATTERNS.items():
+                share = float(values.str.fullmatch(pattern, na=False).astype(bool).mean())
+                if (share > best_share):
+                    best_format, best_share = date_format, share
+        if (best_format is None):
+            return None, 0.0
+        parse_format = constants.DATE_PARSE_FORMATS[best_format]
+        share = float(pd.to_datetime(values, format=parse_format, errors='coerce').notna().mean()) #over all the values, the patterns also let impossible dates through (ex: 31/02)
+        return parse_format, share
+
+    @staticmethod
+    def pick_date_format(values: pd.Series, candidates: list[str]=None) -> str:
+        """
+        Pick the date format that matches and parses all of a sample of stripped strings.
+        When several do (ex: day and month both <= 12 in DD/MM/YYYY and MM/DD/YYYY), the one matching the most of all the values wins,
+        then the first one in the order of the candidates, so the same values always get the same format.
+        Args:
+        [pd.Series] = the stripped strings, without missing values
+        list[str] = date formats to try, in order of preference (default: DataFormats.DateFormats)
+        Return:
+        [str] = the date format (None if no candidate matches the whole sample)
+        """
+        sample = Wrangler.stratified_sample(values, constants.DATE_FORMAT_SAMPLE_SIZE)
+        if (len(sample)==0):
+            return None
+        matching = [date_format for date_format in (candidates or DataFormats.DateFormats)
+                    if sample.str.fullmatch(_DATE_PATTERNS[date_format], na=False).all()
+                    and pd.to_datetime(sample, format=constants.DATE_PARSE_FORMATS[date_format], errors='coerce').notna().all()]
+        if (len(matching)>1 and len(values)>len(sample)): #the values left out of the sample may tell them apart
+            shares = [float(values.str.fullmatch(_DATE_PATTERNS[date_format], na=False).mean()) for date_format in matching]
+            return matching[int(np.argmax(shares))] #the first of the best ones
+        return matching[0] if (matching) else None
+
+    @staticmethod
+    def geospatial_mask(stripped: pd.Series) -> pd.Series:
+        """
+        Mask of strings that are a coordinate pair in decimal degrees, ex: '(40.7128, -74.0060)' or 'POINT (-74.0060 40.7128)'.
+        Latitudes must be within [-90, 90] and longitudes within [-180, 180].
+        """
+        fits = pd.Series(False, index=stripped.index)
+        for pattern in (constants.GEO_LAT_LONG_PATTERN, constants.GEO_WKT_POINT_PATTERN):
+            parts = stripped.str.extract(f'^{pattern}$')
+            lat = pd.to_numeric(parts['lat'], errors='coerce')
+            long = pd.to_numeric(parts['long'], errors='coerce')
+            fits |= (lat.abs() <= 90) & (long.abs() <= 180)
+        return fits
+
+    @staticmethod
+    def infer_column_type(sample: pd.Series) -> Tuple [DataType, float, str]:
+        """
+        Guess the data type of a sample of strings. Numbers are checked first, then booleans (true/false), dates and coordinate pairs.
+        Return:
+        [DataType] = INTEGER, FLOAT, BOOLEAN, DATE, GEOSPATIAL or TEXT
+        [float] = confidence, the share of the non missing values that fit the data type (1.0 if all values are missing)
+        [str] = parsing format of DATE columns (None otherwise)
+        """
+        _, missing, is_number, is_integer = Wrangler.numeric_masks(sample)
+        present = int((~missing).sum())
+        if (present==0):
+            return DataType.TEXT, 1.0, None
+        number_count = int(is_number.sum())
+        if (number_count / present > constants.TYPE_INFERENCE_MIN_SHARE):
+            integer_count = int(is_integer.sum())
+            if (integer_count==number_count): #any decimal value makes it a float column
+                return DataType.INTEGER, integer_count / present, None
+            return DataType.FLOAT, number_count / present, None
+
+        values = sample[~missing]
+        _, fits, _ = Wrangler.parse_typed_text(values, DataType.BOOLEAN)
+        if (fits.mean() > constants.TYPE_INFERENCE_MIN_SHARE):
+            return DataType.BOOLEAN, float(fits.mean()), None
+        date_format, share = Wrangler.detect_date_format(values.str.strip())
+        if (share > constants.TYPE_INFERENCE_MIN_SHARE):
+            return DataType.DATE, share, date_format
+        _, fits, _ = Wrangler.parse_typed_text(values, DataType.GEOSPATIAL)
+        if (fits.mean() > constants.TYPE_INFERENCE_MIN_SHARE):
+            return DataType.GEOSPATIAL, float(fits.mean()), None
+        return DataType.TEXT, (present - number_count) / present, None
+
+    @staticmethod
+    def cast_tabulated_chunk(df: pd.DataFrame, data_types: list[DataType], report: list[dict]=None) -> Tuple [pd.DataFrame, list[DataType]]:
+        """
+        Cast the columns of a data frame of strings to their data types. Missing values (see constants.MISSING_VALUE_MARKERS) become NaN/NaT,
+        so an INTEGER column with missing values becomes FLOAT. A column with a value that doesn't fit is demoted (INTEGER => FLOAT => TEXT,
+        BOOLEAN/DATE/GEOSPATIAL => TEXT) and keeps its original strings. BOOLEAN columns with missing values also become TEXT.
+        Args:
+        [pd.DataFrame] = data frame with the raw string values
+        list[DataType] = the data type for each column
+        list[dict] = type report of each column (see infer_tabulated_report), its counts are increased with this chunk (optional)
+        Return:
+        [pd.DataFrame] = the typed data frame
+        list[DataType] = the data types after any demotion
+        """
+        data_types = list(data_types)
+        for index in range(len(df.columns)):
+            inferred_type = report[index]['type'] if (report) else data_types[index]
+            if (data_types[index]==DataType.TEXT and inferred_type==DataType.TEXT):
+                continue
+            col_data = df.iloc[:, index]
+            if (col_data.dtype!=object): #already cast
+                continue
+
+            if (DataType.INTEGER in (data_types[index], inferred_type) or DataType.FLOAT in (data_types[index], inferred_type)):
+                numbers, missing, is_number, is_integer = Wrangler.numeric_masks(col_data)
+                if (report):
+                    fits = is_integer if (inferred_type==DataType.INTEGER) else is_number
+                    report[index]['non_conforming'] += int((~missing & ~fits).sum())
+                    report[index]['missing'] += int(missing.sum())
+                if (data_types[index]==DataType.INTEGER):
+                    if not (is_integer | missing).all():
+                        data_types[index] = DataType.FLOAT
+                    elif (missing.any()): #NaN needs a float column
+                        data_types[index] = DataType.FLOAT
+                    else:
+                        try:
+                            df.isetitem(index, col_data.astype('int64')) #exact, float64 would round large integers
+                            continue
+                        except (ValueError, TypeError, OverflowError):
+                            data_types[index] = DataType.FLOAT
+                if (data_types[index]==DataType.FLOAT):
+                    if (is_number | missing).all():
+                        df.isetitem(index, numbers.to_numpy())
+                    else:
+                        data_types[index] = DataType.TEXT
+                continue
+
+            parsed_type = inferred_type if (data_types[index]==DataType.TEXT) else data_types[index] #demoted columns are still counted
+            values, fits, missing = Wrangler.parse_typed_text(col_data, parsed_type, report[index].get('format') if (report) else None)
+            if (report):
+                report[index]['non_conforming'] += int((~missing & ~fits).sum())
+                report[index]['missing'] += int(missing.sum())
+            if (data_types[index]!=DataType.TEXT):
+                if (values is not None and (fits | missing).all()):
+                    df.isetitem(index, values)
                 else:
-                    df[col_name] = df[col_name].astype('float64') #change data type of current column to int64
-                    data_types[index] = DataType.FLOAT
-        
-        #print (df.dtypes)
-        return df, data_types, delimiter, has_header, None
+                    data_types[index] = DataType.TEXT
+        return df, data_types
+
+    @staticmethod
+    def finish_tabulated_types(df: pd.DataFrame, data_types: list[DataType], report: list[dict], samplers: list[ReservoirSampler]) -> Tuple [pd.DataFrame, list[DataType], list[dict]]:
+        """
+        Check the types guessed from the first chunk against the uniform sample of the whole file kept while streaming.
+        TEXT columns that the whole file sample shows to be of another type are cast once, in memory. Other columns keep
+        their type (any value that didn't fit already demoted them) and get the confidence measured on the whole file.
+        Args:
+        [pd.DataFrame] = the typed data frame
+        list[DataType] = the data type for each column
+        list[dict] = type report of each column
+        list[ReservoirSampler] = sample of the raw values of each column
+        Return:
+        [pd.DataFrame] = the typed data frame
+        list[DataType] = the final data types
+        list[dict] = the final type report
+        """
+        for index, sampler in enumerate(samplers):
+            sampled = Wrangler.infer_column_report(sampler.values())
+            if (sampled['type']==report[index]['type']):
+                report[index]['confidence'] = sampled['confidence']
+            elif (data_types[index]==DataType.TEXT and sampled['type']!=DataType.TEXT): #the first chunk wasn't representative
+                column_df, column_types = Wrangler.cast_tabulated_chunk(pd.DataFrame({0: df.iloc[:, index]}), [sampled['type']], [sampled])
+                report[index] = sampled
+                if (column_types[0]!=DataType.TEXT):
+                    df.isetitem(index, column_df.iloc[:, 0].to_numpy())
+                    data_types[index] = column_types[0]
+        return df, data_types, report
+
+    @staticmethod
+    def handle_tabulated_stream(chunks, delimiter=None, has_header=True, engine='python', progress: LoadProgress=None, reopen=None) -> Tuple [pd.DataFrame, list[DataType], str, bool, str]: #the typed data frame, data types, delimiter used, has_header, possible errors
+        """
+        Build the typed data frame from an iterator of line chunks (see Fetcher.stream_CSV).
+        Each chunk is split and cast on its own, so only one chunk of raw text is held in memory at a time.
+        A column demoted to TEXT by a later chunk gets back the original strings of the chunks already cast: they are read
+        again through reopen if given, else the raw strings of the cast chunks are kept until the end of the file.
+        Args:
+        [Iterator[list[str]]] = the line chunks
+        [str] = the delimiter to use, if known
+        [bool] = if the first line is a header
+        [str] = parser engine used to split each chunk (see split_tabulated)
+        [LoadProgress] = progress reported after each chunk, also used to cancel the load (optional)
+        [callable] = returns a new iterator over the same line chunks, from the start of the file (optional)
+        Return:
+        [pd.DataFrame] = the typed data frame
+        list[DataType] = the data type for each column
+        [str] = the delimiter
+        [bool] = if data has header
+        [str] = error string (None if OK)
+        """
+        try:
+            first_chunk = next(chunks, None)
+            if not (first_chunk):
+                return None, None, '', has_header, "Empty file."
+
+            if (has_header):
+                if (len(first_chunk)<2):
+                    return None, None, '', has_header, "Data doesn't have enough lines when excluding headers"
+                header = first_chunk[0].rstrip('\r\n')
+                sample_data = Wrangler._sample_lines(first_chunk)
+                header, delimiter, error = Wrangler.header_comprehension(header, sample_data, delimiter)
+                if (error):
+                    return None, None, delimiter, has_header, error
+                header = Wrangler.split_header(header, first_chunk[0], delimiter, engine)
+                if (progress):
+                    progress.bytes_read += len(first_chunk[0])
+                first_chunk = first_chunk[1:]
+                col_count = len(header)
+            else:
+                if (delimiter is None):
+                    delimiter = Wrangler.sniff_delimiter(Wrangler._sample_lines(first_chunk))[0]
+                col_count = len(Wrangler._split_lines(first_chunk[:1], delimiter)[0])
+                header = list(range(1, col_count+1)) #create numeric headers if none available
+
+            data_types = None
+            report = None
+            samplers = [ReservoirSampler(seed=index) for index in range(col_count)] #uniform sample of the whole file, for the final type check
+            columns = [[] for _ in range(col_count)] #typed arrays for each column, one per chunk
+            raw_columns = None if (reopen) else [[] for _ in range(col_count)] #raw strings of the cast chunks, None for the chunks kept as text
+            chunk = first_chunk
+            while chunk is not None:
+                chunk_df = Wrangler.split_tabulated(chunk, delimiter, col_count, engine) #extra fields in malformed lines are dropped
+                raw_arrays = [chunk_df.iloc[:, index].to_numpy(dtype=object) for index in range(col_count)]
+                for index, sampler in enumerate(samplers):
+                    sampler.add(raw_arrays[index])
+                if (data_types is None):
+                    report = [Wrangler.infer_column_report(sampler.values()) for sampler in samplers] #types are guessed from the first chunk
+                    data_types = [entry['type'] for entry in report]
+                chunk_df, data_types = Wrangler.cast_tabulated_chunk(chunk_df, data_types, report)
+                for index in range(col_count):
+                    array = chunk_df.iloc[:, index].to_numpy()
+                    columns[index].append(array)
+                    if (raw_columns is not None):
+                        raw_columns[index].append(raw_arrays[index] if (array.dtype!=object) else None)
+                if (progress):
+                    progress.step(rows=len(chunk_df), bytes_read=sum(map(len, chunk)))
+                del chunk_df, raw_arrays
+                chunk = next(chunks, None)
+
+            stale = {index: [number for number, array in enumerate(columns[index]) if array.dtype!=object] for index in range(col_count) if data_types[index]==DataType.TEXT}
+            stale = {index: numbers for index, numbers in stale.items() if numbers} #chunks cast before their column was demoted to TEXT
+            if (stale):
+                if (raw_columns is None):
+                    raw_columns = Wrangler._reread_raw_chunks(reopen(), stale, delimiter, col_count, has_header, engine)
+                for index, numbers in stale.items():
+                    for number in numbers:
+                        columns[index][number] = raw_columns[index][number]
+            del raw_columns
+
+            df = pd.DataFrame({index: Wrangler.join_column_chunks(columns[index], data_types[index]) for index in range(col_count)}, copy=False)
+            df, data_types, report = Wrangler.finish_tabulated_types(df, data_types, report, samplers)
+            df.columns = header
+            df.attrs['type_report'] = report
+            return df, data_types, delimiter, has_header, None
 
+        except Exception as e:
+            return None, None, delimiter, has_header, f"Reading file error: {e}"
 
+    @staticmethod
+    def _reread_raw_chunks(chunks, stale: dict, delimiter: str, col_count: int, has_header=True, engine='python') -> list[dict]:
+        """
+        Read the line chunks again and split only the ones holding values of a column demoted to TEXT after they were cast.
+        Args:
+        [Iterator[list[str]]] = the line chunks, from the start of the file
+        dict = for each column index, the chunk numbers to get back
+        [str] = the delimiter
+        [int] = number of columns
+        [bool] = if the first line is a header
+        [str] = parser engine (see split_tabulated), the same one used for the first read
+        Return:
+        list[dict] = for each column index, the raw strings of each of its chunk numbers
+        """
+        needed = set().union(*stale.values())
+        raw_columns = [{} for _ in range(col_count)]
+        for number, chunk in enumerate(chunks):
+            if (number in needed):
+                chunk_df = Wrangler.split_tabulated(chunk[1:] if (has_header and number==0) else chunk, delimiter, col_count, engine)
+                for index, numbers in stale.items():
+                    if (number in numbers):
+                        raw_columns[index][number] = chunk_df.iloc[:, index].to_numpy(dtype=object)
+            if (number>=max(needed)): #the rest of the file isn't needed
+                break
+        return raw_columns
+
+    @staticmethod
+    def handle_tabulated_parallel(file_path: str, delimiter=None, has_header=True, workers: int=None, engine='python', progress: LoadProgress=None, encoding='utf-8') -> Tuple [pd.DataFrame, list[DataType], str, bool, str]: #the typed data frame, data types, delimiter used, has_header, possible errors
+        """
+        Parse a tabulated file in a pool of processes, each one working on a newline aligned byte range.
+        The header, delimiter and data types are found first from the head of the file and shared with every worker.
+        A column demoted to TEXT in one range gets the original strings of the ranges where it was cast, read again from the file.
+        Fields with quoted line breaks are not supported in this mode.
+        Args:
+        [str] = full file path
+        [str] = the delimiter to use, if known
+        [bool] = if the first line is a header
+        [int] = number of worker processes (None = number of cores)
+        [str] = parser engine used by each worker (see split_tabulated)
+        [LoadProgress] = progress reported as byte ranges are done, also used to cancel the load (optional)
+        [str] = text encoding (must be ASCII compatible, see constants.ASCII_COMPATIBLE_ENCODINGS)
+        Return:
+        [pd.DataFrame] = the typed data frame
+        list[DataType] = the data type for each column
+        [str] = the delimiter
+        [bool] = if data has header
+        [str] = error string (None if OK)
+        """
+        try:
+            file_size = os.path.getsize(file_path)
+            with open(file_path, "rb") as file:
+                signature_bytes = file.read(8)
+                if any(signature_bytes.startswith(signature) for signature in constants.COMPRESSION_SIGNATURES):
+                    return None, None, '', has_header, "Compressed files can't be split in byte ranges, use the stream mode"
+                if (encoding not in constants.ASCII_COMPATIBLE_ENCODINGS):
+                    return None, None, '', has_header, f"{encoding} files can't be split in byte ranges, use the stream mode"
+                file.seek(0)
+                head_lines = []
+                for _ in range(constants.DATA_TYPE_SAMPLE_SIZE + 1): #header plus enough lines to guess the data types
+                    line = file.readline()
+                    if not (line):
+                        break
+                    head_lines.append(line.decode(encoding))
+                if (has_header):
+                    if (len(head_lines)<2):
+                        return None, None, '', has_header, "Data doesn't have enough lines when excluding headers"
+                    file.seek(0)
+                    data_start = len(file.readline())
+                    header = head_lines[0].rstrip('\r\n')
+                    sample_data = head_lines
+                    header, delimiter, error = Wrangler.header_comprehension(header, sample_data, delimiter)
+                    if (error):
+                        return None, None, delimiter, has_header, error
+                    header = Wrangler.split_header(header, head_lines[0], delimiter, engine)
+                    head_lines = head_lines[1:]
+                else:
+                    data_start = 0
+                    if (delimiter is None):
+                        delimiter = Wrangler.sniff_delimiter(head_lines)[0]
+                    header = list(range(1, len(Wrangler._split_lines(head_lines[:1], delimiter)[0])+1))
+                col_count = len(header)
+
+                head_df = Wrangler.split_tabulated(head_lines, delimiter, col_count, engine)
+                report = Wrangler.infer_tabulated_report(head_df)
+                data_types = [entry['type'] for entry in report]
+
+                workers = workers or os.cpu_count() or 1
+                range_count = 1 if (file_size < constants.PARALLEL_PARSE_MIN_BYTES) else workers * constants.PARALLEL_PARSE_RANGES_PER_WORKER
+                boundaries = [data_start]
+                for index in range(1, range_count): #move each cut to the start of the next line
+                    file.seek(max(data_start + (file_size - data_start) * index // range_count, boundaries[-1]))
+                    file.readline()
+                    boundaries.append(min(file.tell(), file_size))
+                boundaries.append(file_size)
+            byte_ranges = [(start, end) for start, end in zip(boundaries[:-1], boundaries[1:]) if end > start]
+
+            results = []
+            if (progress):
+                progress.bytes_read += data_start
+            if (len(byte_ranges)<=1 or workers==1):
+                for start, end in byte_ranges:
+                    results.append(_parse_byte_range(file_path, start, end, delimiter, data_types, engine, report, encoding))
+                    if (progress):
+                        progress.step(rows=len(results[-1][0][0]), bytes_read=end - start)
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    futures = [pool.submit(_parse_byte_range, file_path, start, end, delimiter, data_types, engine, report, encoding) for start, end in byte_ranges]
+                    try:
+                        for future, (start, end) in zip(futures, byte_ranges): #keep the file order
+                            results.append(future.result())
+                            if (progress):
+                                progress.step(rows=len(results[-1][0][0]), bytes_read=end - start)
+                    except LoadCancelled:
+                        for future in futures: #don't start the ranges left
+                            future.cancel()
+                        raise
+
+            rank = {DataType.TEXT: 0, DataType.FLOAT: 1, DataType.INTEGER: 2, DataType.BOOLEAN: 2, DataType.DATE: 2, DataType.GEOSPATIAL: 2}
+            columns = [[] for _ in range(col_count)]
+            samplers = [ReservoirSampler(seed=index) for index in range(col_count)]
+            for arrays, range_types, range_report, range_samplers in results:
+                for index in range(col_count):
+                    samplers[index].merge(range_samplers[index])
+                    columns[index].append(arrays[index])
+                    report[index]['non_conforming'] += range_report[index]['non_conforming']
+                    report[index]['missing'] += range_report[index]['missing']
+                    if (rank[range_types[index]] < rank[data_types[index]]): #a demotion in any range demotes the whole column (INTEGER => FLOAT => TEXT, others => TEXT)
+                        data_types[index] = range_types[index]
+            del results
+
+            stale = {index: {number for number, array in enumerate(columns[index]) if array.dtype!=object} for index in range(col_count) if data_types[index]==DataType.TEXT}
+            for number, (start, end) in enumerate(byte_ranges): #ranges cast before another range demoted their column to TEXT get back their original strings
+                indexes = [index for index, numbers in stale.items() if number in numbers]
+                if (indexes):
+                    range_df = Wrangler.split_tabulated(_read_byte_range(file_path, start, end, encoding), delimiter, col_count, engine)
+                    for index in indexes:
+                        columns[index][number] = range_df.iloc[:, index].to_numpy(dtype=object)
+                    del range_df
+
+            df = pd.DataFrame({index: Wrangler.join_column_chunks(columns[index], data_types[index]) for index in range(col_count)}, copy=False)
+            df, data_types, report = Wrangler.finish_tabulated_types(df, data_types, report, samplers)
+            df.columns = header
+            df.attrs['type_report'] = report
+            return df, data_types, delimiter, has_header, None
+
+        except Exception as e:
+            return None, None, delimiter, has_header, f"Reading file error: {e}"
+
+    @staticmethod
+    def split_header(header, header_line: str, delimiter: str, engine='python') -> list:
+        """
+        Get the header labels as a list. Quote aware engines re-split the header line so quoted labels keep their delimiters.
+        """
+        if isinstance(header, str): #no delimiter found, single column
+            return [header]
+        if (delimiter and Wrangler.resolve_engine(engine)!='python'):
+            return next(csv.reader([header_line.rstrip('\r\n')], delimiter=delimiter))
+        return header
+
+    @staticmethod
+    def _split_lines(lines, delimiter) -> list[list[str]]:
+        if (delimiter):
+            return [line.rstrip('\r\n').split(delimiter) for line in lines]
+        return [[line.rstrip('\r\n')] for line in lines]
+
+    @staticmethod
+    def join_column_chunks(arrays: list, data_type: DataType):
+        """
+        Concatenate the typed chunks of one column, releasing them as it goes.
+        Chunks cast before a column got demoted are converted to the final type. BOOLEAN chunks with missing values are nullable
+        booleans (see Fetcher._typed_column_chunk), the column is then a nullable 'boolean' one.
+        """
+        if (data_type==DataType.BOOLEAN) and any(array.dtype!=bool for array in arrays):
+            result = pd.array(np.concatenate([np.asarray(array, dtype=object) for array in arrays]), dtype='boolean')
+            arrays.clear()
+            return result
+        if (data_type!=DataType.TEXT): #NA of nullable chunks becomes NaN/NaT
+            arrays[:] = [array.to_numpy(dtype=object, na_value=None) if isinstance(array, pd.api.extensions.ExtensionArray) else array for array in arrays]
+        match data_type:
+            case DataType.INTEGER:
+                result = np.concatenate(arrays).astype('int64', copy=False)
+            case DataType.FLOAT:
+                result = np.concatenate(arrays).astype('float64', copy=False)
+            case DataType.BOOLEAN:
+                result = np.concatenate(arrays).astype('bool', copy=False)
+            case DataType.DATE:
+                result = np.concatenate(arrays).astype('datetime64[ns]', copy=False)
+            case _:
+                result = np.concatenate([array if (isinstance(array, np.ndarray) and array.dtype==object) else Wrangler._text_array(array) for array in arrays])
+        arrays.clear()
+        return result
+
+    @staticmethod
+    def _text_array(array) -> np.ndarray:
+        """
+        Convert a typed array back to an object array of strings, written as str() writes the source values. Missing values become None.
+        """
+        if isinstance(array, pd.api.extensions.ExtensionArray): #nullable booleans
+            return np.array([None if (value is None) else str(value) for value in array.to_numpy(dtype=object, na_value=None)], dtype=object)
+        if (array.dtype.kind=='M'): #str() of the source datetime, not the numpy ISO form
+            missing = np.isnat(array)
+            text = np.full(len(array), None, dtype=object)
+            text[~missing] = [str(value) for value in pd.DatetimeIndex(array[~missing]).to_pydatetime()]
+            return text
+        text = array.astype(str).astype(object)
+        if (array.dtype.kind=='f'):
+            text[np.isnan(array)] = None
+        return text
 
     @staticmethod
     def check_type_number(data_list,sample_size) -> Tuple [int, int]: #give a grade for the likelyhood of it being a number column
         """
-        Check if a sample of a list of strings can be converted to numbers
+        Check if a sample of a list of strings can be converted to numbers (vectorized, on a stratified sample of the whole list)
         Args:
         list[str] = the list of str to check.
         [int] = sample size
@@ -114,77 +949,51 @@ class Wrangler:
         [int] = total result for integer conversions (within sample)
         [int] = total result for float conversions (within sample)
         """
-        data_size = len(data_list)
-        sample_list = data_list[0:min(sample_size,data_size-1)] #get sample data from first "sample_size" items.
-        total_int_positives = 0
-        total_float_positives = 0
-        
-        for item in sample_list:
-            try:
-                int(item)
-                total_int_positives += 1
-            except ValueError:
-                try:
-                    float(item)
-                    total_float_positives += 1
-                except ValueError:
-                    pass
+        sample = Wrangler.stratified_sample(pd.Series(data_list, dtype=object), sample_size)
+        _, _, is_number, is_integer = Wrangler.numeric_masks(sample)
+        total_int_positives = int(is_integer.sum())
+        total_float_positives = int(is_number.sum()) - total_int_positives
         return total_int_positives, total_float_positives
     
     #The following methods will be used post initial loading to check if it is possible to change to change column to another data type.
     @staticmethod
     def check_type_date(data_column: list[str], data_format: str=None) -> Tuple [bool, int]:
         """
-        Check if a list of string is valid date format.
+        Check if a list of string is valid date format (missing values are allowed).
         Args:
         list[str] = the list of str to check.
-        [str] = intended format type, if any
+        [str] = intended format type, if any (see DataFormats.DateFormats, None = pick it from the column)
         Return:
         [bool] = result of the operation
         [int] = number of invalid conversions (if >0 return Failed (false) result)
         """
-        items = data_column
-        data_format = data_format
-        regexp_pattern = r'^(0[1-9]|[12][0-9]|3[01])/(0[1-9]|1[0-2])/\d{4}$'
-        m_month_names = "|".join(constants.M_MONTH_NAMES)
-        mm_month_names = "|".join(constants.MM_MONTH_NAMES)
-        """this regex 
-            (valid characters for day: numbers from 01 to 09 0[1-9] + numbers from 10 to 29 [12][0-9] + numbers from 30 to 31 3[01])
-            (valid characters for month: numbers from 01 to 09 + numbers from 10 to 12)
-            (valid characters for year): any 4 digits
-            after must check for valid date
-        """
-        match data_format:
-            case "DD/MM/YYYY":
-                regexp_pattern = r'^(0[1-9]|[12][0-9]|3[01])/(0[1-9]|1[0-2])/\d{4}$'
-            case "DD-MM-YYYY":
-                regexp_pattern = r'^(0[1-9]|[12][0-9]|3[01])-(0[1-9]|1[0-2])-\d{4}$'
-            case "YYYY/MM/DD":
-                regexp_pattern = r'^\d{4}/(0[1-9]|1[0-2])/(0[1-9]|[12][0-9]|3[01])'
-            case "YYYY-MM-DD":
-                regexp_pattern = r'^\d{4}-(0[1-9]|1[0-2])-(0[1-9]|[12][0-9]|3[01])'
-            case "DD.MM.YYYY":
-                regexp_pattern = r'^(0[1-9]|[12][0-9]|3[01]).(0[1-9]|1[0-2]).\d{4}$'
-            case "MM/DD/YYYY":
-                regexp_pattern = r'^(0[1-9]|1[0-2])/(0[1-9]|[12][0-9]|3[01])/\d{4}$'
-            case "m DD, YYYY":
-                regexp_pattern = fr'({m_month_names}) \d{2}, \d{4}$'
-            case "mm DD, YYYY":
-                regexp_pattern = fr'({mm_month_names}) \d{2}, \d{4}$'
-            case "DD mm YYYY":
-                regexp_pattern = fr'^(0[1-9]|[12][0-9]|3[01]) {mm_month_names} \d{4}$'
-            case "YYYYMMDD":
-                regexp_pattern = r'\d{4}(0[1-9]|1[0-2])(0[1-9]|[12][0-9]|3[01])'
-            case _:
-                return False, 0 #failed at initial step
-            
-        result = all(re.fullmatch(regexp_pattern, item) for item in items) #TRUE = conversions where possible, FALSE = at least on conversion was not possible
+        stripped, missing = Wrangler.missing_mask(pd.Series(data_column, dtype=object))
+        if (data_format is None):
+            present = stripped[~missing]
+            data_format = Wrangler.pick_date_format(present) or max(DataFormats.DateFormats, key=lambda name: int(present.str.fullmatch(_DATE_PATTERNS[name], na=False).sum())) #else the format that fits the most values
+        pattern = _DATE_PATTERNS.get(data_format)
+        if (pattern is None): #unknown format, every value that isn't missing fails
+            failed_conversions = int((~missing).sum())
+            return failed_conversions==0, failed_conversions
+        matches = stripped.str.fullmatch(pattern, na=False).astype(bool) #single pass, TRUE = conversion is possible
+        failed_conversions = int((~(matches | missing)).sum())
+        return failed_conversions==0, failed_conversions
 
-        if (result):
-            return True, 0 #success
-        else:
-            failed_conversions = len([item for item in items if not re.fullmatch(regexp_pattern, item)])
-            return False, failed_conversions #failed at pattern matching
+    @staticmethod
+    def convert_type_date(data_column: list[str], data_format: str) -> Tuple [np.ndarray, int]:
+        """
+        Convert a list of strings to dates with an explicit format. Missing values and invalid dates become NaT.
+        Args:
+        list[str] = the list of str to convert.
+        [str] = date format (see DataFormats.DateFormats)
+        Return:
+        [np.ndarray] = the datetime64 values
+        [int] = number of invalid conversions
+        """
+        stripped, missing = Wrangler.missing_mask(pd.Series(data_column, dtype=object))
+        parsed = pd.to_datetime(stripped.mask(missing), format=constants.DATE_PARSE_FORMATS[data_format], errors='coerce')
+        failed_conversions = int((parsed.isna() & ~missing).sum())
+        return parsed.to_numpy(dtype='datetime64[ns]'), failed_conversions
 
     @staticmethod
     def check_type_time(data_column: list[str], data_format: str=None) -> Tuple [bool, int]:
@@ -258,7 +1067,7 @@ class Wrangler:
 
 
     @staticmethod
-    def handle_tabulated(raw_data,delimiter=None,has_header=True) -> Tuple [pd.DataFrame, list[DataType], str, bool, str]: #the actual array, delimiter used, possible errors
+    def handle_tabulated(raw_data,delimiter=None,has_header=True,engine='python') -> Tuple [pd.DataFrame, list[DataType], str, bool, str]: #the actual array, delimiter used, possible errors
 
         #THERE NEEDS TO BE A METHOD TO IDENTIFY HEADER TYPES.
 
@@ -266,11 +1075,18 @@ class Wrangler:
             if (len(raw_data)<2): #if you exclude the header there is no data.
                 return None, '', True, "Data doesn't have enough lines when excluding headers"
             else:
-                header = raw_data[0]
-                sample_data = raw_data[0:min(4,len(raw_data)-1)] #tries to sample 4 lines or less if data is small
+                header = raw_data[0].rstrip('\r\n')
+                sample_data = Wrangler._sample_lines(raw_data)
                 header, delimiter, error = Wrangler.header_comprehension(header, sample_data, delimiter)
-                data, data_types, delimiter, has_header, error = Wrangler.break_tabulated(raw_data,delimiter,has_header,header)
+                header = Wrangler.split_header(header, raw_data[0], delimiter, engine)
+                data, data_types, delimiter, has_header, error = Wrangler.break_tabulated(raw_data,delimiter,has_header,header,engine)
                 return data, data_types, delimiter, has_header, error
+        else:
+            if (len(raw_data)<1):
+                return None, None, '', False, "Empty file."
+            if (delimiter is None):
+                delimiter = Wrangler.sniff_delimiter(Wrangler._sample_lines(raw_data))[0]
+            return Wrangler.break_tabulated(raw_data,delimiter,has_header,[],engine)
             
 
 
@@ -0,0 +1,35 @@
+"""
+File: test_cache.py
+Author: Alex Mees
+Date: 2025-03-13
+Description: The .npz fallback of the data set cache keeps every column type and loads without pickle
+License: MIT
+"""
+# Third-party imports
+import numpy as np
+import pandas as pd
+
+# Local application imports
+from src import cache
+from src.data_format import DataType
+
+
+def test_npz_cache_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, 'feather', None) #as if pyarrow wasn't installed
+    file_path = tmp_path / 'source.csv'
+    file_path.write_text('source')
+    df = pd.DataFrame({'text': ['héllo', None, '', 'a,b'],
+                       'integer': [1, 2, 3, 4],
+                       'float': [1.5, np.nan, 2.0, 3.0],
+                       'nullable': pd.array([True, None, False, True], dtype='boolean'),
+                       'date': pd.to_datetime(['2020-01-01', None, '2021-01-01', '2022-02-02']),
+                       'boolean': [True, False, True, True]})
+    data_types = [DataType.TEXT, DataType.INTEGER, DataType.FLOAT, DataType.BOOLEAN, DataType.DATE, DataType.BOOLEAN]
+    dataset_cache = cache.DatasetCache(cache_dir=str(tmp_path / 'cache'))
+    assert dataset_cache.store(str(file_path), df, data_types, ',', True) is None
+    with np.load(next((tmp_path / 'cache').glob('*.npz')), allow_pickle=False) as arrays:
+        assert all(arrays[name].dtype != object for name in arrays.files)
+    loaded, loaded_types, delimiter, has_header, error = dataset_cache.load(str(file_path))
+    assert error is None
+    assert loaded_types == data_types
+    pd.testing.assert_frame_equal(loaded, df)
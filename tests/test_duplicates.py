@@ -0,0 +1,30 @@
+"""
+File: test_duplicates.py
+Author: Alex Mees
+Date: 2025-03-13
+Description: Near duplicates are only found in text columns, numbers with other signs or decimals are never grouped
+License: MIT
+"""
+# Third-party imports
+import pandas as pd
+
+# Local application imports
+from src.data_format import DataType, TableFormat
+from src.text_tools import normalize_keys
+
+
+def test_normalize_keys_keep_signs_and_decimals():
+    keys = normalize_keys(pd.Series(['15', '-15', '1.5', 'Argen  tina.', 'a - 5']))
+    assert keys.tolist() == ['15', '-15', '1.5', 'argentina', 'a5']
+
+
+def test_near_duplicates_only_normalize_text_columns():
+    data = pd.DataFrame({'name': ['Argentina', 'argen tina', 'Chile', 'chile.'], 'value': [15, 15, 15, -15]})
+    table = TableFormat(dtype=[DataType.TEXT, DataType.INTEGER], data=data)
+    groups, error = table.find_duplicates(near=True)
+    assert error is None
+    assert groups == [[0, 1]] #the Chile rows have different values
+    groups, error = table.find_duplicates([1], near=True) #no text column: exact values
+    assert groups == [[0, 1, 2]]
+    numbers = TableFormat(dtype=[DataType.FLOAT], data=pd.DataFrame({'value': [1.5, 15.0, -15.0]}))
+    assert numbers.find_duplicates(near=True) == ([], None)
@@ -0,0 +1,38 @@
+"""
+File: test_numeric_expression.py
+Author: Alex Mees
+Date: 2025-03-13
+Description: INTEGER columns are computed exactly in int64 and never wrap around on overflow
+License: MIT
+"""
+# Third-party imports
+import pandas as pd
+import pytest
+
+# Local application imports
+from src.data_format import DataType, NumericExpression, TableFormat
+
+
+def integer_table(values: list[int]) -> TableFormat:
+    return TableFormat(dtype=[DataType.INTEGER], data=pd.DataFrame({'value': values}))
+
+
+def test_integer_steps_stay_exact():
+    table = integer_table([2**53 + 1, -3])
+    changed, _ = NumericExpression(table, 0).offset(2).scale(3).commit()
+    assert changed
+    assert table.dtype == [DataType.INTEGER]
+    assert table.data['value'].tolist() == [(2**53 + 3) * 3, -3]
+
+
+def test_integer_overflow_is_not_wrapped():
+    table = integer_table([2**40, 1])
+    values = NumericExpression(table, 0).scale(2**30).evaluate(table.data['value'])
+    assert values.dtype == 'float64'
+    assert values[0] == 2.0**70
+    large = integer_table([2**62, 1])
+    with pytest.raises(ValueError):
+        NumericExpression(large, 0).scale(4).evaluate(large.data['value'])
+    changed, _ = NumericExpression(large, 0).scale(4).commit()
+    assert not changed
+    assert large.data['value'].tolist() == [2**62, 1]
@@ -0,0 +1,49 @@
+"""
+File: test_sqlite_reading.py
+Author: Alex Mees
+Date: 2025-03-13
+Description: SQLite filters are passed as query parameters, and empty results keep the column dtypes
+License: MIT
+"""
+# Standard library imports
+import sqlite3
+
+# Third-party imports
+import pytest
+
+# Local application imports
+from src.data_format import DataType
+from src.fetcher import Fetcher
+
+
+@pytest.fixture
+def database_file(tmp_path):
+    """
+    A database with one table of typed columns.
+    """
+    file_path = tmp_path / 'people.sqlite'
+    conn = sqlite3.connect(file_path)
+    conn.execute('CREATE TABLE people (name TEXT, age INTEGER, height REAL, active BOOLEAN, born DATE)')
+    conn.executemany('INSERT INTO people VALUES (?, ?, ?, ?, ?)',
+                     [('Ana', 31, 1.62, 1, '1993-04-01'), ("O'Neil", 45, 1.80, 0, '1979-11-23'), ('Bo', 22, None, 1, '2002-01-15')])
+    conn.commit()
+    conn.close()
+    return str(file_path)
+
+
+def test_filters_are_parameters(database_file):
+    df, _, error = Fetcher.read_SQLite(database_file, 'people', where=[('age', '>', '30')])
+    assert error is None
+    assert df['name'].tolist() == ['Ana', "O'Neil"]
+    df, _, error = Fetcher.read_SQLite(database_file, 'people', where=[('name', '=', "O'Neil"), ('height', 'IS NOT NULL', None)])
+    assert df['age'].tolist() == [45]
+    df, _, error = Fetcher.read_SQLite(database_file, 'people', where=[('name', '= name OR 1=1 --', 'x')])
+    assert df is None and error.startswith('Unknown filter operator')
+
+
+def test_empty_result_keeps_dtypes(database_file):
+    df, data_types, error = Fetcher.read_SQLite(database_file, 'people', where=[('age', '>', '100')])
+    assert error is None
+    assert len(df) == 0
+    expected = {DataType.TEXT: 'object', DataType.INTEGER: 'int64', DataType.FLOAT: 'float64', DataType.BOOLEAN: 'bool', DataType.DATE: 'datetime64[ns]'}
+    assert [str(dtype) for dtype in df.dtypes] == [expected[data_type] for data_type in data_types]
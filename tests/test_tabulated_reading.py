@@ -0,0 +1,85 @@
+"""
+File: test_tabulated_reading.py
+Author: Alex Mees
+Date: 2025-03-13
+Description: The streamed, parallel and whole-file readers of tabulated files must give the same typed data set
+License: MIT
+"""
+# Third-party imports
+import pandas as pd
+import pytest
+
+# Local application imports
+from src import constants
+from src.fetcher import Fetcher
+from src.wrangler import Wrangler
+
+CHUNK_SIZE = 5 #lines per streamed chunk, small so the type change happens after several chunks
+
+
+@pytest.fixture
+def changing_type_file(tmp_path):
+    """
+    A file whose 'code' and 'price' columns look numeric in the first chunks and hold text further down.
+    """
+    lines = ['id,code,price,count']
+    for row in range(1, 31):
+        code = f'{row:03d}' if (row < 18) else f'A{row}'
+        price = f'{row}.50' if (row < 23) else 'free'
+        lines.append(f'{row},{code},{price},{row * 2}')
+    file_path = tmp_path / 'changing_type.csv'
+    file_path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return str(file_path)
+
+
+@pytest.fixture
+def ragged_file(tmp_path):
+    """
+    A file with lines missing fields, lines with extra fields and a quoted delimiter.
+    """
+    lines = ['id,amount,label', '1,10,a', '2,20', '3,30,c,extra', '4,40,"d,e"', '5,50,f,g,h', '6,60,i']
+    file_path = tmp_path / 'ragged.csv'
+    file_path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return str(file_path)
+
+
+def read_full(file_path, engine='python'):
+    raw_data, error = Fetcher.read_CSV(file_path)
+    assert error is None
+    data, data_types, _, _, error = Wrangler.handle_tabulated(raw_data, ',', True, engine)
+    assert error is None
+    return data, data_types
+
+
+@pytest.mark.parametrize('reread', [True, False])
+def test_stream_keeps_text_of_demoted_columns(changing_type_file, reread):
+    expected, expected_types = read_full(changing_type_file)
+    chunks, error = Fetcher.stream_CSV(changing_type_file, CHUNK_SIZE)
+    assert error is None
+    reopen = (lambda: Fetcher.stream_CSV(changing_type_file, CHUNK_SIZE)[0]) if (reread) else None
+    data, data_types, _, _, error = Wrangler.handle_tabulated_stream(chunks, ',', True, reopen=reopen)
+    assert error is None
+    assert data_types==expected_types
+    assert data['code'].iloc[0]=='001'
+    assert data['price'].iloc[0]=='1.50'
+    pd.testing.assert_frame_equal(data, expected, check_dtype=False)
+
+
+@pytest.mark.parametrize('engine', [engine for engine in constants.PARSER_ENGINES if engine!='csv'])
+def test_engines_keep_ragged_lines(ragged_file, engine):
+    expected, expected_types = read_full(ragged_file, 'csv')
+    data, data_types = read_full(ragged_file, engine)
+    assert len(data)==6
+    assert data_types==expected_types
+    if (Wrangler.resolve_engine(engine)=='python'): #not quote aware, only the quoted line differs
+        data, expected = data.drop(index=3), expected.drop(index=3)
+    pd.testing.assert_frame_equal(data, expected, check_dtype=False)
+
+
+def test_parallel_keeps_text_of_demoted_columns(changing_type_file, monkeypatch):
+    monkeypatch.setattr(constants, 'PARALLEL_PARSE_MIN_BYTES', 0) #cut even a small file in several byte ranges
+    expected, expected_types = read_full(changing_type_file)
+    data, data_types, _, _, error = Wrangler.handle_tabulated_parallel(changing_type_file, ',', True, workers=1)
+    assert error is None
+    assert data_types==expected_types
+    pd.testing.assert_frame_equal(data, expected, check_dtype=False)